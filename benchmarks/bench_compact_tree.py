@@ -0,0 +1,62 @@
+"""Memory and traversal benchmark: ``Node`` objects vs ``CompactMoveTree``.
+
+Builds the same wide-and-deep variation tree both ways from one token
+stream and reports traced memory, build time and line-extraction time.
+
+    python benchmarks/bench_compact_tree.py --plies 50 --branches 400
+"""
+
+from __future__ import annotations
+import argparse
+import time
+import tracemalloc
+
+from anki_chess.pgn2anki.parser import (
+    _iter_lines_dfs,
+    _parse_moves,
+    _parse_moves_compact,
+)
+
+
+def build_tokens(plies: int, branches: int) -> list:
+    """Mainline of ``plies`` moves with ``branches`` variations per ply."""
+    tokens = []
+    for ply in range(plies):
+        tokens.append(f"m{ply % 40}")
+        for b in range(branches):
+            tokens.append("(")
+            tokens.extend(f"v{(b + i) % 60}" for i in range(plies - ply))
+            tokens.append(")")
+    return tokens
+
+
+def _measure(name: str, build, walk) -> None:
+    tracemalloc.start()
+    start = time.perf_counter()
+    tree = build()
+    built = time.perf_counter() - start
+    size, _ = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    start = time.perf_counter()
+    n_lines = sum(1 for _ in walk(tree))
+    walked = time.perf_counter() - start
+    print(
+        f"{name:8s} {size / 1e6:8.1f} MB  build {built:6.2f} s  "
+        f"walk {walked:6.2f} s  {n_lines} lines"
+    )
+
+
+def main(argv=None):
+    ap = argparse.ArgumentParser()
+    ap.add_argument("--plies", type=int, default=50)
+    ap.add_argument("--branches", type=int, default=400)
+    args = ap.parse_args(argv)
+
+    tokens = build_tokens(args.plies, args.branches)
+    print(f"{len(tokens)} tokens")
+    _measure("node", lambda: _parse_moves(tokens, 0)[0], _iter_lines_dfs)
+    _measure("compact", lambda: _parse_moves_compact(tokens), lambda t: t.iter_lines())
+
+
+if __name__ == "__main__":
+    main()
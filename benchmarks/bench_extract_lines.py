@@ -0,0 +1,92 @@
+"""Benchmark for move-tree line extraction.
+
+Builds a tree with a ``--plies``-long mainline and ``--branches`` side
+lines hanging off every mainline ply, each running to the same depth, and
+times the iterative extractor against the previous recursive one (which
+copied the whole path at every node).
+
+    python benchmarks/bench_extract_lines.py --plies 50 --branches 100
+"""
+
+from __future__ import annotations
+import argparse
+import sys
+import time
+
+from anki_chess.pgn2anki.node import Node
+from anki_chess.pgn2anki.parser import _iter_lines_dfs
+
+
+def _recursive_extract(node, prefix, out, visited):
+    if id(node) in visited:
+        return
+    visited.add(id(node))
+    if node.san is not None:
+        prefix = prefix + [node.san]
+    if not node.children:
+        if prefix:
+            out.append(prefix)
+        return
+    for ch in node.children:
+        _recursive_extract(ch, prefix, out, visited)
+
+
+def _append_chain(parent: Node, tag: str, length: int) -> Node:
+    for i in range(length):
+        child = Node(f"{tag}.{i}")
+        parent.children.append(child)
+        parent = child
+    return parent
+
+
+def build_tree(plies: int, branches: int) -> Node:
+    root = Node(None)
+    cur = root
+    for ply in range(plies):
+        for b in range(branches):
+            _append_chain(cur, f"v{ply}.{b}", plies - ply)
+        nxt = Node(f"m{ply}")
+        cur.children.append(nxt)
+        cur = nxt
+    return root
+
+
+def _time(name: str, fn) -> None:
+    start = time.perf_counter()
+    try:
+        n = fn()
+    except RecursionError:
+        print(f"{name:12s} RecursionError")
+        return
+    print(f"{name:12s} {time.perf_counter() - start:8.3f} s  {n} lines")
+
+
+def main(argv=None):
+    ap = argparse.ArgumentParser()
+    ap.add_argument("--plies", type=int, default=50)
+    ap.add_argument("--branches", type=int, default=100)
+    ap.add_argument("--deep-plies", type=int, default=20_000)
+    args = ap.parse_args(argv)
+
+    wide = build_tree(args.plies, args.branches)
+    print(f"wide tree: {args.plies}-ply mainline, {args.branches} branches/ply")
+    _time("iterative", lambda: sum(1 for _ in _iter_lines_dfs(wide)))
+    _time("recursive", lambda: len(_collect_recursive(wide)))
+
+    deep = Node(None)
+    _append_chain(deep, "d", args.deep_plies)
+    print(
+        f"deep chain: {args.deep_plies} plies (recursion limit {sys.getrecursionlimit()})"
+    )
+    _time("iterative", lambda: sum(1 for _ in _iter_lines_dfs(deep)))
+    _time("recursive", lambda: len(_collect_recursive(deep)))
+
+
+def _collect_recursive(root: Node) -> list:
+    out: list = []
+    _recursive_extract(root, [], out, set())
+    return out
+
+
+if __name__ == "__main__":
+    main()
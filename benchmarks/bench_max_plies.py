@@ -0,0 +1,90 @@
+"""Benchmark: depth-limited tree building vs truncating complete lines.
+
+The former pipeline built every game's full move tree, extracted every
+complete line and only then cut each line to ``--max-plies``, emitting one
+(often identical) line per sideline beyond the cut. Now ``_parse_moves``
+skips moves past the limit, so the sidelines below a cut node end in that
+node and each truncated line is extracted once. Both must yield the same
+distinct lines.
+
+    python benchmarks/bench_max_plies.py --max-plies 12 --plies 80 --depth 4
+"""
+
+from __future__ import annotations
+import argparse
+import io
+import pathlib
+import time
+
+from pgn_corpus import add_corpus_arguments, corpus_params, generate_corpus
+
+from anki_chess.pgn2anki.parser import (
+    _count_tree_nodes,
+    _iter_lines_dfs,
+    _parse_moves,
+    _tokenize,
+)
+from anki_chess.pgn2anki.reader import iter_pgn_games
+
+
+def _truncate_after(tokens, max_plies):
+    """The former approach: full tree, every line, then ``seq[:max_plies]``."""
+    root, _ = _parse_moves(tokens)
+    lines = [seq[:max_plies] for seq in _iter_lines_dfs(root)]
+    return lines, _count_tree_nodes(root)
+
+
+def _limit_while_parsing(tokens, max_plies):
+    root, _ = _parse_moves(tokens, 0, max_plies)
+    return list(_iter_lines_dfs(root)), _count_tree_nodes(root)
+
+
+def _time(extract, games, max_plies, repeat):
+    best = None
+    for _ in range(repeat):
+        start = time.perf_counter()
+        results = [extract(tokens, max_plies) for tokens in games]
+        elapsed = time.perf_counter() - start
+        best = elapsed if best is None else min(best, elapsed)
+    return best, results
+
+
+def _distinct(lines):
+    return list(dict.fromkeys(map(tuple, lines)))
+
+
+def main(argv=None):
+    ap = argparse.ArgumentParser()
+    add_corpus_arguments(ap)
+    ap.set_defaults(games=200, plies=80, branching=2, depth=4)
+    ap.add_argument("--book", type=pathlib.Path, default=None)
+    ap.add_argument("--max-plies", type=int, default=12)
+    ap.add_argument("--repeat", type=int, default=3)
+    args = ap.parse_args(argv)
+
+    if args.book is not None:
+        text = args.book.read_text(encoding="utf-8")
+    else:
+        text = "".join(generate_corpus(**corpus_params(args)))
+    games = [_tokenize(game) for game in iter_pgn_games(io.StringIO(text))]
+
+    old_t, old = _time(_truncate_after, games, args.max_plies, args.repeat)
+    new_t, new = _time(_limit_while_parsing, games, args.max_plies, args.repeat)
+    for (old_lines, _), (new_lines, _) in zip(old, new):
+        assert _distinct(old_lines) == _distinct(new_lines)
+        assert len(new_lines) == len(_distinct(new_lines))
+    old_lines, old_nodes = map(sum, zip(*((len(l), n) for l, n in old)))
+    new_lines, new_nodes = map(sum, zip(*((len(l), n) for l, n in new)))
+    print(f"{len(games)} games, max_plies={args.max_plies}")
+    print(
+        f"truncate after  {old_t * 1e3:9.2f} ms  {old_nodes:9d} nodes  "
+        f"{old_lines:8d} lines"
+    )
+    print(
+        f"limit in parse  {new_t * 1e3:9.2f} ms  {new_nodes:9d} nodes  "
+        f"{new_lines:8d} lines  ({old_t / new_t:4.2f}x)"
+    )
+
+
+if __name__ == "__main__":
+    main()
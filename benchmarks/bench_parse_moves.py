@@ -0,0 +1,120 @@
+"""Benchmark: iterative ``_parse_moves`` vs the former recursive version.
+
+Two inputs: a single game with ``--nesting`` variations nested inside each
+other, and a realistic annotated book from ``pgn_corpus`` (or ``--book``).
+Both builders must produce the same lines. The recursive version needs a
+raised recursion limit for the nested input; with the default limit it
+fails, which is reported.
+
+    python benchmarks/bench_parse_moves.py --nesting 1000
+"""
+
+from __future__ import annotations
+import argparse
+import io
+import pathlib
+import sys
+import time
+
+from pgn_corpus import generate_corpus
+
+from anki_chess.pgn2anki.node import Node
+from anki_chess.pgn2anki.parser import (
+    _is_token_a_game_result,
+    _is_token_a_move_number,
+    _iter_lines_dfs,
+    _parse_moves,
+    _tokenize,
+)
+from anki_chess.pgn2anki.reader import iter_pgn_games
+
+
+def _recursive_parse_moves(tokens, i=0):
+    """The recursive builder ``_parse_moves`` replaced, kept for comparison."""
+    root = Node(None)
+    cur_parent_stack = [root]
+    n = len(tokens)
+    while i < n:
+        tok = tokens[i]
+        if tok == "(":
+            anchor = (
+                cur_parent_stack[-2]
+                if len(cur_parent_stack) > 1
+                else cur_parent_stack[-1]
+            )
+            var_root, i = _recursive_parse_moves(tokens, i + 1)
+            anchor.children.extend(var_root.children)
+        elif tok == ")":
+            return root, i + 1
+        elif _is_token_a_move_number(tok) or _is_token_a_game_result(tok):
+            i += 1
+        else:
+            node = Node(tok)
+            cur_parent_stack[-1].children.append(node)
+            cur_parent_stack.append(node)
+            i += 1
+    return root, i
+
+
+def nested_tokens(levels: int) -> list:
+    """``levels`` variations, each opened inside the previous one."""
+    tokens = []
+    for level in range(levels):
+        tokens += [f"m{level}", f"r{level}", "("]
+    tokens.append("end")
+    tokens += [")"] * levels
+    return tokens
+
+
+def _time(build, games, repeat):
+    best = None
+    for _ in range(repeat):
+        start = time.perf_counter()
+        trees = [build(tokens)[0] for tokens in games]
+        elapsed = time.perf_counter() - start
+        best = elapsed if best is None else min(best, elapsed)
+    return best, trees
+
+
+def _compare(name, games, repeat):
+    n_tokens = sum(len(t) for t in games)
+    new_t, new_trees = _time(_parse_moves, games, repeat)
+    try:
+        old_t, old_trees = _time(_recursive_parse_moves, games, repeat)
+    except RecursionError:
+        print(f"{name:8s} recursive: RecursionError at limit {sys.getrecursionlimit()}")
+        limit = sys.getrecursionlimit()
+        sys.setrecursionlimit(max(limit, 4 * max(map(len, games))))
+        try:
+            old_t, old_trees = _time(_recursive_parse_moves, games, repeat)
+        finally:
+            sys.setrecursionlimit(limit)
+    for old, new in zip(old_trees, new_trees):
+        assert list(_iter_lines_dfs(old)) == list(_iter_lines_dfs(new)), name
+    print(
+        f"{name:8s} {n_tokens:8d} tokens  recursive {old_t * 1e3:8.2f} ms  "
+        f"iterative {new_t * 1e3:8.2f} ms  ({old_t / new_t:4.2f}x)"
+    )
+
+
+def main(argv=None):
+    ap = argparse.ArgumentParser()
+    ap.add_argument("--nesting", type=int, default=1000)
+    ap.add_argument("--book", type=pathlib.Path, default=None)
+    ap.add_argument("--games", type=int, default=300)
+    ap.add_argument("--repeat", type=int, default=5)
+    args = ap.parse_args(argv)
+
+    _compare("nested", [nested_tokens(args.nesting)], args.repeat)
+    if args.book is not None:
+        text = args.book.read_text(encoding="utf-8")
+    else:
+        text = "".join(
+            generate_corpus(args.games, branching=3, depth=3, comment_density=0.2)
+        )
+    book = [_tokenize(game) for game in iter_pgn_games(io.StringIO(text))]
+    _compare("book", book, args.repeat)
+
+
+if __name__ == "__main__":
+    main()
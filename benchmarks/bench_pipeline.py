@@ -0,0 +1,199 @@
+"""Per-stage throughput benchmark for the pgn2anki pipeline.
+
+Runs each stage on a synthetic corpus from ``pgn_corpus`` (cached in the
+temp directory, keyed by its parameters) or on ``--corpus FILE``, and
+reports games/s, lines/s, MB/s of PGN input and the peak memory the
+stage allocated. Stages are timed separately on the previous stage's
+output; ``pipeline`` is the end-to-end ``iter_lines`` + ``emit_csv`` run.
+Memory is traced with ``tracemalloc`` in one extra, untimed run of each
+stage, so the figure belongs to that stage alone and tracing does not
+slow the timed runs.
+
+    python benchmarks/bench_pipeline.py
+    python benchmarks/bench_pipeline.py --games 5000 --depth 2 --json out.json
+
+``--check`` compares the results with ``benchmarks/baseline.json`` and
+exits with status 1 if a stage got slower, or used more memory, than the
+baseline by more than ``--tolerance``. ``--update-baseline`` rewrites the
+baseline from this run. Baselines are only compared for the same corpus.
+"""
+
+from __future__ import annotations
+import argparse
+import hashlib
+import io
+import json
+import pathlib
+import sys
+import tempfile
+import time
+import tracemalloc
+
+from pgn_corpus import add_corpus_arguments, corpus_params, generate_corpus
+
+from anki_chess.pgn2anki.emitter import emit_csv
+from anki_chess.pgn2anki.line import Line
+from anki_chess.pgn2anki.parser import (
+    _iter_lines_dfs,
+    _parse_moves,
+    _tokenize,
+    iter_lines,
+)
+from anki_chess.pgn2anki.reader import iter_pgn_games
+
+BASELINE_JSON = pathlib.Path(__file__).resolve().parent / "baseline.json"
+
+
+def _peak_mb(fn) -> float:
+    """Peak memory allocated while running ``fn`` once, in MB."""
+    tracemalloc.start()
+    try:
+        fn()
+        _, peak = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+    return peak / 1e6
+
+
+def _corpus_text(args) -> str:
+    if args.corpus is not None:
+        return args.corpus.read_text(encoding="utf-8")
+    params = corpus_params(args)
+    digest = hashlib.sha1(json.dumps(params, sort_keys=True).encode()).hexdigest()
+    path = pathlib.Path(tempfile.gettempdir()) / f"anki-chess-bench-{digest[:12]}.pgn"
+    if not path.exists():
+        tmp = path.with_suffix(".tmp")
+        tmp.write_text("".join(generate_corpus(**params)), encoding="utf-8")
+        tmp.replace(path)
+    return path.read_text(encoding="utf-8")
+
+
+def _best_time(fn, repeat: int):
+    best = None
+    for _ in range(repeat):
+        start = time.perf_counter()
+        result = fn()
+        elapsed = time.perf_counter() - start
+        best = elapsed if best is None else min(best, elapsed)
+    return best, result
+
+
+def run_stages(text: str, repeat: int = 3) -> dict:
+    """Time every stage and return ``{stage: metrics}``."""
+    megabytes = len(text.encode("utf-8")) / 1e6
+    stages = {}
+
+    def record(name, fn, n_games, n_lines=None):
+        seconds, result = _best_time(fn, repeat)
+        if n_lines is None:
+            n_lines = result
+        stages[name] = {
+            "seconds": round(seconds, 4),
+            "games_per_s": round(n_games / seconds, 1),
+            "lines_per_s": round(n_lines / seconds, 1),
+            "mb_per_s": round(megabytes / seconds, 2),
+            "peak_mb": round(_peak_mb(fn), 1),
+        }
+        return result
+
+    games = list(iter_pgn_games(io.StringIO(text)))
+    tokens = [_tokenize(g) for g in games]
+    trees = [_parse_moves(t)[0] for t in tokens]
+    seqs = [s for tree in trees for s in _iter_lines_dfs(tree)]
+    lines = [Line(f"Line #{i}", seq) for i, seq in enumerate(seqs, start=1)]
+    n_games, n_lines = len(games), len(seqs)
+
+    record("read", lambda: list(iter_pgn_games(io.StringIO(text))), n_games, n_lines)
+    record("tokenize", lambda: [_tokenize(g) for g in games], n_games, n_lines)
+    record("parse", lambda: [_parse_moves(t)[0] for t in tokens], n_games, n_lines)
+    record(
+        "extract",
+        lambda: [s for tree in trees for s in _iter_lines_dfs(tree)],
+        n_games,
+        n_lines,
+    )
+    record("emit", lambda: emit_csv(lines, io.StringIO()), n_games, n_lines)
+    record(
+        "pipeline",
+        lambda: emit_csv(iter_lines(io.StringIO(text)), io.StringIO()),
+        n_games,
+    )
+    return stages
+
+
+def find_regressions(results: dict, baseline: dict, tolerance: float) -> list[str]:
+    """Describe every stage that is slower or larger than the baseline allows."""
+    problems = []
+    for stage, base in baseline["stages"].items():
+        cur = results["stages"].get(stage)
+        if cur is None:
+            problems.append(f"{stage}: missing from this run")
+            continue
+        floor = base["games_per_s"] * (1 - tolerance)
+        if cur["games_per_s"] < floor:
+            problems.append(
+                f"{stage}: {cur['games_per_s']:.0f} games/s, baseline "
+                f"{base['games_per_s']:.0f} (floor {floor:.0f})"
+            )
+        ceiling = base["peak_mb"] * (1 + tolerance)
+        if cur["peak_mb"] > ceiling:
+            problems.append(
+                f"{stage}: peak {cur['peak_mb']:.1f} MB, baseline "
+                f"{base['peak_mb']:.1f} MB (ceiling {ceiling:.1f})"
+            )
+    return problems
+
+
+def _print_table(results: dict) -> None:
+    print(f"{results['games']} games, {results['mb']} MB")
+    print(
+        f"{'stage':10s} {'seconds':>8s} {'games/s':>10s} {'lines/s':>10s} "
+        f"{'MB/s':>8s} {'peak MB':>8s}"
+    )
+    for name, m in results["stages"].items():
+        print(
+            f"{name:10s} {m['seconds']:8.3f} {m['games_per_s']:10.0f} "
+            f"{m['lines_per_s']:10.0f} {m['mb_per_s']:8.2f} {m['peak_mb']:8.1f}"
+        )
+
+
+def main(argv=None):
+    ap = argparse.ArgumentParser()
+    add_corpus_arguments(ap)
+    ap.add_argument("--corpus", type=pathlib.Path, default=None)
+    ap.add_argument("--repeat", type=int, default=3)
+    ap.add_argument("--json", type=pathlib.Path, default=None)
+    ap.add_argument("--baseline", type=pathlib.Path, default=BASELINE_JSON)
+    ap.add_argument("--check", action="store_true")
+    ap.add_argument("--update-baseline", action="store_true")
+    ap.add_argument("--tolerance", type=float, default=0.3)
+    args = ap.parse_args(argv)
+
+    text = _corpus_text(args)
+    corpus = {"file": str(args.corpus)} if args.corpus else corpus_params(args)
+    results = {
+        "corpus": corpus,
+        "games": sum(1 for _ in iter_pgn_games(io.StringIO(text))),
+        "mb": round(len(text.encode("utf-8")) / 1e6, 2),
+        "stages": run_stages(text, args.repeat),
+    }
+    _print_table(results)
+    if args.json is not None:
+        args.json.write_text(json.dumps(results, indent=2) + "\n", encoding="utf-8")
+    if args.update_baseline:
+        args.baseline.write_text(json.dumps(results, indent=2) + "\n", encoding="utf-8")
+        print(f"Updated {args.baseline}")
+    if args.check:
+        baseline = json.loads(args.baseline.read_text(encoding="utf-8"))
+        if baseline["corpus"] != corpus:
+            print(f"Baseline corpus {baseline['corpus']} differs from {corpus}")
+            return 2
+        problems = find_regressions(results, baseline, args.tolerance)
+        for problem in problems:
+            print(f"REGRESSION {problem}")
+        return 1 if problems else 0
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,161 @@
+"""Micro-benchmark for the PGN tokenizer.
+
+Compares the single-pass lexer behind ``parser._tokenize`` against the
+legacy per-character loop on ``danish.pgn`` repeated ``--scale`` times.
+
+    python benchmarks/bench_tokenize.py --scale 10000
+"""
+
+from __future__ import annotations
+import argparse
+import pathlib
+import re
+import time
+
+from anki_chess.pgn2anki import parser
+from anki_chess.pgn2anki.const import PGN_COMMENT_REGEX, PGN_HEADER_REGEX
+from anki_chess.pgn2anki.lexer import iter_tokens
+
+DANISH_PGN = pathlib.Path(__file__).resolve().parent.parent / "danish.pgn"
+
+
+# The per-character tokenizer that ``parser._tokenize`` used before the
+# lexer, kept verbatim as the baseline.
+
+
+def _tokenize_step(ch: str, buff: str, tokens: list) -> tuple[str, list]:
+    if _is_parenthesis_character(ch):
+        buff = _tokenize_flush_buffer(buff, tokens)
+        tokens.append(ch)
+        buff = ""
+    elif _is_whitespace_character(ch):
+        buff = _tokenize_flush_buffer(buff, tokens)
+        buff = ""
+    else:
+        buff += ch
+    return buff, tokens
+
+
+def _tokenize_flush_buffer(buff: str, tokens: list) -> str:
+    if _contains_non_whitespace_characters(buff):
+        tokens.append(buff.strip())
+    return ""
+
+
+def _is_whitespace_character(ch: str) -> bool:
+    """Check if a character is a whitespace character."""
+    return ch.isspace()
+
+
+def _contains_non_whitespace_characters(buff: str) -> bool:
+    """Check if the buffer contains non-whitespace characters."""
+    return buff.strip() != ""
+
+
+def _is_parenthesis_character(ch: str) -> bool:
+    """Check if a character is a parenthesis character."""
+    return ch in "()"
+
+
+def _prep_pgn_for_tokenization(pgn: str) -> str:
+    """Prepare PGN for tokenization by normalizing whitespace."""
+    s = pgn
+    s = _remove_headers_from_pgn(s)
+    s = _remove_comments_from_pgn(s)
+    s = _remove_semicolon_comments_from_pgn(s)
+    s = _remove_numeric_annotation_glyphs_from_pgn(s)
+    return s
+
+
+def _remove_numeric_annotation_glyphs_from_pgn(s: str) -> str:
+    """Remove numeric annotation glyphs from PGN.
+
+    Description
+    -----------
+    Numeric annotation glyphs (e.g., $1, $2) are used in PGN to indicate
+    variations or alternative moves. This function removes them from the
+    PGN string.
+    """
+    return re.sub(r"\$\d+", " ", s)
+
+
+def _remove_semicolon_comments_from_pgn(s: str) -> str:
+    """Remove semicolon comments from PGN.
+
+    Description
+    -----------
+    Semicolon comments (e.g., ; this is a comment) are used in PGN to
+    provide commentary on the game. This function removes them from the
+    PGN string.
+    """
+    return re.sub(r";[^\n]*", " ", s)
+
+
+def _remove_comments_from_pgn(s: str) -> str:
+    """Remove comments from PGN.
+
+    Description
+    -----------
+    Comments (e.g., { this is a comment }) are used in PGN to provide
+    commentary on the game. This function removes them from the
+    PGN string.
+    """
+    return re.sub(PGN_COMMENT_REGEX, " ", s)
+
+
+def _remove_headers_from_pgn(s: str) -> str:
+    """Remove headers from PGN.
+
+    Description
+    -----------
+    Headers (e.g., [Event "F/S Return Match"]) are used in PGN to provide
+    metadata about the game. This function removes them from the
+    PGN string.
+    """
+    return re.sub(PGN_HEADER_REGEX, "", s, flags=re.M)
+
+
+def _legacy_tokenize(pgn: str) -> list:
+    s = _prep_pgn_for_tokenization(pgn)
+    tokens, buff = [], ""
+    for ch in s:
+        buff, tokens = _tokenize_step(ch, buff, tokens)
+    _tokenize_flush_buffer(buff, tokens)
+    return tokens
+
+
+def _time(fn, text: str) -> tuple[float, int]:
+    start = time.perf_counter()
+    result = fn(text)
+    n = result if isinstance(result, int) else len(result)
+    return time.perf_counter() - start, n
+
+
+def _count_typed_tokens(text: str) -> int:
+    return sum(1 for _ in iter_tokens(text))
+
+
+def main(argv=None):
+    ap = argparse.ArgumentParser()
+    ap.add_argument("--scale", type=int, default=10_000)
+    ap.add_argument("--skip-legacy", action="store_true")
+    args = ap.parse_args(argv)
+
+    text = DANISH_PGN.read_text(encoding="utf-8")
+    text = "\n\n".join([text] * args.scale)
+    mb = len(text.encode("utf-8")) / 1e6
+    print(f"input: danish.pgn x{args.scale} = {mb:.1f} MB")
+
+    candidates = [
+        ("lexer (_tokenize)", parser._tokenize),
+        ("lexer (iter_tokens)", _count_typed_tokens),
+    ]
+    if not args.skip_legacy:
+        candidates.append(("legacy per-character", _legacy_tokenize))
+    for name, fn in candidates:
+        elapsed, n = _time(fn, text)
+        print(f"{name:24s} {elapsed:8.2f} s  {mb / elapsed:8.1f} MB/s  {n} tokens")
+
+
+if __name__ == "__main__":
+    main()
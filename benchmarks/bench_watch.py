@@ -0,0 +1,85 @@
+"""Benchmark: edit-to-output latency of ``anki-chess watch``.
+
+Writes ``--files`` chapter files, lets a ``Watcher`` build every output,
+then edits one game of one chapter and times the poll that rebuilds it,
+next to a cold ``cli.main`` run over the same chapter (without interpreter
+start-up, which a real per-save run pays on top).
+
+    python benchmarks/bench_watch.py --files 200 --games 20
+"""
+
+from __future__ import annotations
+import argparse
+import contextlib
+import io
+import math
+import os
+import pathlib
+import tempfile
+import time
+
+from pgn_corpus import add_corpus_arguments, corpus_params, generate_corpus
+
+from anki_chess import cli
+from anki_chess.pgn2anki.watch import Watcher
+
+
+def _write_chapters(directory, n_files, params):
+    for index in range(n_files):
+        text = "".join(generate_corpus(**{**params, "seed": index}))
+        (directory / f"chapter{index:03d}.pgn").write_text(text, encoding="utf-8")
+
+
+def _edit(path):
+    """Append a move to the last game and bump the mtime."""
+    text = path.read_text(encoding="utf-8").rstrip()
+    result = text.rsplit(None, 1)[1]
+    path.write_text(f"{text[: -len(result)]} {{edited}} {result}\n", encoding="utf-8")
+    st = path.stat()
+    os.utime(path, ns=(st.st_atime_ns, st.st_mtime_ns + 10**9))
+
+
+def main(argv=None):
+    ap = argparse.ArgumentParser()
+    add_corpus_arguments(ap)
+    ap.set_defaults(games=20)
+    ap.add_argument("--files", type=int, default=200)
+    ap.add_argument("--repeat", type=int, default=5)
+    args = ap.parse_args(argv)
+
+    with tempfile.TemporaryDirectory() as tmp:
+        directory = pathlib.Path(tmp)
+        _write_chapters(directory, args.files, corpus_params(args))
+        watch_args = cli._initialize_watch_argument_parser().parse_args([tmp])
+        watcher = Watcher(
+            directory,
+            lambda path, text, cache: cli._watch_rebuild(watch_args, path, text, cache),
+        )
+        with contextlib.redirect_stdout(io.StringIO()):
+            start = time.perf_counter()
+            watcher.poll()
+            initial = time.perf_counter() - start
+
+            chapter = directory / "chapter000.pgn"
+            poll_t = cold_t = math.inf
+            for _ in range(args.repeat):
+                _edit(chapter)
+                start = time.perf_counter()
+                rebuilt, _ = watcher.poll()
+                elapsed = time.perf_counter() - start
+                assert rebuilt == [chapter]
+                poll_t = min(poll_t, elapsed)
+
+                start = time.perf_counter()
+                cli.main([str(chapter), "--output", str(directory / "cold.csv")])
+                elapsed = time.perf_counter() - start
+                cold_t = min(cold_t, elapsed)
+
+    print(f"{args.files} files x {args.games} games")
+    print(f"initial build   {initial * 1e3:9.2f} ms")
+    print(f"cold run        {cold_t * 1e3:9.2f} ms  (one chapter)")
+    print(f"watch poll      {poll_t * 1e3:9.2f} ms  ({cold_t / poll_t:4.2f}x)")
+
+
+if __name__ == "__main__":
+    main()
@@ -1,5 +1,33 @@
-from aqt.gui_hooks import webview_did_receive_js_message
-from .on_js_bridge_message import on_js_bridge_message
+import sys
 
+from aqt.gui_hooks import profile_will_close, webview_did_receive_js_message
 
-webview_did_receive_js_message.append(on_js_bridge_message)
+# The hooks below are trampolines: the bridge handler, its worker thread and
+# the statistics store (sqlite3) are imported on the first message that can
+# be ours, not while Anki loads add-ons.
+_HANDLER_MODULE = f"{__name__}.on_js_bridge_message"
+
+
+def _on_js_message(is_message_handled, incoming_js_bridge_message, context):
+    if (
+        "fail_line" not in incoming_js_bridge_message
+        and "pass_line" not in incoming_js_bridge_message
+    ):
+        return is_message_handled
+    from . import on_js_bridge_message as handler
+
+    if handler.mistake_stats is None:
+        handler.open_mistake_stats()
+    return handler.on_js_bridge_message(
+        is_message_handled, incoming_js_bridge_message, context
+    )
+
+
+def _on_profile_close():
+    handler = sys.modules.get(_HANDLER_MODULE)
+    if handler is not None:
+        handler.shutdown()
+
+
+webview_did_receive_js_message.append(_on_js_message)
+profile_will_close.append(_on_profile_close)
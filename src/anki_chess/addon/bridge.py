@@ -0,0 +1,84 @@
+from __future__ import annotations
+from dataclasses import dataclass, field
+from typing import Callable, List
+import json
+import time
+
+FAIL_LINE = "fail_line"
+PASS_LINE = "pass_line"
+
+# Ease passed to ``Reviewer._answerCard`` for each answering command.
+ANSWER_EASE = {FAIL_LINE: 1, PASS_LINE: 3}
+
+
+@dataclass
+class BridgeMessage:
+    """A command sent by the card template through ``pycmd``.
+
+    Description
+    -----------
+    ``ply`` is the 1-based ply of the line the command refers to (the
+    wrong move for ``fail_line``, the line length for ``pass_line``),
+    ``move`` the move played, ``expected`` the move of the line and
+    ``fen`` the position the move was played from. All are optional.
+    """
+
+    cmd: str
+    ply: int | None = None
+    move: str | None = None
+    expected: str | None = None
+    fen: str | None = None
+
+
+@dataclass
+class ReviewEvent:
+    """A handled command plus the card it answered."""
+
+    card_id: int | None
+    message: BridgeMessage
+    time: float = field(default_factory=time.time)
+
+
+# Callables run with every ``ReviewEvent`` off the GUI thread; add-on
+# features (e.g. statistics) append themselves here.
+REVIEW_EVENT_LISTENERS: List[Callable[[ReviewEvent], None]] = []
+
+
+def _optional(value, kind):
+    return value if isinstance(value, kind) and not isinstance(value, bool) else None
+
+
+def parse_bridge_message(message: str) -> BridgeMessage | None:
+    """Parse a plain command (``"fail_line"``) or a JSON command object.
+
+    Description
+    -----------
+    JSON messages look like ``{"cmd": "fail_line", "ply": 7, "move":
+    "Nf3"}``; fields of the wrong type are dropped. Returns None for
+    messages that are not ours, so other add-ons can handle them.
+    """
+    text = message.strip()
+    if not text.startswith("{"):
+        return BridgeMessage(cmd=text) if text in ANSWER_EASE else None
+    try:
+        data = json.loads(text)
+    except ValueError:
+        return None
+    if not isinstance(data, dict) or data.get("cmd") not in ANSWER_EASE:
+        return None
+    return BridgeMessage(
+        cmd=data["cmd"],
+        ply=_optional(data.get("ply"), int),
+        move=_optional(data.get("move"), str),
+        expected=_optional(data.get("expected"), str),
+        fen=_optional(data.get("fen"), str),
+    )
+
+
+def dispatch_review_event(event: ReviewEvent, worker=None, listeners=None) -> None:
+    """Hand ``event`` to every listener, on ``worker`` if one is given."""
+    for listener in REVIEW_EVENT_LISTENERS if listeners is None else listeners:
+        if worker is None:
+            listener(event)
+        else:
+            worker.submit(listener, event)
@@ -1,5 +1,13 @@
 from dataclasses import dataclass
 
+from .bridge import (
+    ANSWER_EASE,
+    FAIL_LINE,
+    ReviewEvent,
+    dispatch_review_event,
+    parse_bridge_message,
+)
+
 
 @dataclass
 class MockCard:
@@ -18,14 +26,28 @@ class MockReviewer:
 
 
 class ReviewerController:
-    def __init__(self, reviewer):
+    """Answer cards for bridge commands and report them to listeners.
+
+    Description
+    -----------
+    ``handle_command`` accepts the plain commands and the JSON payloads
+    understood by ``parse_bridge_message``. The card is answered on the
+    calling thread, since Anki's reviewer must only be touched from the
+    GUI thread; the resulting ``ReviewEvent`` is then handed to the
+    listeners on ``worker`` (or inline when there is none).
+    """
+
+    def __init__(self, reviewer, worker=None, listeners=None):
         self.reviewer = reviewer
+        self.worker = worker
+        self.listeners = listeners
 
     def handle_command(self, cmd: str) -> str:
-        if cmd == "fail_line":
-            self.reviewer._answerCard(1)
-            return "failed"
-        elif cmd == "pass_line":
-            self.reviewer._answerCard(3)
-            return "passed"
-        return "ignored"
+        message = parse_bridge_message(cmd)
+        if message is None:
+            return "ignored"
+        card = self.reviewer.card
+        event = ReviewEvent(card.id if card is not None else None, message)
+        self.reviewer._answerCard(ANSWER_EASE[message.cmd])
+        dispatch_review_event(event, self.worker, self.listeners)
+        return "failed" if message.cmd == FAIL_LINE else "passed"
@@ -0,0 +1,210 @@
+from __future__ import annotations
+from dataclasses import dataclass
+from typing import List, Self
+import sqlite3
+import threading
+
+from .bridge import FAIL_LINE, ReviewEvent
+
+MISTAKE_STATS_VERSION = 1
+
+# File created in the Anki profile folder.
+MISTAKE_STATS_FILENAME = "anki_chess_stats.sqlite"
+
+# Buffered events are written when this many are pending...
+DEFAULT_FLUSH_BATCH_SIZE = 256
+
+# ...or this many seconds after the first of them arrived.
+DEFAULT_FLUSH_INTERVAL = 30.0
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS meta (key TEXT PRIMARY KEY, value TEXT);
+CREATE TABLE IF NOT EXISTS events (
+    id INTEGER PRIMARY KEY,
+    time REAL NOT NULL,
+    card_id INTEGER,
+    cmd TEXT NOT NULL,
+    ply INTEGER,
+    move TEXT,
+    expected TEXT,
+    fen TEXT
+);
+CREATE INDEX IF NOT EXISTS ix_events_card_ply ON events (card_id, ply);
+CREATE TABLE IF NOT EXISTS positions (
+    fen TEXT NOT NULL,
+    expected TEXT NOT NULL,
+    fails INTEGER NOT NULL,
+    last_failed REAL NOT NULL,
+    PRIMARY KEY (fen, expected)
+);
+CREATE INDEX IF NOT EXISTS ix_positions_fails ON positions (fails DESC);
+CREATE TABLE IF NOT EXISTS plies (
+    card_id INTEGER NOT NULL,
+    ply INTEGER NOT NULL,
+    fails INTEGER NOT NULL,
+    PRIMARY KEY (card_id, ply)
+);
+CREATE INDEX IF NOT EXISTS ix_plies_fails ON plies (fails DESC);
+"""
+
+_INSERT_EVENT = (
+    "INSERT INTO events (time, card_id, cmd, ply, move, expected, fen)"
+    " VALUES (?, ?, ?, ?, ?, ?, ?)"
+)
+
+_UPSERT_POSITION = (
+    "INSERT INTO positions (fen, expected, fails, last_failed) VALUES (?, ?, 1, ?)"
+    " ON CONFLICT (fen, expected) DO UPDATE SET fails = fails + 1,"
+    " last_failed = max(last_failed, excluded.last_failed)"
+)
+
+_UPSERT_PLY = (
+    "INSERT INTO plies (card_id, ply, fails) VALUES (?, ?, 1)"
+    " ON CONFLICT (card_id, ply) DO UPDATE SET fails = fails + 1"
+)
+
+
+@dataclass
+class HardPosition:
+    fen: str
+    expected: str
+    fails: int
+    last_failed: float
+
+
+@dataclass
+class HardPly:
+    card_id: int
+    ply: int
+    fails: int
+
+
+class MistakeStats:
+    """SQLite store of review events and per-position failure counts.
+
+    Description
+    -----------
+    ``record`` only appends to an in-memory buffer; the buffer is written
+    in one transaction once ``batch_size`` events are pending, when a
+    ``flush_interval`` timer started by the first pending event fires, or
+    on ``flush``/``close``. Each flush appends the raw events and bumps the
+    failure counters of the position (FEN plus expected move) and of the
+    (card, ply) pair, so ``hardest_positions`` and ``hardest_plies`` read
+    the top rows straight off an index instead of aggregating the log.
+
+    ``record`` is meant to be a ``REVIEW_EVENT_LISTENER`` and may be
+    called from any thread.
+    """
+
+    def __init__(
+        self,
+        path,
+        batch_size: int = DEFAULT_FLUSH_BATCH_SIZE,
+        flush_interval: float | None = DEFAULT_FLUSH_INTERVAL,
+    ):
+        self.path = path
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        self._pending: List[ReviewEvent] = []
+        self._timer: threading.Timer | None = None
+        self._lock = threading.RLock()
+        self._conn = sqlite3.connect(str(path), check_same_thread=False)
+        self._conn.executescript(_SCHEMA)
+        self._conn.execute(
+            "INSERT OR IGNORE INTO meta VALUES ('version', ?)",
+            (str(MISTAKE_STATS_VERSION),),
+        )
+        self._conn.commit()
+
+    def __enter__(self) -> Self:
+        return self
+
+    def __exit__(self, *exc) -> None:
+        self.close()
+
+    def record(self, event: ReviewEvent) -> None:
+        with self._lock:
+            self._pending.append(event)
+            if len(self._pending) >= self.batch_size:
+                self.flush()
+            elif self._timer is None and self.flush_interval is not None:
+                self._timer = threading.Timer(self.flush_interval, self.flush)
+                self._timer.daemon = True
+                self._timer.start()
+
+    def flush(self) -> int:
+        """Write the buffered events in one transaction; return how many."""
+        with self._lock:
+            if self._timer is not None:
+                self._timer.cancel()
+                self._timer = None
+            events, self._pending = self._pending, []
+            if not events or self._conn is None:
+                return 0
+            fails = [e for e in events if e.message.cmd == FAIL_LINE]
+            with self._conn:
+                self._conn.executemany(
+                    _INSERT_EVENT,
+                    [
+                        (
+                            e.time,
+                            e.card_id,
+                            e.message.cmd,
+                            e.message.ply,
+                            e.message.move,
+                            e.message.expected,
+                            e.message.fen,
+                        )
+                        for e in events
+                    ],
+                )
+                self._conn.executemany(
+                    _UPSERT_POSITION,
+                    [
+                        (e.message.fen, e.message.expected, e.time)
+                        for e in fails
+                        if e.message.fen is not None and e.message.expected is not None
+                    ],
+                )
+                self._conn.executemany(
+                    _UPSERT_PLY,
+                    [
+                        (e.card_id, e.message.ply)
+                        for e in fails
+                        if e.card_id is not None and e.message.ply is not None
+                    ],
+                )
+            return len(events)
+
+    def close(self) -> None:
+        with self._lock:
+            if self._conn is None:
+                return
+            self.flush()
+            self._conn.close()
+            self._conn = None
+
+    def _query(self, sql: str, params: tuple = ()) -> list:
+        with self._lock:
+            if self._conn is None:
+                raise sqlite3.ProgrammingError(f"{self.path}: stats are closed")
+            return self._conn.execute(sql, params).fetchall()
+
+    def hardest_positions(self, n: int = 10) -> List[HardPosition]:
+        """The ``n`` positions failed most often, worst first."""
+        rows = self._query(
+            "SELECT fen, expected, fails, last_failed FROM positions"
+            " ORDER BY fails DESC LIMIT ?",
+            (n,),
+        )
+        return [HardPosition(*row) for row in rows]
+
+    def hardest_plies(self, n: int = 10) -> List[HardPly]:
+        """The ``n`` (card, ply) pairs failed most often, worst first."""
+        rows = self._query(
+            "SELECT card_id, ply, fails FROM plies ORDER BY fails DESC LIMIT ?", (n,)
+        )
+        return [HardPly(*row) for row in rows]
+
+    def event_count(self) -> int:
+        return self._query("SELECT count(*) FROM events")[0][0]
@@ -1,5 +1,23 @@
+import os
+
 from aqt import mw
 
+from .bridge import (
+    FAIL_LINE,
+    REVIEW_EVENT_LISTENERS,
+    ReviewEvent,
+    dispatch_review_event,
+    parse_bridge_message,
+)
+from .mistake_stats import MISTAKE_STATS_FILENAME, MistakeStats
+from .worker import BackgroundWorker
+
+# Runs review event listeners so the webview callback returns right away.
+worker = BackgroundWorker()
+
+# Opened by the add-on's hook before the first handled message of a profile.
+mistake_stats: MistakeStats | None = None
+
 
 def _mark_card_as_failed():
     mw.reviewer._answerCard(1)
@@ -18,12 +36,38 @@ def on_js_bridge_message(
 
     Description
     -----------
-    Handle messages from the JavaScript bridge. If the message is "fail_line", it will mark the current card as failed. If the message is "pass_line", it will mark the current card as passed.
+    Handle messages from the JavaScript bridge, either the plain "fail_line"
+    / "pass_line" commands or their JSON form (see ``parse_bridge_message``).
+    "fail_line" marks the current card as failed and "pass_line" as passed.
+    Answering stays on the GUI thread; everything else a review triggers is
+    queued on ``worker``.
     """
-    if incoming_js_bridge_message == "fail_line":
+    message = parse_bridge_message(incoming_js_bridge_message)
+    if message is None:
+        return (is_message_handled[0], None)
+    card = mw.reviewer.card
+    event = ReviewEvent(card.id if card is not None else None, message)
+    if message.cmd == FAIL_LINE:
         _mark_card_as_failed()
-        return (True, None)
-    elif incoming_js_bridge_message == "pass_line":
+    else:
         _mark_card_as_passed()
-        return (True, None)
-    return (is_message_handled[0], None)
+    dispatch_review_event(event, worker)
+    return (True, None)
+
+
+def open_mistake_stats() -> None:
+    """Start recording review events in the current profile's folder."""
+    global mistake_stats
+    path = os.path.join(mw.pm.profileFolder(), MISTAKE_STATS_FILENAME)
+    mistake_stats = MistakeStats(path)
+    REVIEW_EVENT_LISTENERS.append(mistake_stats.record)
+
+
+def shutdown() -> None:
+    """Finish queued review work and flush statistics; on profile close."""
+    global mistake_stats
+    worker.stop()
+    if mistake_stats is not None:
+        REVIEW_EVENT_LISTENERS.remove(mistake_stats.record)
+        mistake_stats.close()
+        mistake_stats = None
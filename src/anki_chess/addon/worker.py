@@ -0,0 +1,75 @@
+from __future__ import annotations
+from typing import Callable, List
+import queue
+import sqlite3
+import sys
+import threading
+import traceback
+
+# Errors a job may raise without stopping the worker: I/O and database
+# failures of the persistence listeners, and malformed event values.
+JOB_ERRORS = (OSError, ValueError, sqlite3.Error)
+
+
+class BackgroundWorker:
+    """Run submitted callables in order on one daemon thread.
+
+    Description
+    -----------
+    Used for per-review work (persistence, analytics) so the webview
+    handler returns as soon as the card is answered. The thread starts on
+    the first ``submit``. ``JOB_ERRORS`` are printed and kept in ``errors``
+    instead of killing the thread; any other exception is left to end the
+    thread, and a fresh one runs the remaining work. ``join`` waits until
+    everything submitted so far has run; ``stop`` runs the remaining work
+    and ends the thread.
+    """
+
+    def __init__(self, name: str = "anki-chess-worker"):
+        self.name = name
+        self.errors: List[BaseException] = []
+        self._queue: queue.Queue = queue.Queue()
+        self._thread: threading.Thread | None = None
+        self._lock = threading.Lock()
+
+    def submit(self, fn: Callable, *args) -> None:
+        with self._lock:
+            if self._thread is None:
+                self._start()
+        self._queue.put((fn, args))
+
+    def _start(self) -> None:
+        self._thread = threading.Thread(target=self._run, name=self.name, daemon=True)
+        self._thread.start()
+
+    def _run(self) -> None:
+        while True:
+            item = self._queue.get()
+            try:
+                if item is None:
+                    return
+                fn, args = item
+                try:
+                    fn(*args)
+                except JOB_ERRORS as exc:
+                    self.errors.append(exc)
+                    traceback.print_exc(file=sys.stderr)
+                except BaseException:
+                    # Anything else is a bug: it ends this thread with its
+                    # traceback, and a new thread takes over the queue.
+                    with self._lock:
+                        if self._thread is threading.current_thread():
+                            self._start()
+                    raise
+            finally:
+                self._queue.task_done()
+
+    def join(self) -> None:
+        self._queue.join()
+
+    def stop(self) -> None:
+        with self._lock:
+            thread, self._thread = self._thread, None
+        if thread is not None:
+            self._queue.put(None)
+            thread.join()
@@ -1,8 +1,58 @@
 from __future__ import annotations
 import argparse
+import contextlib
+import glob
+import io
+import os
 import pathlib
-from .pgn2anki.parser import parse_pgn_to_lines
-from .pgn2anki.emitter import emit_csv
+import sys
+import time
+from collections import deque
+from functools import partial
+from itertools import tee
+from .pgn2anki.parser import iter_game_lines
+from .pgn2anki.emitter import emit_csv, emit_jsonl, EMIT_WRITE_BUFFER_SIZE
+from .pgn2anki.apkg import ApkgEmitter, APKG_DEFAULT_DECK_NAME
+from .pgn2anki.ply_data import PlyDataBuilder
+from .pgn2anki.note_keys import NoteManifest, iter_keyed_lines
+from .pgn2anki.reader import (
+    iter_pgn_files,
+    iter_pgn_games,
+    iter_pgn_games_mmap,
+    open_pgn_text,
+)
+from .pgn2anki.parallel import resolve_jobs
+from .pgn2anki.cache import GameCache
+from .pgn2anki.compression import (
+    COMPRESSION_CODECS,
+    detect_compression,
+    strip_compression_suffix,
+)
+from .pgn2anki.positions import START_AT_BRANCH
+from .pgn2anki.validate import ValidationReport
+from .pgn2anki.stats import PipelineStats
+from .pgn2anki.headers import (
+    PGN_RESULTS,
+    HeaderFilter,
+    filter_games,
+    normalize_date,
+    parse_eco_ranges,
+)
+from .pgn2anki.header_index import HeaderIndex
+from .pgn2anki.lazy import lazy_import
+from .pgn2anki.opening_tree import (
+    DEFAULT_OPENING_TREE_DEPTH,
+    DEFAULT_OPENING_TREE_MAX_NODES,
+    OpeningTree,
+)
+from .pgn2anki.watch import (
+    DEFAULT_WATCH_INTERVAL,
+    DEFAULT_WATCH_PATTERN,
+    Watcher,
+    atomic_output,
+)
+
+cProfile = lazy_import("cProfile")
 
 
 def _add_max_plies_argument(ap):
@@ -10,45 +60,719 @@ def _add_max_plies_argument(ap):
     return ap
 
 
+def _add_jobs_argument(ap):
+    ap.add_argument(
+        "--jobs",
+        type=int,
+        default=1,
+        help="parse games in N worker processes (0 = one per CPU core)",
+    )
+    return ap
+
+
+def _add_compact_tree_argument(ap):
+    ap.add_argument(
+        "--compact-tree",
+        action="store_true",
+        help="build move trees as index arrays to cut memory on huge games",
+    )
+    return ap
+
+
+def _add_transpositions_argument(ap):
+    ap.add_argument(
+        "--transpositions",
+        action="store_true",
+        help="merge all games by position and emit one line per unique leaf",
+    )
+    return ap
+
+
+def _add_opening_tree_arguments(ap):
+    ap.add_argument(
+        "--opening-tree",
+        action="store_true",
+        help="count all games in one opening tree and emit its most played "
+        f"lines (up to --max-plies, default {DEFAULT_OPENING_TREE_DEPTH})",
+    )
+    ap.add_argument(
+        "--min-games",
+        type=int,
+        default=1,
+        help="with --opening-tree, keep moves played in at least this many games",
+    )
+    ap.add_argument(
+        "--top-k",
+        type=int,
+        default=None,
+        help="with --opening-tree, keep only the K most played moves per position",
+    )
+    ap.add_argument(
+        "--tree-max-nodes",
+        type=int,
+        default=DEFAULT_OPENING_TREE_MAX_NODES,
+        help="with --opening-tree, prune rare moves while reading to stay "
+        "under this many tree nodes",
+    )
+    return ap
+
+
+def _add_drop_prefix_lines_argument(ap):
+    ap.add_argument(
+        "--drop-prefix-lines",
+        action="store_true",
+        help="drop duplicate lines and lines that are a prefix of another line",
+    )
+    return ap
+
+
+def _add_cache_arguments(ap):
+    ap.add_argument(
+        "--cache-dir",
+        type=pathlib.Path,
+        default=None,
+        help="reuse parsed games from this directory across runs",
+    )
+    ap.add_argument(
+        "--cache-max-mb",
+        type=float,
+        default=None,
+        help="evict least recently used cache entries beyond this size",
+    )
+    ap.add_argument(
+        "--cache-max-age-days",
+        type=float,
+        default=None,
+        help="evict cache entries not used for this many days",
+    )
+    return ap
+
+
+def _parse_start_from(value: str):
+    if value == "initial":
+        return None
+    if value == START_AT_BRANCH:
+        return START_AT_BRANCH
+    try:
+        ply = int(value)
+    except ValueError:
+        raise argparse.ArgumentTypeError(
+            f"expected 'initial', '{START_AT_BRANCH}' or a ply number, got {value!r}"
+        ) from None
+    if ply < 0:
+        raise argparse.ArgumentTypeError(f"ply must not be negative, got {ply}")
+    return ply or None
+
+
+def _add_start_from_argument(ap):
+    ap.add_argument(
+        "--start-from",
+        type=_parse_start_from,
+        default=None,
+        help="where each card starts: 'initial' (default), 'branch' "
+        "(after the prefix shared with neighbouring lines) or a ply number",
+    )
+    return ap
+
+
+def _add_validate_arguments(ap):
+    ap.add_argument(
+        "--validate",
+        action="store_true",
+        help="check every move with python-chess and leave out illegal lines",
+    )
+    ap.add_argument(
+        "--validate-report",
+        type=pathlib.Path,
+        default=None,
+        help="write the validation errors to this JSON file (implies --validate)",
+    )
+    return ap
+
+
+def _add_profiling_arguments(ap):
+    ap.add_argument(
+        "--stats",
+        action="store_true",
+        help="print wall time, CPU time, allocations and item counts per stage",
+    )
+    ap.add_argument(
+        "--trace",
+        type=pathlib.Path,
+        default=None,
+        help="write per-stage spans as Chrome trace-event JSON to this file",
+    )
+    ap.add_argument(
+        "--profile",
+        type=pathlib.Path,
+        default=None,
+        help="write a cProfile dump of the conversion to this file "
+        "(view with 'python -m pstats')",
+    )
+    return ap
+
+
+def _add_mmap_argument(ap):
+    ap.add_argument(
+        "--mmap",
+        action="store_true",
+        help="memory-map the input and decode only each game's movetext",
+    )
+    return ap
+
+
+def _parse_eco(value: str):
+    try:
+        return parse_eco_ranges(value)
+    except ValueError as exc:
+        raise argparse.ArgumentTypeError(str(exc)) from None
+
+
+def _date_bound(fill: str):
+    def parse(value: str) -> str:
+        date = normalize_date(value, fill)
+        if not date:
+            raise argparse.ArgumentTypeError(
+                f"expected a date like 2001, 2001.05 or 2001.05.31, got {value!r}"
+            )
+        return date
+
+    return parse
+
+
+def _add_header_filter_arguments(ap):
+    ap.add_argument(
+        "--eco",
+        type=_parse_eco,
+        default=None,
+        help="keep games whose ECO code is in these ranges, e.g. C21-C29,B20",
+    )
+    ap.add_argument(
+        "--player",
+        action="append",
+        default=[],
+        help="keep games where White or Black contains this name "
+        "(case-insensitive; repeat for several players)",
+    )
+    ap.add_argument(
+        "--min-elo",
+        type=int,
+        default=None,
+        help="keep games where both players are rated at least this much",
+    )
+    ap.add_argument(
+        "--date-from",
+        type=_date_bound("00"),
+        default=None,
+        help="keep games played on or after this date (YYYY[.MM[.DD]])",
+    )
+    ap.add_argument(
+        "--date-to",
+        type=_date_bound("99"),
+        default=None,
+        help="keep games played on or before this date (YYYY[.MM[.DD]])",
+    )
+    ap.add_argument(
+        "--result",
+        action="append",
+        choices=PGN_RESULTS,
+        default=[],
+        help="keep games with this result (repeat for several)",
+    )
+    ap.add_argument(
+        "--header-index",
+        type=pathlib.Path,
+        default=None,
+        help="keep game offsets and headers in this index file so filtered "
+        "reruns read only the matching games",
+    )
+    return ap
+
+
 def _add_title_argument(ap):
     ap.add_argument("--title", type=str, default=None)
     return ap
 
 
 def _add_output_csv_argument(ap):
-    ap.add_argument("--output_csv", type=str, default=None)
+    ap.add_argument("--output_csv", "--output", type=str, default=None)
+    return ap
+
+
+OUTPUT_FORMATS = ("csv", "jsonl", "apkg")
+
+
+def _add_format_argument(ap):
+    ap.add_argument(
+        "--format",
+        choices=OUTPUT_FORMATS,
+        default="csv",
+        help="output format: CSV for Anki's importer, JSON Lines, or a "
+        "ready-to-import Anki package (.apkg)",
+    )
+    return ap
+
+
+def _add_ply_data_arguments(ap):
+    ap.add_argument(
+        "--ply-data",
+        action="store_true",
+        help="add a PLY_DATA field with each ply's move and position "
+        "precomputed, so the card does no chess logic during review",
+    )
+    ap.add_argument(
+        "--legal-moves",
+        action="store_true",
+        help="also store the legal moves of each position in PLY_DATA "
+        "(implies --ply-data)",
+    )
+    return ap
+
+
+def _add_note_key_arguments(ap):
+    ap.add_argument(
+        "--note-keys",
+        action="store_true",
+        help="add a GUID column with a stable key per line (a hash of its start "
+        "position and moves), so re-imports update the same notes",
+    )
+    ap.add_argument(
+        "--diff-manifest",
+        type=pathlib.Path,
+        default=None,
+        help="manifest of the previous export: write only lines added or "
+        "changed since then, list removed notes in OUTPUT.removed.tsv and "
+        "update the manifest (implies --note-keys)",
+    )
     return ap
 
 
 def _add_input_pgn_argument(ap):
-    ap.add_argument("input_pgn", type=pathlib.Path)
+    ap.add_argument(
+        "input_pgn",
+        type=pathlib.Path,
+        nargs="+",
+        help="PGN files, directories (every *.pgn below them) or glob patterns; "
+        "several files are merged into one output, titled per file. "
+        "Files compressed with gzip, bzip2 or xz are decompressed while reading",
+    )
     return ap
 
 
+# Files a directory given as input expands to.
+PGN_FILE_PATTERNS = ("*.pgn", *(f"*.pgn{ext}" for ext in COMPRESSION_CODECS))
+
+
+def _expand_input_pgn(paths) -> list[pathlib.Path]:
+    """Resolve directories and glob patterns to PGN files, keeping order."""
+    expanded = {}
+    for path in paths:
+        if path.is_dir():
+            matches = sorted(
+                match for pattern in PGN_FILE_PATTERNS for match in path.rglob(pattern)
+            )
+        elif not path.exists() and any(ch in str(path) for ch in "*?["):
+            matches = [
+                pathlib.Path(p)
+                for p in sorted(glob.glob(str(path), recursive=True))
+                if os.path.isfile(p)
+            ]
+        else:
+            matches = [path]
+        if not matches:
+            raise ValueError(f"no PGN files match {str(path)!r}")
+        expanded.update(dict.fromkeys(matches))
+    return list(expanded)
+
+
+def _input_paths(args) -> list[pathlib.Path]:
+    paths = args.input_pgn
+    return [paths] if isinstance(paths, pathlib.Path) else list(paths)
+
+
 def _initialize_argument_parser():
     ap = argparse.ArgumentParser()
     ap = _add_input_pgn_argument(ap)
     ap = _add_output_csv_argument(ap)
+    ap = _add_format_argument(ap)
+    ap = _add_ply_data_arguments(ap)
+    ap = _add_note_key_arguments(ap)
+    ap = _add_title_argument(ap)
+    ap = _add_max_plies_argument(ap)
+    ap = _add_mmap_argument(ap)
+    ap = _add_header_filter_arguments(ap)
+    ap = _add_jobs_argument(ap)
+    ap = _add_compact_tree_argument(ap)
+    ap = _add_transpositions_argument(ap)
+    ap = _add_drop_prefix_lines_argument(ap)
+    ap = _add_opening_tree_arguments(ap)
+    ap = _add_cache_arguments(ap)
+    ap = _add_start_from_argument(ap)
+    ap = _add_validate_arguments(ap)
+    ap = _add_profiling_arguments(ap)
+    return ap
+
+
+WATCH_COMMAND = "watch"
+
+
+def _add_watch_arguments(ap):
+    ap.add_argument("directory", type=pathlib.Path)
+    ap.add_argument(
+        "--output-dir",
+        type=pathlib.Path,
+        default=None,
+        help="write each file's output here, mirroring the watched directory "
+        "(default: next to the PGN file)",
+    )
+    ap.add_argument(
+        "--pattern",
+        default=DEFAULT_WATCH_PATTERN,
+        help=f"glob of the files to watch (default {DEFAULT_WATCH_PATTERN!r}; "
+        "use '**/*.pgn' to include subdirectories)",
+    )
+    ap.add_argument(
+        "--interval",
+        type=float,
+        default=DEFAULT_WATCH_INTERVAL,
+        help="seconds between checks for changed files",
+    )
+    ap.add_argument(
+        "--once",
+        action="store_true",
+        help="build every output once and exit instead of watching",
+    )
+    return ap
+
+
+def _initialize_watch_argument_parser():
+    ap = argparse.ArgumentParser(prog=f"anki-chess {WATCH_COMMAND}")
+    ap = _add_watch_arguments(ap)
+    ap = _add_format_argument(ap)
+    ap = _add_ply_data_arguments(ap)
+    ap = _add_note_key_arguments(ap)
     ap = _add_title_argument(ap)
     ap = _add_max_plies_argument(ap)
+    ap = _add_compact_tree_argument(ap)
+    ap = _add_drop_prefix_lines_argument(ap)
+    ap = _add_start_from_argument(ap)
     return ap
 
 
-def _load_pgn_content(args):
-    return args.input_pgn.read_text(encoding="utf-8")
+def _open_pgn_input(args):
+    (path,) = _input_paths(args)
+    return open_pgn_text(path)
+
+
+def _make_opening_tree(args):
+    if not args.opening_tree:
+        return None
+    return OpeningTree(
+        min_count=args.min_games,
+        top_k=args.top_k,
+        depth=args.max_plies or DEFAULT_OPENING_TREE_DEPTH,
+        max_nodes=args.tree_max_nodes,
+    )
+
+
+def _header_filter(args) -> HeaderFilter:
+    return HeaderFilter(
+        eco=args.eco or [],
+        players=args.player,
+        min_elo=args.min_elo,
+        date_from=args.date_from,
+        date_to=args.date_to,
+        results=args.result,
+    )
+
+
+def _iter_mmap_games(path, header_filter: HeaderFilter):
+    """``--mmap`` games of one file; compressed files are streamed instead."""
+    if detect_compression(path) is not None:
+        with open_pgn_text(path) as fp:
+            games = iter_pgn_games(fp)
+            yield from filter_games(games, header_filter) if header_filter else games
+        return
+    select = header_filter.matches_header_text if header_filter else None
+    yield from iter_pgn_games_mmap(path, select=select)
+
+
+def _iter_input_games(args, paths, sources: deque | None):
+    """Games of several input files in order, noting each game's file."""
+    header_filter = _header_filter(args)
+    if args.mmap:
+        files = ((path, _iter_mmap_games(path, header_filter)) for path in paths)
+    else:
+        files = (
+            (path, filter_games(games, header_filter) if header_filter else games)
+            for path, games in iter_pgn_files(paths)
+        )
+    for path, games in files:
+        for game in games:
+            if sources is not None:
+                sources.append(pathlib.Path(path))
+            yield game
+
+
+@contextlib.contextmanager
+def _open_pgn_games(args, sources: deque | None = None):
+    """Yield the input games; with several inputs, fill ``sources`` in step."""
+    header_filter = _header_filter(args)
+    paths = _input_paths(args)
+    if args.header_index is not None:
+        (path,) = paths
+        with HeaderIndex(args.header_index, path) as index:
+            yield index.iter_games(header_filter)
+    elif len(paths) > 1:
+        games = _iter_input_games(args, paths, sources)
+        with contextlib.closing(games):
+            yield games
+    elif args.mmap:
+        games = _iter_mmap_games(paths[0], header_filter)
+        with contextlib.closing(games):
+            yield games
+    else:
+        with _open_pgn_input(args) as fp:
+            games = iter_pgn_games(fp)
+            yield filter_games(games, header_filter) if header_filter else games
+
+
+def _open_game_cache(args):
+    if args.cache_dir is None:
+        return contextlib.nullcontext(None)
+    max_bytes = None if args.cache_max_mb is None else int(args.cache_max_mb * 1e6)
+    max_age = None
+    if args.cache_max_age_days is not None:
+        max_age = args.cache_max_age_days * 86400
+    return GameCache(args.cache_dir, max_bytes=max_bytes, max_age=max_age)
+
+
+def _make_ply_data_builder(args):
+    if not args.ply_data and not args.legal_moves:
+        return None
+    return PlyDataBuilder(legal_moves=args.legal_moves)
+
+
+def _emit_lines(args, lines, outfile) -> int:
+    ply_data = _make_ply_data_builder(args)
+    if args.format == "apkg":
+        deck_name = args.title or APKG_DEFAULT_DECK_NAME
+        with ApkgEmitter(outfile, deck_name=deck_name, ply_data=ply_data) as emitter:
+            return emitter.emit(lines)
+    options = {}
+    if ply_data is not None:
+        options["ply_data"] = ply_data
+    if args.note_keys or args.diff_manifest is not None:
+        options["note_keys"] = True
+    with open(
+        outfile, "w", encoding="utf-8", newline="", buffering=EMIT_WRITE_BUFFER_SIZE
+    ) as fp:
+        if args.format == "jsonl":
+            return emit_jsonl(lines, fp, **options)
+        return emit_csv(lines, fp, **options)
+
+
+def _keyed_lines(args, lines, manifest):
+    if not args.note_keys and manifest is None:
+        return lines
+    lines = iter_keyed_lines(lines)
+    if manifest is None:
+        return lines
+    # Output options that change every note force a full rewrite.
+    salt = f"ply_data={args.ply_data or args.legal_moves},legal={args.legal_moves}"
+    return manifest.diff(lines, salt)
+
+
+def _finish_manifest(manifest, outfile) -> None:
+    if manifest is None:
+        return
+    removed = manifest.removed
+    if removed:
+        with open(f"{outfile}.removed.tsv", "w", encoding="utf-8") as fp:
+            fp.writelines(f"{key}\t{title}\n" for key, title in removed)
+    manifest.save()
+    print(f"Changes since {manifest.path}: {manifest.summary()}")
+
+
+def _make_pipeline_stats(args):
+    if not args.stats and args.trace is None:
+        return None
+    return PipelineStats(trace=args.trace is not None)
+
+
+@contextlib.contextmanager
+def _profiled(path):
+    if path is None:
+        yield
+        return
+    profiler = cProfile.Profile()
+    profiler.enable()
+    try:
+        yield
+    finally:
+        profiler.disable()
+        profiler.dump_stats(path)
+
+
+def _report_stats(args, stats, outfile) -> None:
+    if stats is None:
+        return
+    stats.count("write", "bytes", os.path.getsize(outfile))
+    if args.trace is not None:
+        with args.trace.open("w", encoding="utf-8") as fp:
+            stats.write_trace(fp)
+    if args.stats:
+        print(stats.report(), file=sys.stderr)
+
+
+def _report_validation(args, validation) -> int:
+    if validation is None:
+        return 0
+    if args.validate_report is not None:
+        args.validate_report.write_text(validation.to_json(), encoding="utf-8")
+    for error in validation.errors:
+        print(error, file=sys.stderr)
+    if validation.errors:
+        print(
+            f"Found {len(validation.errors)} invalid moves in "
+            f"{validation.games} games; affected lines were skipped",
+            file=sys.stderr,
+        )
+        return 1
+    return 0
+
+
+def _file_title(title: str | None, path: pathlib.Path) -> str:
+    """Title prefix for the lines of one of several input files."""
+    stem = pathlib.Path(strip_compression_suffix(path.name)).stem
+    return stem if title is None else f"{title} {stem}"
+
+
+def _watch_output(args, path: pathlib.Path) -> pathlib.Path:
+    out_dir = args.directory if args.output_dir is None else args.output_dir
+    return (out_dir / path.relative_to(args.directory)).with_suffix(f".{args.format}")
+
+
+def _watch_rebuild(args, path: pathlib.Path, text: str, cache) -> None:
+    started = time.perf_counter()
+    file_args = argparse.Namespace(
+        **{**vars(args), "title": _file_title(args.title, path)}
+    )
+    lines = iter_game_lines(
+        iter_pgn_games(io.StringIO(text)),
+        max_plies=args.max_plies,
+        title=file_args.title,
+        compact=args.compact_tree,
+        drop_prefixes=args.drop_prefix_lines,
+        cache=cache,
+        start=args.start_from,
+    )
+    lines = _keyed_lines(args, lines, None)
+    outfile = _watch_output(args, path)
+    outfile.parent.mkdir(parents=True, exist_ok=True)
+    with atomic_output(outfile) as tmp:
+        n_lines = _emit_lines(file_args, lines, tmp)
+    elapsed = (time.perf_counter() - started) * 1000
+    print(f"Wrote {n_lines} lines to {outfile} in {elapsed:.0f} ms")
+
+
+def _watch_remove(args, path: pathlib.Path) -> None:
+    outfile = _watch_output(args, path)
+    with contextlib.suppress(FileNotFoundError):
+        outfile.unlink()
+        print(f"Removed {outfile}")
+
+
+def watch_main(argv=None):
+    """``anki-chess watch DIR``: keep one output per PGN file up to date."""
+    ap = _initialize_watch_argument_parser()
+    args = ap.parse_args(argv)
+    if args.diff_manifest is not None:
+        ap.error("--diff-manifest cannot be used with watch; use --note-keys")
+    if not args.directory.is_dir():
+        ap.error(f"not a directory: {args.directory}")
+    watcher = Watcher(
+        args.directory,
+        partial(_watch_rebuild, args),
+        partial(_watch_remove, args),
+        pattern=args.pattern,
+        interval=args.interval,
+    )
+    if args.once:
+        watcher.poll()
+        return 0
+    print(f"Watching {args.directory} for changes to {args.pattern}; Ctrl+C stops")
+    with contextlib.suppress(KeyboardInterrupt):
+        watcher.run()
+    return 0
 
 
 def main(argv=None):
+    if argv is None:
+        argv = sys.argv[1:]
+    if argv and argv[0] == WATCH_COMMAND:
+        return watch_main(argv[1:])
     ap = _initialize_argument_parser()
     args = ap.parse_args(argv)
-    pgn_text = _load_pgn_content(args)
-    lines = parse_pgn_to_lines(pgn_text, max_plies=args.max_plies, title=args.title)
+    if args.opening_tree and args.transpositions:
+        ap.error("--opening-tree cannot be combined with --transpositions")
+    try:
+        args.input_pgn = _expand_input_pgn(args.input_pgn)
+    except ValueError as exc:
+        ap.error(str(exc))
+    if args.header_index is not None:
+        if len(args.input_pgn) > 1:
+            ap.error("--header-index needs a single input file")
+        if detect_compression(args.input_pgn[0]) is not None:
+            ap.error("--header-index cannot index a compressed file")
 
-    outfile = "output.csv" if args.output_csv is None else args.output_csv
-    with open(outfile, "w", encoding="utf-8", newline="") as fp:
-        emit_csv(lines, fp)
-    print(f"Wrote {len(lines)} lines to {outfile}")
+    outfile = f"output.{args.format}" if args.output_csv is None else args.output_csv
+    # Input file of each game read but not yet numbered (several inputs only).
+    sources = deque() if len(args.input_pgn) > 1 else None
+    game_paths = None if sources is None else iter(sources.popleft, None)
+    validation = None
+    if args.validate or args.validate_report is not None:
+        validated_paths = None
+        if game_paths is not None:
+            game_paths, validated_paths = tee(game_paths)
+            validated_paths = map(str, validated_paths)
+        validation = ValidationReport(sources=validated_paths)
+    titles = None
+    if game_paths is not None:
+        titles = map(partial(_file_title, args.title), game_paths)
+    stats = _make_pipeline_stats(args)
+    opening_tree = _make_opening_tree(args)
+    manifest = None
+    if args.diff_manifest is not None:
+        manifest = NoteManifest(args.diff_manifest)
+    with (
+        _profiled(args.profile),
+        _open_pgn_games(args, sources) as games,
+        _open_game_cache(args) as cache,
+    ):
+        lines = iter_game_lines(
+            games,
+            max_plies=opening_tree.depth if opening_tree else args.max_plies,
+            title=args.title,
+            jobs=resolve_jobs(args.jobs),
+            compact=args.compact_tree,
+            transpositions=args.transpositions,
+            drop_prefixes=args.drop_prefix_lines,
+            cache=cache,
+            start=args.start_from,
+            validation=validation,
+            stats=stats,
+            opening_tree=opening_tree,
+            titles=titles,
+        )
+        lines = _keyed_lines(args, lines, manifest)
+        with stats.stage("write") if stats else contextlib.nullcontext():
+            n_lines = _emit_lines(args, lines, outfile)
+    print(f"Wrote {n_lines} lines to {outfile}")
+    _finish_manifest(manifest, outfile)
+    _report_stats(args, stats, outfile)
+    return _report_validation(args, validation)
 
 
 if __name__ == "__main__":
-    main()  # pragma: no cover
+    sys.exit(main())  # pragma: no cover
@@ -0,0 +1,338 @@
+from __future__ import annotations
+from typing import List
+import hashlib
+import json
+import pathlib
+import time
+
+from .emitter import DEFAULT_EMIT_BATCH_SIZE, LineEmitter, CSV_HEADER
+from .lazy import lazy_import
+from .line import Line
+from .note_keys import NoteKeys
+from .ply_data import PLY_DATA_FIELD, PlyDataBuilder
+
+sqlite3 = lazy_import("sqlite3")
+tempfile = lazy_import("tempfile")
+zipfile = lazy_import("zipfile")
+
+TEMPLATES_DIR = pathlib.Path(__file__).resolve().parent.parent / "anki_templates"
+
+APKG_DEFAULT_DECK_NAME = "Chess Repertoire"
+APKG_MODEL_NAME = "anki-chess Line"
+# Fixed so that re-importing a newer export updates the same note type.
+APKG_MODEL_ID = 1735689600000
+# Separate note type for notes with the ``PLY_DATA`` field, since Anki
+# cannot import notes with a different field list into an existing type.
+APKG_PLY_DATA_MODEL_NAME = "anki-chess Line (ply data)"
+APKG_PLY_DATA_MODEL_ID = APKG_MODEL_ID + 1
+
+# Element of the front template that receives the ``PLY_DATA`` field when
+# the note type has it; the card script reads the data from there.
+PLY_DATA_PLACEHOLDER = '<div id="ply-data" hidden></div>'
+
+# Anki's field separator inside ``notes.flds``.
+_FIELD_SEPARATOR = "\x1f"
+
+# Schema of an Anki 2.1 collection file ("collection.anki2"), which every
+# Anki version can import from an .apkg.
+_SCHEMA = """
+CREATE TABLE col (
+    id integer primary key, crt integer not null, mod integer not null,
+    scm integer not null, ver integer not null, dty integer not null,
+    usn integer not null, ls integer not null, conf text not null,
+    models text not null, decks text not null, dconf text not null,
+    tags text not null
+);
+CREATE TABLE notes (
+    id integer primary key, guid text not null, mid integer not null,
+    mod integer not null, usn integer not null, tags text not null,
+    flds text not null, sfld integer not null, csum integer not null,
+    flags integer not null, data text not null
+);
+CREATE TABLE cards (
+    id integer primary key, nid integer not null, did integer not null,
+    ord integer not null, mod integer not null, usn integer not null,
+    type integer not null, queue integer not null, due integer not null,
+    ivl integer not null, factor integer not null, reps integer not null,
+    lapses integer not null, left integer not null, odue integer not null,
+    odid integer not null, flags integer not null, data text not null
+);
+CREATE TABLE revlog (
+    id integer primary key, cid integer not null, usn integer not null,
+    ease integer not null, ivl integer not null, lastIvl integer not null,
+    factor integer not null, time integer not null, type integer not null
+);
+CREATE TABLE graves (
+    usn integer not null, oid integer not null, type integer not null
+);
+CREATE INDEX ix_notes_usn ON notes (usn);
+CREATE INDEX ix_cards_usn ON cards (usn);
+CREATE INDEX ix_revlog_usn ON revlog (usn);
+CREATE INDEX ix_cards_nid ON cards (nid);
+CREATE INDEX ix_cards_sched ON cards (did, queue, due);
+CREATE INDEX ix_revlog_cid ON revlog (cid);
+CREATE INDEX ix_notes_csum ON notes (csum);
+"""
+
+_COLLECTION_CONF = {
+    "activeDecks": [1],
+    "curDeck": 1,
+    "newSpread": 0,
+    "collapseTime": 1200,
+    "timeLim": 0,
+    "estTimes": True,
+    "dueCounts": True,
+    "curModel": None,
+    "nextPos": 1,
+    "sortType": "noteFld",
+    "sortBackwards": False,
+    "addToCur": True,
+}
+
+_DECK_CONF = {
+    "1": {
+        "id": 1,
+        "name": "Default",
+        "mod": 0,
+        "usn": 0,
+        "maxTaken": 60,
+        "autoplay": True,
+        "timer": 0,
+        "replayq": True,
+        "dyn": False,
+        "new": {
+            "delays": [1, 10],
+            "ints": [1, 4, 7],
+            "initialFactor": 2500,
+            "order": 1,
+            "perDay": 20,
+            "bury": True,
+            "separate": True,
+        },
+        "lapse": {
+            "delays": [10],
+            "mult": 0,
+            "minInt": 1,
+            "leechFails": 8,
+            "leechAction": 0,
+        },
+        "rev": {
+            "perDay": 100,
+            "ease4": 1.3,
+            "fuzz": 0.05,
+            "minSpace": 1,
+            "ivlFct": 1,
+            "maxIvl": 36500,
+            "bury": True,
+        },
+    }
+}
+
+
+def _deck(deck_id: int, name: str, mod: int) -> dict:
+    return {
+        "id": deck_id,
+        "name": name,
+        "desc": "",
+        "mod": mod,
+        "usn": -1,
+        "collapsed": False,
+        "newToday": [0, 0],
+        "revToday": [0, 0],
+        "lrnToday": [0, 0],
+        "timeToday": [0, 0],
+        "dyn": 0,
+        "extendNew": 10,
+        "extendRev": 50,
+        "conf": 1,
+    }
+
+
+def _front_template(field_names: List[str]) -> str:
+    front = (TEMPLATES_DIR / "card_front.html").read_text(encoding="utf-8")
+    if PLY_DATA_FIELD in field_names:
+        front = front.replace(
+            PLY_DATA_PLACEHOLDER,
+            f'<div id="ply-data" hidden>{{{{{PLY_DATA_FIELD}}}}}</div>',
+        )
+    return front
+
+
+def _model(deck_id: int, mod: int, field_names: List[str] = CSV_HEADER) -> dict:
+    ply_data = PLY_DATA_FIELD in field_names
+    fields = [
+        {
+            "name": name,
+            "ord": i,
+            "sticky": False,
+            "rtl": False,
+            "font": "Arial",
+            "size": 20,
+            "media": [],
+        }
+        for i, name in enumerate(field_names)
+    ]
+    template = {
+        "name": "Line",
+        "ord": 0,
+        "qfmt": _front_template(field_names),
+        "afmt": (TEMPLATES_DIR / "card_back.html").read_text(encoding="utf-8"),
+        "did": None,
+        "bqfmt": "",
+        "bafmt": "",
+    }
+    return {
+        "id": APKG_PLY_DATA_MODEL_ID if ply_data else APKG_MODEL_ID,
+        "name": APKG_PLY_DATA_MODEL_NAME if ply_data else APKG_MODEL_NAME,
+        "type": 0,
+        "mod": mod,
+        "usn": -1,
+        "sortf": 0,
+        "did": deck_id,
+        "tmpls": [template],
+        "flds": fields,
+        "css": ".card { font-family: arial; font-size: 20px; text-align: center; }",
+        "latexPre": "\\documentclass[12pt]{article}\n\\begin{document}\n",
+        "latexPost": "\\end{document}",
+        "tags": [],
+        "vers": [],
+        "req": [[0, "any", [0]]],
+    }
+
+
+def deck_id_for(name: str) -> int:
+    """Stable deck id for ``name``, so repeated exports target one deck."""
+    digest = hashlib.blake2b(name.encode("utf-8"), digest_size=6).digest()
+    return int.from_bytes(digest, "big")
+
+
+def _checksum(sort_field: str) -> int:
+    return int(hashlib.sha1(sort_field.encode("utf-8")).hexdigest()[:8], 16)
+
+
+class ApkgEmitter(LineEmitter):
+    """Write lines straight into an importable Anki package (.apkg).
+
+    Description
+    -----------
+    Notes use a note type with the same ``Title``, ``FEN`` and
+    ``SAN_SEQ_JSON`` fields and the card templates from ``anki_templates``,
+    so no CSV import step is needed. With ``ply_data``, the note type gets
+    the extra ``PLY_DATA`` field and the front template reads it. Note
+    guids are the lines' stable keys (``note_keys``), so importing a later
+    export of the same repertoire updates the existing notes and keeps
+    their review history. Notes and cards are inserted with
+    ``executemany`` into a temporary SQLite collection inside a single
+    transaction; ``close`` commits it and zips it into ``path``. If an
+    exception escapes the ``with`` block, no package is written.
+    """
+
+    def __init__(
+        self,
+        path: str | pathlib.Path,
+        deck_name: str = APKG_DEFAULT_DECK_NAME,
+        batch_size: int = DEFAULT_EMIT_BATCH_SIZE,
+        ply_data: PlyDataBuilder | None = None,
+    ):
+        super().__init__(batch_size, ply_data)
+        self.path = pathlib.Path(path)
+        self.deck_name = deck_name
+        self.deck_id = deck_id_for(deck_name)
+        self.model_id = APKG_MODEL_ID if ply_data is None else APKG_PLY_DATA_MODEL_ID
+        self._now = int(time.time())
+        # Note and card ids are millisecond timestamps in Anki.
+        self._next_id = self._now * 1000
+        self._n_notes = 0
+        self._keys = NoteKeys()
+        self._tmpdir = tempfile.TemporaryDirectory()
+        self._db_path = pathlib.Path(self._tmpdir.name) / "collection.anki2"
+        self._conn = sqlite3.connect(self._db_path)
+        self._conn.executescript(_SCHEMA)
+        self._conn.execute(
+            "INSERT INTO col VALUES (1, ?, ?, ?, 11, 0, 0, 0, ?, ?, ?, ?, '{}')",
+            (
+                self._now,
+                self._now * 1000,
+                self._now * 1000,
+                json.dumps(_COLLECTION_CONF),
+                json.dumps(
+                    {
+                        str(self.model_id): _model(
+                            self.deck_id, self._now, self.field_names
+                        )
+                    }
+                ),
+                json.dumps(
+                    {
+                        "1": _deck(1, "Default", self._now),
+                        str(self.deck_id): _deck(self.deck_id, deck_name, self._now),
+                    }
+                ),
+                json.dumps(_DECK_CONF),
+            ),
+        )
+
+    def __exit__(self, *exc) -> None:
+        if exc[0] is None:
+            self.close()
+        else:
+            self._discard()
+
+    def write_batch(self, lines: List[Line]) -> None:
+        conn = self._conn
+        if conn is None:
+            raise ValueError(f"{self.path}: package is already closed")
+        notes = []
+        cards = []
+        for line in lines:
+            flds = _FIELD_SEPARATOR.join(self._fields(line))
+            note_id = self._next_id
+            self._next_id += 1
+            self._n_notes += 1
+            notes.append(
+                (
+                    note_id,
+                    line.key or self._keys.key(line),
+                    self.model_id,
+                    self._now,
+                    -1,
+                    "",
+                    flds,
+                    line.title,
+                    _checksum(line.title),
+                    0,
+                    "",
+                )
+            )
+            # One card per note; it shares the note's id and is due in
+            # input order.
+            cards.append(
+                (note_id, note_id, self.deck_id, 0, self._now, -1)
+                + (0, 0, self._n_notes, 0, 0, 0, 0, 0, 0, 0, 0, "")
+            )
+        conn.executemany(
+            "INSERT INTO notes VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)", notes
+        )
+        conn.executemany(
+            "INSERT INTO cards VALUES "
+            "(?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)",
+            cards,
+        )
+
+    def close(self) -> None:
+        if self._conn is None:
+            return
+        self._conn.commit()
+        self._conn.close()
+        self._conn = None
+        with zipfile.ZipFile(self.path, "w", zipfile.ZIP_DEFLATED) as zf:
+            zf.write(self._db_path, "collection.anki2")
+            zf.writestr("media", "{}")
+        self._tmpdir.cleanup()
+
+    def _discard(self) -> None:
+        if self._conn is None:
+            return
+        self._conn.close()
+        self._conn = None
+        self._tmpdir.cleanup()
@@ -0,0 +1,122 @@
+from __future__ import annotations
+from typing import List, Self
+import hashlib
+import json
+import pathlib
+import time
+
+from .lazy import lazy_import
+from .reader import split_headers
+
+sqlite3 = lazy_import("sqlite3")
+
+# Bump when the cached value format or the parser's output changes, so old
+# entries are ignored instead of being served.
+CACHE_FORMAT_VERSION = 3
+
+CACHE_DB_NAME = "games.sqlite3"
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS games (
+    key TEXT PRIMARY KEY,
+    seqs TEXT NOT NULL,
+    size INTEGER NOT NULL,
+    last_used REAL NOT NULL
+);
+CREATE INDEX IF NOT EXISTS games_last_used ON games (last_used);
+"""
+
+
+class GameCache:
+    """On-disk cache of parsed games, keyed by a hash of each game's movetext.
+
+    Description
+    -----------
+    Values are the line sequences a game expands to. Keys hash only the
+    movetext (headers are ignored) plus a caller-supplied ``salt`` that
+    encodes the parse options, so editing one game invalidates one entry.
+    Entries live in a single SQLite file under ``cache_dir``. Reads, writes
+    and last-used updates are batched into one transaction that is
+    committed on ``close()``, which also evicts entries older than
+    ``max_age`` seconds and, oldest first, entries beyond ``max_bytes``.
+    """
+
+    def __init__(
+        self,
+        cache_dir: str | pathlib.Path,
+        max_bytes: int | None = None,
+        max_age: float | None = None,
+    ):
+        cache_dir = pathlib.Path(cache_dir)
+        cache_dir.mkdir(parents=True, exist_ok=True)
+        self.max_bytes = max_bytes
+        self.max_age = max_age
+        self.hits = 0
+        self.misses = 0
+        self._now = time.time()
+        self._touched: List[str] = []
+        self._conn = sqlite3.connect(cache_dir / CACHE_DB_NAME)
+        self._conn.executescript(_SCHEMA)
+
+    def __enter__(self) -> Self:
+        return self
+
+    def __exit__(self, *exc) -> None:
+        self.close()
+
+    @staticmethod
+    def key_for(game: str, salt: str = "") -> str:
+        _, movetext = split_headers(game)
+        h = hashlib.blake2b(digest_size=20)
+        h.update(f"v{CACHE_FORMAT_VERSION}\0{salt}\0".encode())
+        h.update(movetext.strip().encode("utf-8"))
+        return h.hexdigest()
+
+    def get(self, game: str, salt: str = "") -> List[List[str]] | None:
+        """Return the cached line sequences for ``game``, or None on a miss."""
+        key = self.key_for(game, salt)
+        row = self._conn.execute(
+            "SELECT seqs FROM games WHERE key = ?", (key,)
+        ).fetchone()
+        if row is None:
+            self.misses += 1
+            return None
+        self.hits += 1
+        self._touched.append(key)
+        return json.loads(row[0])
+
+    def put(self, game: str, seqs: List[List[str]], salt: str = "") -> None:
+        payload = json.dumps(seqs, ensure_ascii=False, separators=(",", ":"))
+        self._conn.execute(
+            "INSERT OR REPLACE INTO games (key, seqs, size, last_used) "
+            "VALUES (?, ?, ?, ?)",
+            (self.key_for(game, salt), payload, len(payload), self._now),
+        )
+
+    def evict(self) -> int:
+        """Drop expired entries, then the least recently used over budget."""
+        n_before = self._conn.total_changes
+        if self.max_age is not None:
+            self._conn.execute(
+                "DELETE FROM games WHERE last_used < ?", (self._now - self.max_age,)
+            )
+        if self.max_bytes is not None:
+            self._conn.execute(
+                "DELETE FROM games WHERE key IN ("
+                " SELECT key FROM ("
+                "  SELECT key, SUM(size) OVER (ORDER BY last_used DESC, key)"
+                "   AS running FROM games"
+                " ) WHERE running > ?)",
+                (self.max_bytes,),
+            )
+        return self._conn.total_changes - n_before
+
+    def close(self) -> None:
+        self._conn.executemany(
+            "UPDATE games SET last_used = ? WHERE key = ?",
+            ((self._now, key) for key in self._touched),
+        )
+        self._touched.clear()
+        self.evict()
+        self._conn.commit()
+        self._conn.close()
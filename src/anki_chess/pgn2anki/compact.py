@@ -0,0 +1,128 @@
+from __future__ import annotations
+from array import array
+from typing import Dict, Iterator, List
+
+NO_NODE = -1
+
+
+class SanTable:
+    """Intern SAN strings as small integer ids.
+
+    Description
+    -----------
+    A repertoire repeats the same few thousand SAN strings across millions
+    of nodes. Storing each distinct string once and referring to it by id
+    keeps per-node storage to a single ``int``. A table can be shared by
+    many trees.
+    """
+
+    __slots__ = ("_ids", "_sans")
+
+    def __init__(self):
+        self._ids: Dict[str, int] = {}
+        self._sans: List[str] = []
+
+    def intern(self, san: str) -> int:
+        san_id = self._ids.get(san)
+        if san_id is None:
+            san_id = len(self._sans)
+            self._ids[san] = san_id
+            self._sans.append(san)
+        return san_id
+
+    def __getitem__(self, san_id: int) -> str:
+        return self._sans[san_id]
+
+    def __len__(self) -> int:
+        return len(self._sans)
+
+
+class CompactMoveTree:
+    """Move tree stored as parallel ``array('i')`` columns.
+
+    Description
+    -----------
+    Node ``i`` is described by ``parent[i]``, ``first_child[i]``,
+    ``next_sibling[i]`` and ``san_id[i]`` (an id into ``sans``); missing
+    links are ``NO_NODE``. ``last_child`` makes appending a child O(1).
+    Node 0 is the root and carries no move. Compared to ``Node`` objects
+    this costs 20 bytes per node instead of an instance, a list and a
+    string reference.
+    """
+
+    ROOT = 0
+
+    __slots__ = (
+        "first_child",
+        "last_child",
+        "next_sibling",
+        "parent",
+        "san_id",
+        "sans",
+    )
+
+    def __init__(self, sans: SanTable | None = None):
+        self.sans = sans if sans is not None else SanTable()
+        self.parent = array("i", [NO_NODE])
+        self.first_child = array("i", [NO_NODE])
+        self.next_sibling = array("i", [NO_NODE])
+        self.last_child = array("i", [NO_NODE])
+        self.san_id = array("i", [NO_NODE])
+
+    def __len__(self) -> int:
+        return len(self.parent)
+
+    def add_child(self, parent: int, san: str) -> int:
+        """Append a move below ``parent`` and return the new node's index."""
+        node = len(self.parent)
+        self.parent.append(parent)
+        self.first_child.append(NO_NODE)
+        self.next_sibling.append(NO_NODE)
+        self.last_child.append(NO_NODE)
+        self.san_id.append(self.sans.intern(san))
+        prev = self.last_child[parent]
+        if prev == NO_NODE:
+            self.first_child[parent] = node
+        else:
+            self.next_sibling[prev] = node
+        self.last_child[parent] = node
+        return node
+
+    def san(self, node: int) -> str | None:
+        san_id = self.san_id[node]
+        return None if san_id == NO_NODE else self.sans[san_id]
+
+    def children(self, node: int) -> Iterator[int]:
+        child = self.first_child[node]
+        while child != NO_NODE:
+            yield child
+            child = self.next_sibling[child]
+
+    def iter_lines(self, node: int = ROOT) -> Iterator[List[str]]:
+        """Yield every line below ``node`` in the same order as ``Node`` trees.
+
+        Description
+        -----------
+        Walks the index columns with an explicit stack of pending siblings
+        and one mutable path, copying the path only at leaves.
+        """
+        first_child, next_sibling = self.first_child, self.next_sibling
+        san_id, sans = self.san_id, self.sans
+        path: List[str] = []
+        stack = [(first_child[node], 0)]
+        while stack:
+            cur, depth = stack.pop()
+            if cur == NO_NODE:
+                continue
+            del path[depth:]
+            while True:
+                sibling = next_sibling[cur]
+                if sibling != NO_NODE:
+                    stack.append((sibling, depth))
+                path.append(sans[san_id[cur]])
+                depth += 1
+                child = first_child[cur]
+                if child == NO_NODE:
+                    yield path.copy()
+                    break
+                cur = child
@@ -0,0 +1,155 @@
+from __future__ import annotations
+from typing import BinaryIO, Tuple, Type
+import importlib
+import io
+import os
+import queue
+import threading
+
+# Standard-library module (with an ``open(path, "rb")``) for each codec.
+COMPRESSION_CODECS = {".gz": "gzip", ".bz2": "bz2", ".xz": "lzma"}
+
+# Exception each codec raises on corrupt data besides OSError and EOFError,
+# as (module, attribute).
+_CODEC_ERRORS = {"gzip": ("zlib", "error"), "lzma": ("lzma", "LZMAError")}
+
+# Leading bytes of gzip, bzip2 and xz streams.
+_COMPRESSION_MAGIC = (
+    (b"\x1f\x8b", "gzip"),
+    (b"BZh", "bz2"),
+    (b"\xfd7zXZ\x00", "lzma"),
+)
+
+# Decompressed bytes handed from the decompression thread per queue item...
+DECOMPRESS_CHUNK_SIZE = 1 << 20
+
+# ...and items allowed to wait in the queue, so memory stays bounded at
+# about DECOMPRESS_CHUNK_SIZE * (DECOMPRESS_QUEUE_CHUNKS + 2) bytes.
+DECOMPRESS_QUEUE_CHUNKS = 4
+
+
+def detect_compression(path: str | os.PathLike) -> str | None:
+    """Codec module name for a compressed file, or None for plain text.
+
+    Description
+    -----------
+    The leading bytes decide; the file name's extension is only used when
+    they match no codec, so a truncated or empty ``.gz`` still fails as a
+    gzip file instead of being read as text.
+    """
+    with open(path, "rb") as f:
+        head = f.read(6)
+    for magic, codec in _COMPRESSION_MAGIC:
+        if head.startswith(magic):
+            return codec
+    return COMPRESSION_CODECS.get(os.path.splitext(path)[1].lower())
+
+
+def strip_compression_suffix(name: str) -> str:
+    """``name`` without a ``.gz``/``.bz2``/``.xz`` extension."""
+    base, ext = os.path.splitext(name)
+    return base if ext.lower() in COMPRESSION_CODECS else name
+
+
+def open_decompressed(path: str | os.PathLike, codec: str) -> BinaryIO:
+    """Decompressing binary reader running in this thread."""
+    return importlib.import_module(codec).open(path, "rb")
+
+
+def decompression_errors(codec: str) -> Tuple[Type[Exception], ...]:
+    """Exceptions a ``codec`` reader raises on a corrupt or truncated file."""
+    errors: Tuple[Type[Exception], ...] = (OSError, EOFError)
+    if codec in _CODEC_ERRORS:
+        module, name = _CODEC_ERRORS[codec]
+        errors += (getattr(importlib.import_module(module), name),)
+    return errors
+
+
+class ThreadedDecompressor(io.RawIOBase):
+    """Raw binary stream of a compressed file, inflated on its own thread.
+
+    Description
+    -----------
+    A daemon thread reads ``chunk_size`` decompressed bytes at a time into
+    a queue of at most ``max_chunks`` items, and ``readinto`` takes them
+    off the queue. zlib, bz2 and lzma release the GIL while inflating, so
+    decompression overlaps with tokenizing and parsing in the reading
+    thread, while the bounded queue keeps memory independent of the file
+    size. Errors in the thread (e.g. a truncated stream) are raised by the
+    next read. ``close`` stops the thread without draining the file.
+    """
+
+    def __init__(
+        self,
+        path: str | os.PathLike,
+        codec: str,
+        chunk_size: int = DECOMPRESS_CHUNK_SIZE,
+        max_chunks: int = DECOMPRESS_QUEUE_CHUNKS,
+    ):
+        super().__init__()
+        # Opened here so a missing file fails in the caller, not the thread.
+        self._source = open_decompressed(path, codec)
+        self._errors = decompression_errors(codec)
+        self._queue: queue.Queue[bytes | Exception] = queue.Queue(max_chunks)
+        self._closing = threading.Event()
+        self._chunk = memoryview(b"")
+        self._eof = False
+        self._thread = threading.Thread(
+            target=self._decompress,
+            args=(chunk_size,),
+            name=f"decompress {os.fsdecode(path)}",
+            daemon=True,
+        )
+        self._thread.start()
+
+    def _put(self, item: bytes | Exception) -> bool:
+        while not self._closing.is_set():
+            try:
+                self._queue.put(item, timeout=0.1)
+                return True
+            except queue.Full:
+                pass
+        return False
+
+    def _decompress(self, chunk_size: int) -> None:
+        try:
+            with self._source as source:
+                while True:
+                    chunk = source.read(chunk_size)
+                    # An empty chunk marks the end of the stream.
+                    if not self._put(chunk) or not chunk:
+                        return
+        except self._errors as exc:
+            self._put(exc)
+        except Exception as exc:
+            # A bug rather than a bad file: fail the reader too, so it does
+            # not wait forever, and leave the traceback to the thread.
+            self._put(exc)
+            raise
+
+    def readable(self) -> bool:
+        return True
+
+    def readinto(self, buffer) -> int:
+        if not self._chunk:
+            if self._eof:
+                return 0
+            item = self._queue.get()
+            if isinstance(item, Exception):
+                self._eof = True
+                raise item
+            if not item:
+                self._eof = True
+                return 0
+            self._chunk = memoryview(item)
+        n = min(len(buffer), len(self._chunk))
+        buffer[:n] = self._chunk[:n]
+        self._chunk = self._chunk[n:]
+        return n
+
+    def close(self) -> None:
+        if not self.closed:
+            self._closing.set()
+            self._thread.join()
+            self._chunk = memoryview(b"")
+        super().close()
@@ -1,3 +1,11 @@
+# ``chess.STARTING_FEN``, kept here so writing rows needs no python-chess.
+STARTING_FEN = "rnbqkbnr/pppppppp/8/8/8/8/PPPPPPPP/RNBQKBNR w KQkq - 0 1"
 PGN_MOVE_NUMBER_REGEX = r"^\d+\.(\.\.)?$"
 PGN_HEADER_REGEX = r"^\s*\[.*?\]\s*"
 PGN_COMMENT_REGEX = r"\{[^}]*\}"
+PGN_HEADER_TOKEN_REGEX = r"\[[^\]\n]*\]"
+PGN_COMMENT_TOKEN_REGEX = r"\{[^}]*\}|;[^\n]*"
+PGN_NAG_TOKEN_REGEX = r"\$\d+"
+PGN_RESULT_TOKEN_REGEX = r"1-0|0-1|1/2-1/2|\*"
+PGN_MOVE_NUMBER_TOKEN_REGEX = r"\d+\.+"
+PGN_SAN_TOKEN_REGEX = r"[^\s(){}\[\];$]+"
@@ -0,0 +1,102 @@
+from __future__ import annotations
+from typing import Dict, Iterator, List, Tuple
+
+from .lazy import lazy_import
+from .node import Node
+from .san import strip_san_annotations
+
+chess = lazy_import("chess")
+polyglot = lazy_import("chess.polyglot")
+
+
+class PositionDag:
+    """Repertoire merged into one graph keyed by position.
+
+    Description
+    -----------
+    Every position reached in any game is a vertex keyed by its Zobrist
+    hash, and every move played from it is an edge labelled with the
+    move's canonical SAN. Games that reach the same position through
+    different move orders, or that repeat each other, therefore share
+    vertices and edges, and each continuation is stored once.
+    """
+
+    def __init__(self):
+        self.root = polyglot.zobrist_hash(chess.Board())
+        # position hash -> {uci: (san, child position hash)}, in first-seen order
+        self.edges: Dict[int, Dict[str, Tuple[str, int]]] = {}
+
+    def __len__(self) -> int:
+        """Number of positions that have at least one continuation."""
+        return len(self.edges)
+
+    def add_tree(self, root: Node, max_plies: int | None = None) -> None:
+        """Replay a game's move tree from the initial position into the DAG.
+
+        Description
+        -----------
+        Moves are replayed with a single board, pushing on the way down and
+        popping on the way back, so every SAN in the tree is parsed exactly
+        once. Moves beyond ``max_plies`` are ignored. An illegal or
+        malformed move is skipped together with the moves below it, so the
+        lines through it end before it.
+        """
+        board = chess.Board()
+        stack = [iter(root.children)]
+        while stack:
+            child = next(stack[-1], None)
+            if child is None:
+                stack.pop()
+                if stack:
+                    board.pop()
+                continue
+            if max_plies is not None and len(stack) > max_plies:
+                continue
+            # Only the root has no move.
+            assert child.san is not None
+            parent_key = polyglot.zobrist_hash(board)
+            try:
+                move = board.parse_san(strip_san_annotations(child.san))
+            except ValueError:
+                continue
+            san = board.san(move)
+            board.push(move)
+            edges = self.edges.setdefault(parent_key, {})
+            if move.uci() not in edges:
+                edges[move.uci()] = (san, polyglot.zobrist_hash(board))
+            stack.append(iter(child.children))
+
+    def iter_lines(self, include_transpositions: bool = False) -> Iterator[List[str]]:
+        """Yield one line per unique leaf position.
+
+        Description
+        -----------
+        Walks the DAG depth-first from the initial position, expanding each
+        position only the first time it is reached. A path that arrives at
+        an already expanded position (a transposition) is dropped, since
+        its continuations were already emitted through the first move
+        order; with ``include_transpositions=True`` it is emitted as a
+        line ending at the transposition instead.
+        """
+        path: List[str] = []
+        expanded = {self.root}
+        stack = [(iter(self.edges.get(self.root, {}).values()), 0)]
+        while stack:
+            children, depth = stack[-1]
+            edge = next(children, None)
+            if edge is None:
+                stack.pop()
+                continue
+            del path[depth:]
+            san, child = edge
+            path.append(san)
+            if child in expanded:
+                if include_transpositions:
+                    yield path.copy()
+                continue
+            expanded.add(child)
+            grandchildren = self.edges.get(child)
+            if grandchildren:
+                stack.append((iter(grandchildren.values()), len(path)))
+            else:
+                yield path.copy()
@@ -1,20 +1,164 @@
 from __future__ import annotations
-from typing import Iterable, List
+from itertools import islice
+from typing import Iterable, Iterator, List, Self
 import csv
 import json
-import chess
 
+from .const import STARTING_FEN
+from .line import Line
+from .note_keys import NOTE_KEY_FIELD, line_key
+from .ply_data import PLY_DATA_FIELD, PlyDataBuilder
 
-def _compute_start_fen_for_line(san_seq: List[str]) -> str:
-    if chess is None:
-        return "start"
-    board = chess.Board()
-    return board.fen()
+# Output files are opened with this buffer size so rows reach the OS in
+# large writes instead of one small write per row.
+EMIT_WRITE_BUFFER_SIZE = 1 << 20
 
+# Number of lines formatted and handed to the writer at a time.
+DEFAULT_EMIT_BATCH_SIZE = 1024
 
-def emit_csv(lines: Iterable, fp) -> None:
-    writer = csv.writer(fp)
-    writer.writerow(["Title", "FEN", "SAN_SEQ_JSON"])
-    for line in lines:
-        fen = _compute_start_fen_for_line(line.san_seq)
-        writer.writerow([line.title, fen, json.dumps(line.san_seq, ensure_ascii=False)])
+CSV_HEADER = ["Title", "FEN", "SAN_SEQ_JSON"]
+
+
+def _line_fen(line: Line) -> str:
+    return line.fen or STARTING_FEN
+
+
+def _iter_batches(lines: Iterable[Line], batch_size: int) -> Iterator[List[Line]]:
+    it = iter(lines)
+    while batch := list(islice(it, batch_size)):
+        yield batch
+
+
+class LineEmitter:
+    """Base class for writers that turn lines into deck rows.
+
+    Description
+    -----------
+    ``emit`` pulls lines in batches of ``batch_size`` and passes each batch
+    to ``write_batch``, so subclasses format and write many rows per call.
+    Emitters are context managers; ``close`` flushes whatever the format
+    keeps pending. Writing the same lines to any emitter yields the same
+    notes in the same order. With a ``ply_data`` builder, each note gets an
+    extra ``PLY_DATA`` field with the precomputed per-ply data; with
+    ``note_keys``, rows end with the line's stable ``GUID`` (its ``key``, or
+    ``line_key`` for lines without one).
+    """
+
+    def __init__(
+        self,
+        batch_size: int = DEFAULT_EMIT_BATCH_SIZE,
+        ply_data: PlyDataBuilder | None = None,
+        note_keys: bool = False,
+    ):
+        self.batch_size = batch_size
+        self.ply_data = ply_data
+        self.note_keys = note_keys
+
+    @property
+    def field_names(self) -> List[str]:
+        names = list(CSV_HEADER)
+        if self.ply_data is not None:
+            names.append(PLY_DATA_FIELD)
+        if self.note_keys:
+            names.append(NOTE_KEY_FIELD)
+        return names
+
+    def _fields(self, line: Line) -> List[str]:
+        fields = [
+            line.title,
+            _line_fen(line),
+            json.dumps(line.san_seq, ensure_ascii=False),
+        ]
+        if self.ply_data is not None:
+            fields.append(self.ply_data.encode(line))
+        if self.note_keys:
+            fields.append(line.key or line_key(line))
+        return fields
+
+    def __enter__(self) -> Self:
+        return self
+
+    def __exit__(self, *exc) -> None:
+        self.close()
+
+    def emit(self, lines: Iterable[Line]) -> int:
+        """Write all lines and return the number of rows written."""
+        n_rows = 0
+        for batch in _iter_batches(lines, self.batch_size):
+            self.write_batch(batch)
+            n_rows += len(batch)
+        return n_rows
+
+    def write_batch(self, lines: List[Line]) -> None:
+        raise NotImplementedError
+
+    def close(self) -> None:
+        pass
+
+
+class CsvEmitter(LineEmitter):
+    """CSV rows with the ``Title``, ``FEN`` and ``SAN_SEQ_JSON`` columns."""
+
+    def __init__(
+        self,
+        fp,
+        batch_size: int = DEFAULT_EMIT_BATCH_SIZE,
+        ply_data: PlyDataBuilder | None = None,
+        note_keys: bool = False,
+    ):
+        super().__init__(batch_size, ply_data, note_keys)
+        self._writer = csv.writer(fp)
+        self._writer.writerow(self.field_names)
+
+    def write_batch(self, lines: List[Line]) -> None:
+        self._writer.writerows(self._fields(line) for line in lines)
+
+
+class JsonlEmitter(LineEmitter):
+    """One JSON object per line with ``title``, ``fen`` and ``san_seq`` keys."""
+
+    def __init__(
+        self,
+        fp,
+        batch_size: int = DEFAULT_EMIT_BATCH_SIZE,
+        ply_data: PlyDataBuilder | None = None,
+        note_keys: bool = False,
+    ):
+        super().__init__(batch_size, ply_data, note_keys)
+        self._fp = fp
+
+    def _record(self, line: Line) -> dict:
+        record = {"title": line.title, "fen": _line_fen(line), "san_seq": line.san_seq}
+        if self.ply_data is not None:
+            record["ply_data"] = self.ply_data.encode(line)
+        if self.note_keys:
+            record["guid"] = line.key or line_key(line)
+        return record
+
+    def write_batch(self, lines: List[Line]) -> None:
+        self._fp.write(
+            "".join(
+                json.dumps(self._record(line), ensure_ascii=False) + "\n"
+                for line in lines
+            )
+        )
+
+
+def emit_csv(lines: Iterable, fp, **options) -> int:
+    """Write lines as CSV rows and return the number of rows written.
+
+    Description
+    -----------
+    ``options`` are passed to ``CsvEmitter`` (``ply_data``, ``note_keys``).
+    """
+    return CsvEmitter(fp, **options).emit(lines)
+
+
+def emit_jsonl(lines: Iterable, fp, **options) -> int:
+    """Write lines as JSON Lines and return the number of lines written.
+
+    Description
+    -----------
+    ``options`` are passed to ``JsonlEmitter`` (``ply_data``, ``note_keys``).
+    """
+    return JsonlEmitter(fp, **options).emit(lines)
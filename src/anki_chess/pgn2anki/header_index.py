@@ -0,0 +1,171 @@
+from __future__ import annotations
+from itertools import islice
+from typing import Iterator, Self
+import json
+import mmap
+import os
+import pathlib
+
+from .headers import (
+    HeaderFilter,
+    eco_code,
+    normalize_date,
+    parse_elo,
+    parse_headers,
+)
+from .lazy import lazy_import
+from .reader import decode_game_span, iter_pgn_game_spans
+
+sqlite3 = lazy_import("sqlite3")
+
+# Bump when the stored columns or their normalization change.
+HEADER_INDEX_VERSION = 1
+
+_INSERT_BATCH_SIZE = 10_000
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS meta (key TEXT PRIMARY KEY, value TEXT NOT NULL);
+CREATE TABLE IF NOT EXISTS games (
+    ordinal INTEGER PRIMARY KEY,
+    start INTEGER NOT NULL,
+    movetext_start INTEGER NOT NULL,
+    end INTEGER NOT NULL,
+    eco TEXT NOT NULL,
+    white_elo INTEGER,
+    black_elo INTEGER,
+    date TEXT NOT NULL,
+    result TEXT NOT NULL,
+    headers TEXT NOT NULL
+);
+CREATE INDEX IF NOT EXISTS games_eco ON games (eco);
+"""
+
+
+def _sql_prefilter(header_filter: HeaderFilter):
+    """WHERE clause selecting a superset of the games ``header_filter`` accepts."""
+    clauses, params = [], []
+    if header_filter.eco:
+        clauses.append(
+            "(" + " OR ".join("eco BETWEEN ? AND ?" for _ in header_filter.eco) + ")"
+        )
+        params += [code for pair in header_filter.eco for code in pair]
+    if header_filter.results:
+        clauses.append(f"result IN ({','.join('?' * len(header_filter.results))})")
+        params += header_filter.results
+    if header_filter.min_elo is not None:
+        clauses.append("white_elo >= ? AND black_elo >= ?")
+        params += [header_filter.min_elo, header_filter.min_elo]
+    if header_filter.date_from is not None:
+        clauses.append("date != '' AND date >= ?")
+        params.append(header_filter.date_from)
+    if header_filter.date_to is not None:
+        clauses.append("date != '' AND date <= ?")
+        params.append(header_filter.date_to)
+    return " AND ".join(clauses) or "1", params
+
+
+class HeaderIndex:
+    """Persistent index of one PGN file's games: byte offsets and header tags.
+
+    Description
+    -----------
+    The index is a SQLite file holding, per game, the offsets found by
+    ``reader.iter_pgn_game_spans`` and its header tags. Filtered runs query
+    the index and decode only the movetext of matching games from a
+    memory-mapped PGN, so neither the headers nor the movetext of other
+    games are read again. The index is rebuilt automatically when the PGN's
+    size or modification time no longer match the ones recorded.
+    """
+
+    def __init__(self, index_path: str | pathlib.Path, pgn_path: str | pathlib.Path):
+        self.pgn_path = pathlib.Path(pgn_path)
+        self._conn = sqlite3.connect(index_path)
+        self._conn.executescript(_SCHEMA)
+
+    def __enter__(self) -> Self:
+        return self
+
+    def __exit__(self, *exc) -> None:
+        self.close()
+
+    def _fingerprint(self) -> dict:
+        st = self.pgn_path.stat()
+        return {
+            "version": str(HEADER_INDEX_VERSION),
+            "size": str(st.st_size),
+            "mtime_ns": str(st.st_mtime_ns),
+        }
+
+    def is_current(self) -> bool:
+        stored = dict(self._conn.execute("SELECT key, value FROM meta"))
+        return stored == self._fingerprint()
+
+    def _iter_rows(self, buf, view) -> Iterator[tuple]:
+        for ordinal, (start, movetext_start, end) in enumerate(
+            iter_pgn_game_spans(buf)
+        ):
+            headers = parse_headers(decode_game_span(view, start, movetext_start))
+            yield (
+                ordinal,
+                start,
+                movetext_start,
+                end,
+                eco_code(headers),
+                parse_elo(headers.get("WhiteElo")),
+                parse_elo(headers.get("BlackElo")),
+                normalize_date(headers.get("Date", "")),
+                headers.get("Result", ""),
+                json.dumps(headers, ensure_ascii=False),
+            )
+
+    def build(self) -> int:
+        """(Re)scan the PGN and store every game; return the number of games."""
+        fingerprint = self._fingerprint()
+        self._conn.execute("DELETE FROM games")
+        self._conn.execute("DELETE FROM meta")
+        n_games = 0
+        if int(fingerprint["size"]) > 0:
+            with (
+                open(self.pgn_path, "rb") as f,
+                mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as buf,
+                memoryview(buf) as view,
+            ):
+                rows = self._iter_rows(buf, view)
+                while batch := list(islice(rows, _INSERT_BATCH_SIZE)):
+                    self._conn.executemany(
+                        "INSERT INTO games VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?)",
+                        batch,
+                    )
+                    n_games += len(batch)
+        self._conn.executemany(
+            "INSERT INTO meta VALUES (?, ?)", sorted(fingerprint.items())
+        )
+        self._conn.commit()
+        return n_games
+
+    def iter_games(
+        self, header_filter: HeaderFilter | None = None, headers: bool = False
+    ) -> Iterator[str]:
+        """Yield the movetext (or whole text) of each matching game, in order."""
+        if not self.is_current():
+            self.build()
+        if os.path.getsize(self.pgn_path) == 0:
+            return
+        where, params = _sql_prefilter(header_filter or HeaderFilter())
+        rows = self._conn.execute(
+            f"SELECT start, movetext_start, end, headers FROM games "
+            f"WHERE {where} ORDER BY ordinal",
+            params,
+        )
+        with (
+            open(self.pgn_path, "rb") as f,
+            mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as buf,
+            memoryview(buf) as view,
+        ):
+            for start, movetext_start, end, tags in rows:
+                if header_filter and not header_filter.matches(json.loads(tags)):
+                    continue
+                yield decode_game_span(view, start if headers else movetext_start, end)
+
+    def close(self) -> None:
+        self._conn.close()
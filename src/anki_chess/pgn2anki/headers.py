@@ -0,0 +1,139 @@
+from __future__ import annotations
+from dataclasses import dataclass, field
+from typing import Dict, Iterable, Iterator, List, Tuple
+import re
+
+from .reader import split_headers
+
+_TAG_PAIR_PATTERN = re.compile(r'\[\s*(\w+)\s+"((?:[^"\\]|\\.)*)"\s*\]')
+
+PGN_RESULTS = ("1-0", "0-1", "1/2-1/2", "*")
+
+
+def parse_headers(header_text: str) -> Dict[str, str]:
+    """Parse a game's tag pairs into a ``{tag: value}`` dict."""
+    return {
+        tag: value.replace('\\"', '"').replace("\\\\", "\\")
+        for tag, value in _TAG_PAIR_PATTERN.findall(header_text)
+    }
+
+
+def parse_eco_ranges(spec: str) -> List[Tuple[str, str]]:
+    """Parse ``"C21-C29,B20"`` into inclusive ``(low, high)`` code pairs."""
+    ranges = []
+    for part in spec.split(","):
+        low, _, high = part.strip().upper().partition("-")
+        high = high or low
+        for code in (low, high):
+            if not re.fullmatch(r"[A-E]\d\d", code):
+                raise ValueError(f"invalid ECO code {code!r} in {spec!r}")
+        if low > high:
+            raise ValueError(f"empty ECO range {part.strip()!r}")
+        ranges.append((low, high))
+    return ranges
+
+
+def normalize_date(date: str, fill: str = "00") -> str:
+    """Turn a full or partial ``YYYY.MM.DD`` date into a comparable string.
+
+    Description
+    -----------
+    Missing or unknown (``??``) month and day parts become ``fill``, so
+    ``"2001"`` with ``fill="99"`` is the last day of 2001 for an inclusive
+    upper bound. An unknown year returns an empty string.
+    """
+    year, *rest = date.strip().split(".")
+    if not year.isdigit():
+        return ""
+    rest = [p.zfill(2) if p.isdigit() else fill for p in rest[:2]]
+    rest += [fill] * (2 - len(rest))
+    return ".".join([year.zfill(4), *rest])
+
+
+def eco_code(headers: Dict[str, str]) -> str:
+    """The game's three-character ECO code, upper-cased ("" if missing)."""
+    return headers.get("ECO", "").strip().upper()[:3]
+
+
+def parse_elo(value: str | None) -> int | None:
+    if value is None:
+        return None
+    try:
+        return int(value)
+    except ValueError:
+        return None
+
+
+@dataclass
+class HeaderFilter:
+    """Select games by their header tags.
+
+    Description
+    -----------
+    Every criterion that is set must hold. ``eco`` holds inclusive ECO code
+    ranges; ``players`` match case-insensitively as substrings of the White
+    or Black tag (any of them); ``min_elo`` requires both players to be
+    rated at least that much; ``date_from`` and ``date_to`` are inclusive
+    normalized dates (see ``normalize_date``) and games with an unknown
+    year fail them; ``results`` lists accepted Result tags.
+    """
+
+    eco: List[Tuple[str, str]] = field(default_factory=list)
+    players: List[str] = field(default_factory=list)
+    min_elo: int | None = None
+    date_from: str | None = None
+    date_to: str | None = None
+    results: List[str] = field(default_factory=list)
+
+    def __bool__(self) -> bool:
+        return bool(
+            self.eco
+            or self.players
+            or self.min_elo is not None
+            or self.date_from is not None
+            or self.date_to is not None
+            or self.results
+        )
+
+    def matches(self, headers: Dict[str, str]) -> bool:
+        if self.eco:
+            eco = eco_code(headers)
+            if not any(low <= eco <= high for low, high in self.eco):
+                return False
+        if self.results and headers.get("Result") not in self.results:
+            return False
+        if self.players:
+            names = (headers.get("White", "") + "\n" + headers.get("Black", "")).lower()
+            if not any(p.lower() in names for p in self.players):
+                return False
+        if self.min_elo is not None:
+            for tag in ("WhiteElo", "BlackElo"):
+                elo = parse_elo(headers.get(tag))
+                if elo is None or elo < self.min_elo:
+                    return False
+        if self.date_from is not None or self.date_to is not None:
+            date = normalize_date(headers.get("Date", ""))
+            if not date:
+                return False
+            if self.date_from is not None and date < self.date_from:
+                return False
+            if self.date_to is not None and date > self.date_to:
+                return False
+        return True
+
+    def matches_header_text(self, header_text: str) -> bool:
+        return self.matches(parse_headers(header_text))
+
+
+def filter_games(games: Iterable[str], header_filter: HeaderFilter) -> Iterator[str]:
+    """Yield only the games whose header block passes ``header_filter``.
+
+    Description
+    -----------
+    Only the header block of each game is parsed; the movetext of rejected
+    games is never looked at.
+    """
+    for game in games:
+        header_text, _ = split_headers(game)
+        if header_filter.matches_header_text(header_text):
+            yield game
@@ -0,0 +1,33 @@
+from __future__ import annotations
+import importlib
+import sys
+import types
+
+
+class LazyModule(types.ModuleType):
+    """Stand-in for a module that imports it on first attribute access.
+
+    Description
+    -----------
+    After the first access the real module's namespace is copied in, so
+    later lookups are plain attribute reads. Unlike
+    ``importlib.util.LazyLoader`` this also defers submodules such as
+    ``chess.polyglot``, whose parent package ``find_spec`` would import.
+    """
+
+    def __getattr__(self, name: str):
+        module = importlib.import_module(self.__name__)
+        self.__dict__.update(module.__dict__)
+        return getattr(module, name)
+
+
+def lazy_import(name: str) -> types.ModuleType:
+    """Return ``name`` if already imported, else a ``LazyModule`` for it.
+
+    Description
+    -----------
+    Used for dependencies that only some features need (python-chess,
+    sqlite3, ...), so that starting the CLI does not pay for them.
+    """
+    module = sys.modules.get(name)
+    return module if module is not None else LazyModule(name)
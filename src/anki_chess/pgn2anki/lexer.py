@@ -0,0 +1,104 @@
+from __future__ import annotations
+from enum import Enum
+from typing import Iterator, List, NamedTuple
+import re
+
+from .const import (
+    PGN_HEADER_TOKEN_REGEX,
+    PGN_COMMENT_TOKEN_REGEX,
+    PGN_NAG_TOKEN_REGEX,
+    PGN_RESULT_TOKEN_REGEX,
+    PGN_MOVE_NUMBER_TOKEN_REGEX,
+    PGN_SAN_TOKEN_REGEX,
+)
+
+
+class TokenKind(Enum):
+    HEADER = "header"
+    COMMENT = "comment"
+    NAG = "nag"
+    PAREN_OPEN = "paren_open"
+    PAREN_CLOSE = "paren_close"
+    RESULT = "result"
+    MOVE_NUMBER = "move_number"
+    SAN = "san"
+
+
+class Token(NamedTuple):
+    kind: TokenKind
+    text: str
+
+
+# Alternatives are tried in order, so results and move numbers must come
+# before the catch-all SAN pattern.
+_TOKEN_REGEX_BY_KIND = {
+    TokenKind.HEADER: PGN_HEADER_TOKEN_REGEX,
+    TokenKind.COMMENT: PGN_COMMENT_TOKEN_REGEX,
+    TokenKind.NAG: PGN_NAG_TOKEN_REGEX,
+    TokenKind.PAREN_OPEN: r"\(",
+    TokenKind.PAREN_CLOSE: r"\)",
+    TokenKind.RESULT: PGN_RESULT_TOKEN_REGEX,
+    TokenKind.MOVE_NUMBER: PGN_MOVE_NUMBER_TOKEN_REGEX,
+    TokenKind.SAN: PGN_SAN_TOKEN_REGEX,
+}
+# Kind of each alternative; ``Match.lastindex`` is its 1-based position.
+_KIND_BY_GROUP_INDEX = tuple(_TOKEN_REGEX_BY_KIND)
+
+# Token kinds that make up the movetext proper, i.e. everything the move
+# tree builder looks at. Headers, comments and NAGs are lexed but dropped.
+MOVETEXT_TOKEN_KINDS = frozenset(
+    {
+        TokenKind.PAREN_OPEN,
+        TokenKind.PAREN_CLOSE,
+        TokenKind.RESULT,
+        TokenKind.MOVE_NUMBER,
+        TokenKind.SAN,
+    }
+)
+
+_PGN_TOKEN_PATTERN = re.compile(
+    "|".join(f"(?P<{kind.value}>{rx})" for kind, rx in _TOKEN_REGEX_BY_KIND.items())
+)
+
+# Same grammar, but only movetext tokens are captured, so ``findall`` does
+# the whole scan in C and returns "" for every skipped header/comment/NAG.
+_SKIPPED_REGEXES = [
+    rx for kind, rx in _TOKEN_REGEX_BY_KIND.items() if kind not in MOVETEXT_TOKEN_KINDS
+]
+_MOVETEXT_REGEXES = [
+    rx for kind, rx in _TOKEN_REGEX_BY_KIND.items() if kind in MOVETEXT_TOKEN_KINDS
+]
+_PGN_MOVETEXT_PATTERN = re.compile(
+    "|".join(_SKIPPED_REGEXES + ["(" + "|".join(_MOVETEXT_REGEXES) + ")"])
+)
+
+
+def iter_tokens(pgn: str) -> Iterator[Token]:
+    """Lex PGN text into typed tokens in a single pass.
+
+    Description
+    -----------
+    Headers, brace and semicolon comments, NAGs, variation parentheses,
+    game results, move numbers and SAN moves are all recognised by one
+    compiled regular expression, so the input is scanned exactly once.
+    Whitespace is skipped. Move numbers glued to a move (e.g. ``1.e4``)
+    are emitted as two tokens.
+    """
+    kinds = _KIND_BY_GROUP_INDEX
+    for m in _PGN_TOKEN_PATTERN.finditer(pgn):
+        index = m.lastindex
+        # Every alternative is a group, so a match always sets it.
+        assert index is not None
+        yield Token(kinds[index - 1], m.group())
+
+
+def tokenize_movetext(pgn: str) -> List[str]:
+    """Lex PGN text and return the movetext tokens as plain strings.
+
+    Description
+    -----------
+    This is the list-of-strings view of ``iter_tokens``: headers, comments
+    and NAGs are dropped while moves, move numbers, results and
+    parentheses are kept in order.
+    """
+    return [tok for tok in _PGN_MOVETEXT_PATTERN.findall(pgn) if tok]
@@ -7,3 +7,6 @@ from dataclasses import dataclass
 class Line:
     title: str
     san_seq: List[str]
+    fen: str | None = None
+    # Stable note key, set by ``note_keys.iter_keyed_lines``.
+    key: str | None = None
@@ -4,6 +4,8 @@ from dataclasses import dataclass
 
 @dataclass
 class Node:
+    __slots__ = ("children", "san")
+
     san: str | None
     children: list["Node"]
 
@@ -0,0 +1,146 @@
+from __future__ import annotations
+from typing import Dict, Iterable, Iterator, List, Tuple
+import hashlib
+import json
+import os
+import pathlib
+
+from .line import Line
+from .san import strip_san_annotations
+
+# Column/key holding the note key in CSV and JSON Lines output.
+NOTE_KEY_FIELD = "GUID"
+
+MANIFEST_VERSION = 1
+
+
+def _hash(text: str) -> str:
+    return hashlib.blake2b(text.encode("utf-8"), digest_size=8).hexdigest()
+
+
+def line_key(line: Line) -> str:
+    """Key of a line's content: its start position and its moves.
+
+    Description
+    -----------
+    Titles, annotations (``!``, ``?``) and the line's place in the input do
+    not enter the key, so inserting a variation or renumbering lines keeps
+    the keys of all other lines.
+    """
+    moves = " ".join(strip_san_annotations(san) for san in line.san_seq)
+    return _hash(f"{line.fen or ''}\x1f{moves}")
+
+
+class NoteKeys:
+    """Assign ``line_key``s, keeping repeated lines apart.
+
+    Description
+    -----------
+    The ``n``-th repeat of a line (e.g. the same line in two games) gets a
+    key derived from the line's key and ``n``, so every note of an export
+    has its own key and repeats keep theirs across exports.
+    """
+
+    def __init__(self):
+        self._seen: Dict[str, int] = {}
+
+    def key(self, line: Line) -> str:
+        key = line_key(line)
+        n = self._seen.get(key, 0)
+        self._seen[key] = n + 1
+        return _hash(f"{key}#{n}") if n else key
+
+
+def iter_keyed_lines(lines: Iterable[Line]) -> Iterator[Line]:
+    """Set ``line.key`` on every line."""
+    keys = NoteKeys()
+    for line in lines:
+        line.key = keys.key(line)
+        yield line
+
+
+def line_digest(line: Line, salt: str = "") -> str:
+    """Digest of the note content a line's key does not cover.
+
+    Description
+    -----------
+    Covers the moves as written (with annotations) and ``salt``, which
+    callers use for output options that change the notes. The title is
+    left out: it carries a running number that shifts whenever lines are
+    added, and rewriting every later note for that is what the manifest
+    avoids.
+    """
+    return _hash(f"{salt}\x1f{json.dumps(line.san_seq, ensure_ascii=False)}")
+
+
+class NoteManifest:
+    """Keys and digests of the notes written by the previous export.
+
+    Description
+    -----------
+    ``diff`` passes on only the lines that are new or whose digest changed
+    since the manifest at ``path`` was saved, counting ``added``,
+    ``changed`` and ``unchanged`` lines; afterwards ``removed`` lists the
+    ``(key, title)`` of notes that are gone. ``save`` replaces the manifest
+    with the lines just seen. Lines must have keys (``iter_keyed_lines``);
+    ``diff`` raises ``ValueError`` on one without. A manifest that is
+    empty or whose header cannot be read counts as no previous export.
+    """
+
+    def __init__(self, path: str | pathlib.Path):
+        self.path = pathlib.Path(path)
+        self.previous: Dict[str, Tuple[str, str]] = {}
+        self.current: Dict[str, Tuple[str, str]] = {}
+        self.added = self.changed = self.unchanged = 0
+        if self.path.exists():
+            with open(self.path, encoding="utf-8") as fp:
+                try:
+                    header = json.loads(fp.readline())
+                except ValueError:
+                    header = None
+                if (
+                    isinstance(header, dict)
+                    and header.get("version") == MANIFEST_VERSION
+                ):
+                    for row in map(json.loads, fp):
+                        self.previous[row["key"]] = (row["digest"], row["title"])
+
+    def diff(self, lines: Iterable[Line], salt: str = "") -> Iterator[Line]:
+        for line in lines:
+            if line.key is None:
+                raise ValueError(f"{line.title}: line has no note key")
+            digest = line_digest(line, salt)
+            self.current[line.key] = (digest, line.title)
+            old = self.previous.get(line.key)
+            if old is None:
+                self.added += 1
+            elif old[0] != digest:
+                self.changed += 1
+            else:
+                self.unchanged += 1
+                continue
+            yield line
+
+    @property
+    def removed(self) -> List[Tuple[str, str]]:
+        return [
+            (key, title)
+            for key, (_, title) in self.previous.items()
+            if key not in self.current
+        ]
+
+    def save(self) -> None:
+        tmp = self.path.with_name(self.path.name + ".tmp")
+        with open(tmp, "w", encoding="utf-8") as fp:
+            fp.write(json.dumps({"version": MANIFEST_VERSION}) + "\n")
+            fp.writelines(
+                json.dumps({"key": key, "digest": digest, "title": title}) + "\n"
+                for key, (digest, title) in self.current.items()
+            )
+        os.replace(tmp, self.path)
+
+    def summary(self) -> str:
+        return (
+            f"{self.added} added, {self.changed} changed, "
+            f"{len(self.removed)} removed, {self.unchanged} unchanged"
+        )
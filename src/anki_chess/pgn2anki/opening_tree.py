@@ -0,0 +1,142 @@
+from __future__ import annotations
+from typing import Dict, Iterable, Iterator, List, Tuple
+
+# Plies aggregated per game when no ``--max-plies`` is given.
+DEFAULT_OPENING_TREE_DEPTH = 20
+
+# Node budget while ingesting; see ``OpeningTree``.
+DEFAULT_OPENING_TREE_MAX_NODES = 1_000_000
+
+
+class CountedNode:
+    """A trie node counting the games that reached it."""
+
+    __slots__ = ("children", "count", "error", "last_game")
+
+    def __init__(self, error: int = 0):
+        self.count = 0
+        # Upper bound on games missed because this node was pruned earlier.
+        self.error = error
+        self.last_game = -1
+        self.children: Dict[str, CountedNode] = {}
+
+
+class OpeningTree:
+    """Counted prefix trie of the games in a database.
+
+    Description
+    -----------
+    ``add_game`` walks each line of a game (truncated to ``depth`` plies)
+    and counts the game once on every node it reaches. Memory is bounded by
+    ``max_nodes``: when the trie grows past it, the least visited subtrees
+    are pruned (lossy counting), leaving about three quarters of the
+    budget. A pruned continuation that shows up again restarts from zero,
+    so its count can be too low by at most the ``floor`` reached so far;
+    continuations seen more often than that are counted exactly.
+
+    ``iter_lines`` keeps continuations played in at least ``min_count``
+    games and, if ``top_k`` is set, only the ``top_k`` most played replies
+    at each position, and yields the resulting lines most popular first.
+    """
+
+    def __init__(
+        self,
+        min_count: int = 1,
+        top_k: int | None = None,
+        depth: int | None = DEFAULT_OPENING_TREE_DEPTH,
+        max_nodes: int = DEFAULT_OPENING_TREE_MAX_NODES,
+    ):
+        self.min_count = min_count
+        self.top_k = top_k
+        self.depth = depth
+        self.max_nodes = max_nodes
+        self.root = CountedNode()
+        self.games = 0
+        self.size = 0
+        self.floor = 0
+
+    def add_game(self, seqs: Iterable[List[str]]) -> None:
+        game = self.games
+        self.games += 1
+        root = self.root
+        root.count += 1
+        for seq in seqs:
+            node = root
+            for san in seq[: self.depth]:
+                child = node.children.get(san)
+                if child is None:
+                    child = node.children[san] = CountedNode(self.floor)
+                    self.size += 1
+                node = child
+                if node.last_game != game:
+                    node.last_game = game
+                    node.count += 1
+        if self.size > self.max_nodes:
+            self.prune(self.max_nodes * 3 // 4)
+
+    def _iter_nodes(self) -> Iterator[CountedNode]:
+        stack = [self.root]
+        while stack:
+            node = stack.pop()
+            children = node.children.values()
+            yield from children
+            stack.extend(children)
+
+    def prune(self, target: int) -> None:
+        """Drop the least visited subtrees until at most ``target`` nodes remain."""
+        if self.size <= target:
+            return
+        bounds = sorted(node.count + node.error for node in self._iter_nodes())
+        self.floor = max(self.floor + 1, bounds[self.size - target - 1])
+        floor = self.floor
+        stack = [self.root]
+        size = 0
+        while stack:
+            node = stack.pop()
+            kept = {
+                san: child
+                for san, child in node.children.items()
+                if child.count + child.error > floor
+            }
+            node.children = kept
+            size += len(kept)
+            stack.extend(kept.values())
+        self.size = size
+
+    def add_games(
+        self, game_seqs: Iterable[List[List[str]]]
+    ) -> Iterator[List[List[str]]]:
+        """Ingest every game, then yield all selected lines as one group."""
+        for seqs in game_seqs:
+            self.add_game(seqs)
+        yield [seq for seq, _ in self.iter_lines()]
+
+    def _selected_children(self, node: CountedNode) -> List[Tuple[str, CountedNode]]:
+        children = [
+            (san, child)
+            for san, child in node.children.items()
+            if child.count >= self.min_count
+        ]
+        children.sort(key=lambda item: -item[1].count)
+        return children[: self.top_k] if self.top_k is not None else children
+
+    def iter_lines(self) -> Iterator[Tuple[List[str], int]]:
+        """Yield ``(line, games)`` for each selected leaf, most played first.
+
+        Description
+        -----------
+        Lines with equal counts keep the order of a walk that visits the
+        most played reply first.
+        """
+        leaves: List[Tuple[List[str], int]] = []
+        stack: List[Tuple[CountedNode, List[str]]] = [(self.root, [])]
+        while stack:
+            node, path = stack.pop()
+            children = self._selected_children(node)
+            if not children:
+                if path:
+                    leaves.append((path, node.count))
+                continue
+            stack.extend((child, path + [san]) for san, child in reversed(children))
+        leaves.sort(key=lambda leaf: -leaf[1])
+        return iter(leaves)
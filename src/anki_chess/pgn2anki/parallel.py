@@ -0,0 +1,118 @@
+from __future__ import annotations
+from collections import deque
+from itertools import islice
+from typing import Callable, Iterable, Iterator, List
+import os
+
+from .lazy import lazy_import
+
+futures = lazy_import("concurrent.futures")
+multiprocessing = lazy_import("multiprocessing")
+
+# Games per task sent to a worker. Large enough to amortise pickling and
+# IPC overhead, small enough that a handful of batches per worker keeps
+# every core busy without buffering much of the input.
+DEFAULT_BATCH_SIZE = 256
+
+# Batches allowed in flight per worker before the producer waits for the
+# oldest one; bounds memory while keeping the pool saturated.
+MAX_IN_FLIGHT_PER_JOB = 4
+
+
+def resolve_jobs(jobs: int | None) -> int:
+    """Turn a ``--jobs`` value into a worker count (0 or None = all cores)."""
+    if not jobs:
+        return os.cpu_count() or 1
+    return max(1, jobs)
+
+
+def _pool_context():
+    """Start method for worker processes.
+
+    Description
+    -----------
+    Forking copies a process mid-flight, and the CLI may be running reader
+    or decompression threads by then, whose held locks would stay locked
+    in the children. The forkserver method forks from a clean,
+    single-threaded server instead; platforms without it keep their
+    default (spawn).
+    """
+    if "forkserver" in multiprocessing.get_all_start_methods():
+        return multiprocessing.get_context("forkserver")
+    return multiprocessing.get_context()
+
+
+def _iter_batches[T](items: Iterable[T], batch_size: int) -> Iterator[List[T]]:
+    it = iter(items)
+    while batch := list(islice(it, batch_size)):
+        yield batch
+
+
+def _apply_to_batch[T, R](fn: Callable[[T], R], batch: List[T]) -> List[R]:
+    return [fn(item) for item in batch]
+
+
+def _map_serial[T, R](
+    fn: Callable[[T], R],
+    items: Iterable[T],
+    lookup: Callable[[T], R | None] | None,
+    store: Callable[[T, R], None] | None,
+) -> Iterator[R]:
+    for item in items:
+        result = lookup(item) if lookup is not None else None
+        if result is None:
+            result = fn(item)
+            if store is not None:
+                store(item, result)
+        yield result
+
+
+def imap_ordered[T, R](
+    fn: Callable[[T], R],
+    items: Iterable[T],
+    jobs: int,
+    batch_size: int = DEFAULT_BATCH_SIZE,
+    lookup: Callable[[T], R | None] | None = None,
+    store: Callable[[T, R], None] | None = None,
+) -> Iterator[R]:
+    """Map ``fn`` over ``items`` in a process pool, yielding results in order.
+
+    Description
+    -----------
+    Items are grouped into batches and at most ``jobs * MAX_IN_FLIGHT_PER_JOB``
+    batches are submitted at a time, so ``items`` is consumed lazily and
+    memory stays bounded. Results are yielded in input order regardless of
+    which worker finishes first. ``fn`` must be picklable (a module-level
+    function or a ``functools.partial`` of one). With ``jobs <= 1`` no pool
+    is started and ``fn`` runs in this process.
+
+    ``lookup`` and ``store`` run in this process: an item for which
+    ``lookup`` returns a result other than None is never sent to a worker,
+    and every freshly computed result is passed to ``store``.
+    """
+    if jobs <= 1:
+        yield from _map_serial(fn, items, lookup, store)
+        return
+    with futures.ProcessPoolExecutor(
+        max_workers=jobs, mp_context=_pool_context()
+    ) as pool:
+        pending = deque()
+        for batch in _iter_batches(items, batch_size):
+            known = [lookup(item) if lookup is not None else None for item in batch]
+            todo = [item for item, result in zip(batch, known) if result is None]
+            future = pool.submit(_apply_to_batch, fn, todo) if todo else None
+            pending.append((batch, known, future))
+            if len(pending) >= jobs * MAX_IN_FLIGHT_PER_JOB:
+                yield from _merge_batch(*pending.popleft(), store)
+        while pending:
+            yield from _merge_batch(*pending.popleft(), store)
+
+
+def _merge_batch(batch, known, future, store) -> Iterator:
+    computed = iter(future.result() if future is not None else ())
+    for item, result in zip(batch, known):
+        if result is None:
+            result = next(computed)
+            if store is not None:
+                store(item, result)
+        yield result
@@ -1,208 +1,482 @@
 from __future__ import annotations
-from typing import List, Tuple
+from functools import partial
+from itertools import pairwise
+from typing import Iterable, Iterator, List, TextIO, Tuple
+import io
 import re
 
 from .node import Node
+from .compact import CompactMoveTree, NO_NODE, SanTable
 from .line import Line
-from .const import PGN_HEADER_REGEX, PGN_COMMENT_REGEX, PGN_MOVE_NUMBER_REGEX
+from .const import PGN_MOVE_NUMBER_REGEX
+from .lexer import tokenize_movetext
+from .reader import iter_pgn_games
+from .parallel import imap_ordered
+from .dag import PositionDag
+from .cache import GameCache
+from .positions import position_lines
+from .validate import ValidationReport
+from .stats import PipelineStats
+from .opening_tree import OpeningTree
 
 
 def _tokenize(pgn: str) -> List[str]:
-    s = _prep_pgn_for_tokenization(pgn)
-    tokens, buff = [], ""
-    for ch in s:
-        buff, tokens = _tokenize_step(ch, buff, tokens)
-    _tokenize_flush_buffer(buff, tokens)
-    return tokens
-
-
-def _tokenize_step(ch: str, buff: str, tokens: list) -> tuple[str, list]:
-    if _is_parenthesis_character(ch):
-        buff = _tokenize_flush_buffer(buff, tokens)
-        tokens.append(ch)
-        buff = ""
-    elif _is_whitespace_character(ch):
-        buff = _tokenize_flush_buffer(buff, tokens)
-        buff = ""
-    else:
-        buff += ch
-    return buff, tokens
+    """Tokenize PGN text into movetext strings.
 
+    Description
+    -----------
+    Compatibility wrapper around the single-pass lexer in ``lexer.py``.
+    Headers, comments and NAGs are dropped; moves, move numbers, results
+    and parentheses are returned in order.
+    """
+    return tokenize_movetext(pgn)
 
-def _tokenize_flush_buffer(buff: str, tokens: list) -> str:
-    if _contains_non_whitespace_characters(buff):
-        tokens.append(buff.strip())
-    return ""
 
+_MOVE_NUMBER_PATTERN = re.compile(PGN_MOVE_NUMBER_REGEX)
 
-def _is_whitespace_character(ch: str) -> bool:
-    """Check if a character is a whitespace character."""
-    return ch.isspace()
 
+def _is_token_a_move_number(tok: str) -> bool:
+    """Check if a token is a move number."""
+    return _MOVE_NUMBER_PATTERN.match(tok) is not None
 
-def _contains_non_whitespace_characters(buff: str) -> bool:
-    """Check if the buffer contains non-whitespace characters."""
-    return buff.strip() != ""
 
+def _is_token_a_game_result(tok: str) -> bool:
+    """Check if a token is a game result (e.g. a white win, black win, draw, or ongoing)."""
+    return tok in ("1-0", "0-1", "1/2-1/2", "*")
 
-def _is_parenthesis_character(ch: str) -> bool:
-    """Check if a character is a parenthesis character."""
-    return ch in "()"
 
+def _parse_moves(
+    tokens: List[str], i: int = 0, max_plies: int | None = None
+) -> Tuple[Node, int]:
+    """Parse a list of tokens into a tree of moves.
 
-def _prep_pgn_for_tokenization(pgn: str) -> str:
-    """Prepare PGN for tokenization by normalizing whitespace."""
-    s = pgn
-    s = _remove_headers_from_pgn(s)
-    s = _remove_comments_from_pgn(s)
-    s = _remove_semicolon_comments_from_pgn(s)
-    s = _remove_numeric_annotation_glyphs_from_pgn(s)
-    return s
+    Description
+    -----------
+    This function takes a list of tokens representing moves in a chess game
+    and organizes them into a tree structure, where each node represents a
+    move and its variations.
+
+    The tree is built in one linear pass with an explicit anchor stack
+    instead of recursion, so arbitrarily deep nesting cannot hit the
+    recursion limit. Only the last move and its parent are tracked per
+    open variation: a ``(`` pushes them and anchors the variation's moves
+    on the parent of the last move, and the matching ``)`` pops them.
+    Parsing stops after an unmatched ``)``; the returned index points just
+    past it (or at the end of ``tokens``).
+
+    With ``max_plies``, moves deeper than that are skipped without creating
+    nodes (only their depth is tracked, so variations inside them are
+    anchored correctly). The sidelines below a node at the limit therefore
+    all end in that node and become one line, and the tree above the limit
+    is the one built without ``max_plies``.
+    """
+    root = Node(None)
+    prev, cur = None, root
+    # Plies from the root to ``cur``; beyond ``max_plies`` ``cur`` stays on
+    # the deepest kept node while ``depth`` keeps counting.
+    depth = 0
+    limit = max_plies
+    anchors: List[Tuple[Node | None, Node, int]] = []
+    n = len(tokens)
+    while i < n:
+        tok = tokens[i]
+        i += 1
+        if tok == "(":
+            anchors.append((prev, cur, depth))
+            if prev is not None:
+                cur, depth = prev, depth - 1
+            prev = None
+        elif tok == ")":
+            if not anchors:
+                break
+            prev, cur, depth = anchors.pop()
+        elif _is_token_a_move_number(tok) or _is_token_a_game_result(tok):
+            continue
+        elif limit is not None and depth >= limit:
+            prev = cur
+            depth += 1
+        else:
+            node = Node(tok)
+            cur.children.append(node)
+            prev, cur = cur, node
+            depth += 1
+    return root, i
 
 
-def _remove_numeric_annotation_glyphs_from_pgn(s: str) -> str:
-    """Remove numeric annotation glyphs from PGN.
+def _parse_moves_compact(
+    tokens: List[str], sans: SanTable | None = None, max_plies: int | None = None
+) -> CompactMoveTree:
+    """Parse a list of tokens straight into a ``CompactMoveTree``.
 
     Description
     -----------
-    Numeric annotation glyphs (e.g., $1, $2) are used in PGN to indicate
-    variations or alternative moves. This function removes them from the
-    PGN string.
+    Builds the same tree as ``_parse_moves`` in one linear pass. For each
+    open variation only the last move and its parent are kept; a ``(``
+    anchors its moves on the parent of the last move played. ``max_plies``
+    skips moves as in ``_parse_moves``.
     """
-    return re.sub(r"\$\d+", " ", s)
+    tree = CompactMoveTree(sans)
+    prev, cur = NO_NODE, CompactMoveTree.ROOT
+    depth = 0
+    limit = max_plies
+    frames: List[Tuple[int, int, int]] = []
+    for tok in tokens:
+        if tok == "(":
+            frames.append((prev, cur, depth))
+            if prev != NO_NODE:
+                cur, depth = prev, depth - 1
+            prev = NO_NODE
+        elif tok == ")":
+            if not frames:
+                break
+            prev, cur, depth = frames.pop()
+        elif _is_token_a_move_number(tok) or _is_token_a_game_result(tok):
+            continue
+        elif limit is not None and depth >= limit:
+            prev = cur
+            depth += 1
+        else:
+            prev, cur = cur, tree.add_child(cur, tok)
+            depth += 1
+    return tree
+
+
+def _extract_lines_dfs(node: Node, prefix: List[str], out: List[List[str]]):
+    """Collect every root-to-leaf line below ``node`` into ``out``."""
+    out.extend(_iter_lines_dfs(node, prefix))
 
 
-def _remove_semicolon_comments_from_pgn(s: str) -> str:
-    """Remove semicolon comments from PGN.
+def _iter_lines_dfs(node: Node, prefix: List[str] | None = None) -> Iterator[List[str]]:
+    """Iterative, cycle-safe DFS yielding each root-to-leaf line of a move tree.
 
     Description
     -----------
-    Semicolon comments (e.g., ; this is a comment) are used in PGN to
-    provide commentary on the game. This function removes them from the
-    PGN string.
+    A single mutable ``path`` is extended as the walk descends and truncated
+    in place when it backtracks, and it is copied only when a leaf is
+    reached. Extracting L lines of depth D therefore costs O(L*D) instead of
+    copying the path at every node, and an explicit stack of child iterators
+    replaces recursion so arbitrarily deep mainlines cannot hit the
+    recursion limit. Nodes already visited (cycles) are skipped.
     """
-    return re.sub(r";[^\n]*", " ", s)
+    path = list(prefix or [])
+    visited = {id(node)}
+    if node.san is not None:
+        path.append(node.san)
+    if not node.children:
+        if path:
+            yield path
+        return
+    # Each frame holds a child iterator and the path length at its parent,
+    # so moving on to the next sibling truncates the path back in place.
+    stack = [(iter(node.children), len(path))]
+    while stack:
+        children, depth = stack[-1]
+        child = next(children, None)
+        if child is None:
+            stack.pop()
+            continue
+        del path[depth:]
+        # Follow single-child chains (the common case) without a new frame.
+        while True:
+            if id(child) in visited:
+                child = None
+                break
+            visited.add(id(child))
+            if child.san is not None:
+                path.append(child.san)
+            grandchildren = child.children
+            if len(grandchildren) != 1:
+                break
+            child = grandchildren[0]
+        if child is None:
+            continue
+        if grandchildren:
+            stack.append((iter(grandchildren), len(path)))
+        elif path:
+            yield path.copy()
 
 
-def _remove_comments_from_pgn(s: str) -> str:
-    """Remove comments from PGN.
+def _game_to_seqs(
+    game: str, max_plies: int | None = None, compact: bool = False
+) -> List[List[str]]:
+    """Tokenize one game, build its move tree and extract every line.
 
     Description
     -----------
-    Comments (e.g., { this is a comment }) are used in PGN to provide
-    commentary on the game. This function removes them from the
-    PGN string.
+    With ``compact=True`` the tree is built as a ``CompactMoveTree`` instead
+    of ``Node`` objects, which uses far less memory for very large games.
+    The tree is built only ``max_plies`` deep, so its lines are already
+    truncated and distinct.
     """
-    return re.sub(PGN_COMMENT_REGEX, " ", s)
+    tokens = _tokenize(game)
+    tree = _build_tree(tokens, compact, max_plies)
+    return _tree_seqs(tree)
+
+
+def _build_tree(
+    tokens: List[str], compact: bool = False, max_plies: int | None = None
+) -> Node | CompactMoveTree:
+    if compact:
+        return _parse_moves_compact(tokens, max_plies=max_plies)
+    root, _ = _parse_moves(tokens, 0, max_plies)
+    return root
+
+
+def _tree_seqs(tree: Node | CompactMoveTree) -> List[List[str]]:
+    if isinstance(tree, CompactMoveTree):
+        return list(tree.iter_lines())
+    return list(_iter_lines_dfs(tree))
+
+
+def _count_tree_nodes(tree: Node | CompactMoveTree) -> int:
+    if isinstance(tree, CompactMoveTree):
+        return len(tree) - 1
+    n_nodes, stack = 0, [tree]
+    while stack:
+        children = stack.pop().children
+        n_nodes += len(children)
+        stack.extend(children)
+    return n_nodes
+
+
+def _game_to_seqs_with_stats(
+    game: str,
+    stats: PipelineStats,
+    max_plies: int | None = None,
+    compact: bool = False,
+) -> List[List[str]]:
+    """``_game_to_seqs`` with each step charged to its own stage in ``stats``."""
+    with stats.stage("tokenize"):
+        tokens = _tokenize(game)
+    stats.count("tokenize", "tokens", len(tokens))
+    with stats.stage("tree"):
+        tree = _build_tree(tokens, compact, max_plies)
+    stats.count("tree", "nodes", _count_tree_nodes(tree))
+    with stats.stage("dfs"):
+        seqs = _tree_seqs(tree)
+    stats.count("dfs", "lines", len(seqs))
+    return seqs
+
+
+def _iter_lines_from_game_seqs(
+    game_seqs: Iterable[List[List[str]]],
+    title: str | None = None,
+    start: int | str | None = None,
+    titles: Iterator[str] | None = None,
+) -> Iterator[Line]:
+    """Number the lines of consecutive games as ``"{title} #{n}"``.
 
+    Description
+    -----------
+    With ``start`` set, each line begins at a later position instead of the
+    initial one (see ``positions.position_lines``): the line keeps only the
+    moves after that point and carries the FEN of where it starts.
 
-def _remove_headers_from_pgn(s: str) -> str:
-    """Remove headers from PGN.
+    ``titles``, if given, yields one title per group in ``game_seqs`` that
+    replaces ``title``; numbering restarts at 1 whenever it changes.
+    """
+    base_title = title or "Repertoire Line"
+    line_idx = 1
+    for seqs in game_seqs:
+        if titles is not None:
+            game_title = next(titles)
+            if game_title != base_title:
+                base_title, line_idx = game_title, 1
+        if start is None:
+            positioned = ((None, seq) for seq in seqs)
+        else:
+            positioned = position_lines(seqs, start)
+        for fen, seq in positioned:
+            yield Line(title=f"{base_title} #{line_idx}", san_seq=seq, fen=fen)
+            line_idx += 1
+
+
+def _iter_game_seqs(
+    games: Iterable[str],
+    max_plies: int | None = None,
+    jobs: int = 1,
+    compact: bool = False,
+    cache: GameCache | None = None,
+    stats: PipelineStats | None = None,
+) -> Iterator[List[List[str]]]:
+    """Parse games into their line sequences, in input order.
 
     Description
     -----------
-    Headers (e.g., [Event "F/S Return Match"]) are used in PGN to provide
-    metadata about the game. This function removes them from the
-    PGN string.
+    With a ``cache``, games whose movetext was parsed before with the same
+    ``max_plies`` are served from it and only new or edited games are
+    parsed. With ``stats`` and a serial run, tokenizing, tree building and
+    line extraction are timed as separate stages; worker processes cannot
+    report into ``stats``, so with ``jobs > 1`` they are not broken down.
     """
-    return re.sub(PGN_HEADER_REGEX, "", s, flags=re.M)
+    if stats is not None and jobs <= 1:
+        parse = partial(
+            _game_to_seqs_with_stats, max_plies=max_plies, compact=compact, stats=stats
+        )
+    else:
+        parse = partial(_game_to_seqs, max_plies=max_plies, compact=compact)
+    lookup = store = None
+    if cache is not None:
+        salt = f"max_plies={max_plies}"
+        lookup = partial(cache.get, salt=salt)
+        store = partial(cache.put, salt=salt)
+    return imap_ordered(parse, games, jobs, lookup=lookup, store=store)
 
 
-def _is_token_a_move_number(tok: str) -> bool:
-    """Check if a token is a move number."""
-    return re.match(PGN_MOVE_NUMBER_REGEX, tok) is not None
+def _seqs_to_tree(seqs: Iterable[List[str]]) -> Node:
+    """Rebuild a move tree (a trie of SAN moves) from a game's lines."""
+    root = Node(None)
+    for seq in seqs:
+        node = root
+        for san in seq:
+            child = next((ch for ch in node.children if ch.san == san), None)
+            if child is None:
+                child = Node(san)
+                node.children.append(child)
+            node = child
+    return root
+
+
+def _iter_dag_game_seqs(
+    games: Iterable[str],
+    max_plies: int | None = None,
+    validation: ValidationReport | None = None,
+) -> Iterator[List[List[str]]]:
+    """Merge all games into a ``PositionDag`` and yield its lines as one group.
 
+    Description
+    -----------
+    With ``validation``, each game's lines are checked first and a game
+    with illegal moves is merged without them.
+    """
+    dag = PositionDag()
+    for game in games:
+        root, _ = _parse_moves(_tokenize(game), 0, max_plies)
+        if validation is not None:
+            seqs = list(_iter_lines_dfs(root))
+            n_errors = len(validation.errors)
+            valid = validation.check_game(seqs)
+            if len(validation.errors) != n_errors:
+                root = _seqs_to_tree(valid)
+        dag.add_tree(root, max_plies)
+    yield list(dag.iter_lines())
 
-def _is_token_a_game_result(tok: str) -> bool:
-    """Check if a token is a game result (e.g. a white win, black win, draw, or ongoing)."""
-    return tok in ("1-0", "0-1", "1/2-1/2", "*")
 
-
-def _parse_moves(tokens: List[str], i: int = 0) -> Tuple[Node, int]:
-    """Parse a list of tokens into a tree of moves.
+def _drop_prefix_seqs(seqs: List[List[str]]) -> List[List[str]]:
+    """Remove repeated lines and lines that are a strict prefix of another.
 
     Description
     -----------
-    This function takes a list of tokens representing moves in a chess game
-    and organizes them into a tree structure, where each node represents a
-    move and its variations.
+    After sorting, a line's extensions and duplicates sort directly after
+    it, so one pass over neighbours finds every redundant line. The first
+    occurrence of a repeated line is kept and input order is preserved.
     """
-    root = Node(None)
-    cur_parent_stack = [root]
+    order = sorted(range(len(seqs)), key=seqs.__getitem__)
+    dropped = set()
+    for prev, cur in pairwise(order):
+        if seqs[cur] == seqs[prev]:
+            dropped.add(cur)
+        elif seqs[cur][: len(seqs[prev])] == seqs[prev]:
+            dropped.add(prev)
+    kept = [seq for idx, seq in enumerate(seqs) if idx not in dropped]
+    return kept
 
-    def add_move(san: str):
-        parent = cur_parent_stack[-1]
-        node = Node(san)
-        parent.children.append(node)
-        cur_parent_stack.append(node)
 
-    n = len(tokens)
-    while i < n:
-        tok = tokens[i]
-        if tok == "(":
-            anchor = (
-                cur_parent_stack[-2]
-                if len(cur_parent_stack) > 1
-                else cur_parent_stack[-1]
-            )
-            var_root, j = _parse_moves(tokens, i + 1)
-            anchor.children.extend(var_root.children)
-            i = j
-            continue
-        elif tok == ")":
-            return root, i + 1
-        elif _is_token_a_move_number(tok) or _is_token_a_game_result(tok):
-            i += 1
-            continue
-        else:
-            add_move(tok)
-            i += 1
-            continue
-    return root, i
+def _iter_prefix_free_game_seqs(
+    game_seqs: Iterable[List[List[str]]],
+) -> Iterator[List[List[str]]]:
+    yield _drop_prefix_seqs([seq for seqs in game_seqs for seq in seqs])
 
 
-def _extract_lines_dfs(node: Node, prefix: List[str], out: List[List[str]]):
-    """Thin wrapper for cycle-safe DFS extraction."""
-    _extract_lines_dfs_safe(node, prefix, out, visited=set())
+def _timed(stats: PipelineStats | None, name: str, items: Iterable, key: str):
+    return items if stats is None else stats.wrap(name, items, key)
 
 
-def _extract_lines_dfs_safe(
-    node: Node, prefix: List[str], out: List[List[str]], visited: set
-):
-    """Cycle-safe DFS for extracting lines from move tree."""
-    node_id = id(node)
-    if node_id in visited:
-        # Cycle detected, break recursion
-        return
-    visited.add(node_id)
-    if node.san is not None:
-        prefix = prefix + [node.san]
-    if not node.children:
-        if prefix:
-            out.append(prefix)
-        return
-    for ch in node.children:
-        _extract_lines_dfs_safe(ch, prefix, out, visited)
+def iter_lines(fp: TextIO, **options) -> Iterator[Line]:
+    """Lazily parse a PGN text stream into lines.
+
+    Description
+    -----------
+    Games are read from ``fp`` one at a time; see ``iter_game_lines`` for
+    the ``options``.
+    """
+    return iter_game_lines(iter_pgn_games(fp), **options)
+
+
+def iter_game_lines(
+    games: Iterable[str],
+    max_plies: int | None = None,
+    title: str | None = None,
+    jobs: int = 1,
+    compact: bool = False,
+    transpositions: bool = False,
+    drop_prefixes: bool = False,
+    cache: GameCache | None = None,
+    start: int | str | None = None,
+    validation: ValidationReport | None = None,
+    stats: PipelineStats | None = None,
+    opening_tree: OpeningTree | None = None,
+    titles: Iterable[str] | None = None,
+) -> Iterator[Line]:
+    """Lazily parse PGN games into lines.
+
+    Description
+    -----------
+    ``games`` yields one game's PGN text at a time (headers optional), e.g.
+    ``reader.iter_pgn_games`` or ``reader.iter_pgn_games_mmap``. Lines are
+    yielded as soon as their game is parsed, so a consumer such as
+    ``emit_csv`` can write rows while the rest of the input is still
+    unread. With ``jobs > 1`` games
+    are parsed in a process pool; lines and titles are identical to a
+    serial run. ``compact`` selects the array-backed move tree. A ``cache``
+    reuses the lines of games that did not change since an earlier run.
+    ``start`` (a ply number or ``"branch"``) makes lines begin at a later
+    position with a real start FEN. With a ``validation`` report every move
+    is checked against the rules; illegal lines are recorded there and left
+    out of the output.
+
+    With ``transpositions`` all games are merged into one position-keyed
+    DAG and one line is emitted per unique leaf position. With
+    ``drop_prefixes`` duplicate lines and lines that are a strict prefix of
+    another line are removed. Both need every game before the first line
+    can be produced, so they give up streaming. So does ``opening_tree``,
+    which counts the games' lines in an ``OpeningTree`` and emits its most
+    popular lines instead of every game's lines; it is not combined with
+    ``transpositions``.
+
+    ``titles`` yields a title for each game, in step with ``games`` (e.g.
+    the name of the file each game came from); each game's lines are
+    titled with it instead of ``title``, numbered from 1 per title. The
+    grouping modes above merge games, so they keep ``title``.
+
+    With ``stats`` every stage is timed into that ``PipelineStats``;
+    without it the stages are chained directly, with no timing calls.
+    """
+    games = _timed(stats, "read", games, "games")
+    if transpositions:
+        game_seqs = _iter_dag_game_seqs(games, max_plies, validation)
+        game_seqs = _timed(stats, "dag", game_seqs, "groups")
+    else:
+        game_seqs = _iter_game_seqs(games, max_plies, jobs, compact, cache, stats)
+        game_seqs = _timed(stats, "parse", game_seqs, "games")
+        if validation is not None:
+            game_seqs = validation.iter_checked(game_seqs)
+            game_seqs = _timed(stats, "validate", game_seqs, "games")
+        if opening_tree is not None:
+            game_seqs = opening_tree.add_games(game_seqs)
+            game_seqs = _timed(stats, "aggregate", game_seqs, "groups")
+    if drop_prefixes:
+        game_seqs = _iter_prefix_free_game_seqs(game_seqs)
+        game_seqs = _timed(stats, "prefixes", game_seqs, "groups")
+    if transpositions or drop_prefixes or opening_tree is not None:
+        titles = None
+    if titles is not None:
+        titles = iter(titles)
+    lines = _iter_lines_from_game_seqs(game_seqs, title, start, titles)
+    return _timed(stats, "lines", lines, "lines")
 
 
 def parse_pgn_to_lines(
     pgn_text: str, max_plies: int | None = None, title: str | None = None
 ) -> List[Line]:
-    # Split PGN into games by header lines
-    games = re.split(r"(?=\[Event )", pgn_text)
-    all_lines: List[Line] = []
-    base_title = title or "Repertoire Line"
-    game_idx = 1
-    for game in games:
-        game = game.strip()
-        if not game:
-            continue
-        tokens = _tokenize(game)
-        root, _ = _parse_moves(tokens, 0)
-        seqs: List[List[str]] = []
-        _extract_lines_dfs(root, [], seqs)
-        for seq in seqs:
-            s = seq if max_plies is None else seq[:max_plies]
-            all_lines.append(Line(title=f"{base_title} #{game_idx}", san_seq=s))
-            game_idx += 1
-    return all_lines
+    return list(iter_lines(io.StringIO(pgn_text), max_plies=max_plies, title=title))
@@ -0,0 +1,126 @@
+from __future__ import annotations
+from typing import List, Tuple
+import base64
+import struct
+
+from .const import STARTING_FEN
+from .lazy import lazy_import
+from .line import Line
+from .positions import PathBoard, _common_prefix_length
+
+chess = lazy_import("chess")
+
+# Note field holding the encoded data, after the ``CSV_HEADER`` fields.
+PLY_DATA_FIELD = "PLY_DATA"
+
+PLY_DATA_VERSION = 1
+
+# Header flag: a legal-move table follows the moves.
+PLY_DATA_LEGAL_MOVES = 1
+
+_HEADER = struct.Struct("<BBH")
+
+
+def encode_move(move: chess.Move) -> int:
+    """Pack a move as ``from | to << 6 | promotion << 12`` (python-chess values)."""
+    return move.from_square | move.to_square << 6 | (move.promotion or 0) << 12
+
+
+def decode_move(code: int) -> str:
+    """UCI string of a move packed by ``encode_move``."""
+    promotion = code >> 12
+    return chess.Move(code & 63, code >> 6 & 63, promotion or None).uci()
+
+
+class PlyDataBuilder:
+    """Precompute what the review card needs for every ply of a line.
+
+    Description
+    -----------
+    For a line of ``n`` moves the data is, little-endian: a header (version,
+    flags, ``n`` as u16), the ``n`` moves packed by ``encode_move`` as u16,
+    optionally (``legal_moves``) for each of the ``n`` positions a move is
+    played from a u8 count followed by its legal moves as u16, and last the
+    ``n + 1`` FENs from the start position on, newline-separated. The card
+    script then checks and plays moves with lookups instead of generating
+    moves itself.
+
+    Lines are replayed on one ``PathBoard`` and the per-node results are
+    kept along the current path, so consecutive lines with a common start
+    share the work for their common prefix, as in ``iter_start_fens``.
+    """
+
+    def __init__(self, legal_moves: bool = False):
+        self.legal_moves = legal_moves
+        self._start: str | None = None
+        self._board: PathBoard | None = None
+        # (move code, FEN, legal-move table) for each depth of the path.
+        self._nodes: List[Tuple[int, str, bytes]] = []
+
+    def _node(self, board: chess.Board, move_code: int) -> Tuple[int, str, bytes]:
+        legal = b""
+        if self.legal_moves:
+            codes = [encode_move(move) for move in board.legal_moves]
+            legal = struct.pack(f"<B{len(codes)}H", len(codes), *codes)
+        return move_code, board.fen(), legal
+
+    def ply_data(self, line: Line) -> bytes:
+        """Packed data for ``line``; raises ``ValueError`` on an illegal move."""
+        start = line.fen or STARTING_FEN
+        board = self._board
+        if board is None or start != self._start:
+            self._start = start
+            board = self._board = PathBoard(start)
+            self._nodes = [self._node(board.board, 0)]
+        seq = line.san_seq
+        common = _common_prefix_length(board.path, seq)
+        board.goto(seq[:common])
+        del self._nodes[common + 1 :]
+        for san in seq[common:]:
+            move_code = encode_move(board.push(san))
+            self._nodes.append(self._node(board.board, move_code))
+        nodes = self._nodes
+        n = len(seq)
+        parts = [
+            _HEADER.pack(
+                PLY_DATA_VERSION, PLY_DATA_LEGAL_MOVES if self.legal_moves else 0, n
+            ),
+            struct.pack(f"<{n}H", *(node[0] for node in nodes[1:])),
+        ]
+        if self.legal_moves:
+            parts.extend(node[2] for node in nodes[:-1])
+        parts.append("\n".join(node[1] for node in nodes).encode("ascii"))
+        return b"".join(parts)
+
+    def encode(self, line: Line) -> str:
+        """Base64 field value for ``line``, or "" if it has an illegal move.
+
+        Description
+        -----------
+        The card falls back to replaying the SAN moves when the field is
+        empty.
+        """
+        try:
+            return base64.b64encode(self.ply_data(line)).decode("ascii")
+        except ValueError:
+            self._board = None
+            return ""
+
+
+def decode_ply_data(value: str) -> Tuple[List[str], List[str], List[List[str]] | None]:
+    """Return ``(uci_moves, fens, legal_moves)`` from an encoded field value."""
+    data = base64.b64decode(value)
+    _, flags, n = _HEADER.unpack_from(data)
+    offset = _HEADER.size
+    moves = [decode_move(code) for code in struct.unpack_from(f"<{n}H", data, offset)]
+    offset += 2 * n
+    legal = None
+    if flags & PLY_DATA_LEGAL_MOVES:
+        legal = []
+        for _ in range(n):
+            count = data[offset]
+            codes = struct.unpack_from(f"<{count}H", data, offset + 1)
+            legal.append([decode_move(code) for code in codes])
+            offset += 1 + 2 * count
+    fens = data[offset:].decode("ascii").split("\n")
+    return moves, fens, legal
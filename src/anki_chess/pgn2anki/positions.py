@@ -0,0 +1,130 @@
+from __future__ import annotations
+from typing import Dict, Iterator, List, Tuple
+
+from .lazy import lazy_import
+from .san import strip_san_annotations
+
+chess = lazy_import("chess")
+
+# ``start`` value meaning "begin each line where it leaves the lines next to it".
+START_AT_BRANCH = "branch"
+
+
+def _common_prefix_length(a: List[str], b: List[str]) -> int:
+    n = min(len(a), len(b))
+    i = 0
+    while i < n and a[i] == b[i]:
+        i += 1
+    return i
+
+
+def start_plies_for_lines(seqs: List[List[str]], start: int | str) -> List[int]:
+    """Pick the ply each line of one game should start from.
+
+    Description
+    -----------
+    ``start`` is either a ply number or ``START_AT_BRANCH``. For a ply
+    number, lines start after that many plies. For ``START_AT_BRANCH``,
+    a line starts after the longest prefix it shares with the line before
+    or after it. In DFS order that is the deepest branch point on its path.
+    Every line keeps at least its last move to guess.
+    """
+    if start == START_AT_BRANCH:
+        shared = [0] * len(seqs)
+        for i in range(1, len(seqs)):
+            n = _common_prefix_length(seqs[i - 1], seqs[i])
+            shared[i - 1] = max(shared[i - 1], n)
+            shared[i] = n
+    else:
+        shared = [int(start)] * len(seqs)
+    return [max(0, min(n, len(seq) - 1)) for n, seq in zip(shared, seqs)]
+
+
+class PathBoard:
+    """A board that follows a path of SAN moves from the initial position.
+
+    Description
+    -----------
+    ``goto(sans)`` pops back to the prefix shared with the current path and
+    pushes only the new moves. Walking lines in DFS order therefore parses
+    each tree node's SAN once instead of once per line. ``memo`` holds
+    FENs keyed by depth along the current path; entries deeper than the
+    shared prefix are discarded when the path changes. Paths start from
+    ``fen`` when given.
+    """
+
+    __slots__ = ("board", "memo", "path")
+
+    def __init__(self, fen: str | None = None):
+        self.board = chess.Board() if fen is None else chess.Board(fen)
+        self.path: List[str] = []
+        self.memo: Dict[int, str] = {}
+
+    def goto(self, sans: List[str]) -> None:
+        """Move to the position after ``sans``.
+
+        Description
+        -----------
+        Raises ``ValueError`` (from python-chess) on an illegal or malformed
+        move; the board is then left after the last legal move, so
+        ``len(self.path)`` is the index of the offending move in ``sans``.
+        """
+        path, board, memo = self.path, self.board, self.memo
+        common = _common_prefix_length(path, sans)
+        while len(path) > common:
+            memo.pop(len(path), None)
+            path.pop()
+            board.pop()
+        for san in sans[common:]:
+            self.push(san)
+
+    def push(self, san: str) -> chess.Move:
+        """Play ``san`` from the current position and return its move."""
+        move = self.board.push_san(strip_san_annotations(san))
+        self.path.append(san)
+        return move
+
+    def fen(self) -> str:
+        """FEN of the current position, memoized for this node of the path."""
+        depth = len(self.path)
+        fen = self.memo.get(depth)
+        if fen is None:
+            fen = self.memo[depth] = self.board.fen()
+        return fen
+
+
+def iter_start_fens(
+    seqs: List[List[str]], start_plies: List[int]
+) -> Iterator[str | None]:
+    """Yield the FEN after ``start_plies[i]`` moves of ``seqs[i]``.
+
+    Description
+    -----------
+    Replays the lines in order on one ``PathBoard``, so lines sharing a
+    prefix share its replay and lines starting from the same node share
+    one FEN. A line with an illegal or malformed move before its start
+    yields None; the following lines are unaffected.
+    """
+    board = PathBoard()
+    for seq, ply in zip(seqs, start_plies):
+        try:
+            board.goto(seq[:ply])
+        except ValueError:
+            yield None
+            continue
+        yield board.fen()
+
+
+def position_lines(
+    seqs: List[List[str]], start: int | str
+) -> Iterator[Tuple[str | None, List[str]]]:
+    """Yield ``(start_fen, remaining_moves)`` for each line of one game.
+
+    Description
+    -----------
+    A line that cannot be replayed up to its start keeps all its moves and
+    a None FEN, i.e. it starts from the initial position.
+    """
+    start_plies = start_plies_for_lines(seqs, start)
+    for seq, ply, fen in zip(seqs, start_plies, iter_start_fens(seqs, start_plies)):
+        yield fen, seq if fen is None else seq[ply:]
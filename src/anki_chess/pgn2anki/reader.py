@@ -0,0 +1,226 @@
+from __future__ import annotations
+from collections import deque
+from itertools import chain, islice
+from typing import Callable, Iterable, Iterator, List, TextIO, Tuple
+import io
+import mmap
+import os
+import re
+
+from .compression import ThreadedDecompressor, detect_compression
+from .lazy import lazy_import
+
+futures = lazy_import("concurrent.futures")
+
+# Text-mode read buffer for PGN inputs. Large enough that a multi-gigabyte
+# file is read in a few thousand syscalls, small enough to stay irrelevant
+# next to the size of a single game's lines.
+PGN_READ_BUFFER_SIZE = 1 << 20
+
+# With several input files, this many are read ahead of the parser by
+# PGN_READ_THREADS threads, so opening and decoding the next chapters
+# overlaps with parsing the current one.
+PGN_READ_AHEAD_FILES = 16
+PGN_READ_THREADS = 4
+
+# Files larger than this are not read ahead but streamed like a single
+# input, so one big database among the inputs does not land in memory.
+PGN_READ_AHEAD_MAX_BYTES = 8 << 20
+
+PGN_GAME_START = "[Event "
+
+# Leading run of tag-pair lines (and blank lines between them).
+_PGN_HEADER_BLOCK_PATTERN = re.compile(r"(?:[ \t]*(?:\[[^\n]*)?(?:\n|\Z))*")
+_PGN_HEADER_BLOCK_BYTES_PATTERN = re.compile(
+    _PGN_HEADER_BLOCK_PATTERN.pattern.encode("ascii")
+)
+_PGN_GAME_START_BYTES = PGN_GAME_START.encode("ascii")
+_NON_WHITESPACE_BYTES_PATTERN = re.compile(rb"\S")
+
+
+def _is_game_start_line(line: str) -> bool:
+    """Check if a line opens a new game (an ``[Event ...]`` header)."""
+    return line.lstrip().startswith(PGN_GAME_START)
+
+
+def iter_pgn_games(fp: Iterable[str]) -> Iterator[str]:
+    """Yield the games of a PGN text stream one at a time.
+
+    Description
+    -----------
+    Reads ``fp`` line by line and cuts a new game at every line starting
+    with an ``[Event `` header. Only the lines of the current game are held
+    in memory, so memory use does not grow with the size of the input.
+    Empty games (blank text between headers) are skipped.
+    """
+    buff: list[str] = []
+    for line in fp:
+        # Cheap first-character test keeps the common movetext line fast.
+        if buff and line[:1] in "[ \t" and _is_game_start_line(line):
+            game = "".join(buff).strip()
+            if game:
+                yield game
+            buff = []
+        buff.append(line)
+    game = "".join(buff).strip()
+    if game:
+        yield game
+
+
+def split_headers(game: str) -> Tuple[str, str]:
+    """Split a game into its leading header block and its movetext."""
+    m = _PGN_HEADER_BLOCK_PATTERN.match(game)
+    # The pattern matches the empty string, so it matches every game.
+    assert m is not None
+    return game[: m.end()], game[m.end() :]
+
+
+def _iter_game_start_offsets(buf) -> Iterator[int]:
+    """Offsets of the lines in ``buf`` that open a game.
+
+    Description
+    -----------
+    Same rule as ``_is_game_start_line``: ``[Event `` preceded on its line
+    by whitespace only. Candidates are found with ``find`` on the raw bytes,
+    so nothing is decoded.
+    """
+    pos = buf.find(_PGN_GAME_START_BYTES)
+    while pos != -1:
+        line_start = buf.rfind(b"\n", 0, pos) + 1
+        if not buf[line_start:pos].strip():
+            yield line_start
+        pos = buf.find(_PGN_GAME_START_BYTES, pos + 1)
+
+
+def iter_pgn_game_spans(buf) -> Iterator[Tuple[int, int, int]]:
+    """Yield ``(start, movetext_start, end)`` byte offsets for each game.
+
+    Description
+    -----------
+    ``buf`` is any bytes-like object supporting ``find`` (e.g. an ``mmap``).
+    Games are cut where ``iter_pgn_games`` cuts them; ``buf[start:end]`` is
+    the whole game and ``buf[movetext_start:end]`` its movetext. Blank
+    spans are skipped. Offsets are found without copying or decoding.
+    """
+    start = 0
+    for end in chain(_iter_game_start_offsets(buf), (len(buf),)):
+        if _NON_WHITESPACE_BYTES_PATTERN.search(buf, start, end):
+            m = _PGN_HEADER_BLOCK_BYTES_PATTERN.match(buf, start, end)
+            assert m is not None  # matches the empty string too
+            yield start, m.end(), end
+        start = end
+
+
+def decode_game_span(view: memoryview, start: int, end: int) -> str:
+    text = str(view[start:end], "utf-8").strip()
+    # Match text mode's universal newlines so both readers yield equal games.
+    if "\r" in text:
+        text = text.replace("\r\n", "\n").replace("\r", "\n")
+    return text
+
+
+def iter_pgn_games_mmap(
+    path: str | os.PathLike,
+    headers: bool = False,
+    select: Callable[[str], bool] | None = None,
+) -> Iterator[str]:
+    """Yield the games of a PGN file by memory-mapping it.
+
+    Description
+    -----------
+    Game boundaries are found by searching the mapped bytes, and only the
+    bytes of the game being yielded are decoded, so startup does not depend
+    on the file size and at most one decoded game is held at a time. With
+    ``headers=False`` only the movetext is decoded; header-only games yield
+    an empty string, so game numbering matches ``iter_pgn_games``. With
+    ``headers=True`` the games are the same strings ``iter_pgn_games``
+    yields. ``select``, if given, receives each game's decoded header block
+    and games it rejects are skipped without decoding their movetext;
+    header bytes are not decoded at all when neither option needs them.
+    """
+    with open(path, "rb") as f:
+        if os.fstat(f.fileno()).st_size == 0:
+            return
+        with (
+            mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as buf,
+            memoryview(buf) as view,
+        ):
+            for start, movetext_start, end in iter_pgn_game_spans(buf):
+                if select is not None and not select(
+                    decode_game_span(view, start, movetext_start)
+                ):
+                    continue
+                yield decode_game_span(view, start if headers else movetext_start, end)
+
+
+def open_pgn_text(
+    path: str | os.PathLike, buffering: int = PGN_READ_BUFFER_SIZE
+) -> TextIO:
+    """Open a PGN file as UTF-8 text, decompressing .gz/.bz2/.xz on the fly.
+
+    Description
+    -----------
+    Compressed files are recognised by their leading bytes (or extension)
+    and inflated by a ``ThreadedDecompressor``, so they stream in bounded
+    memory like plain files and never need to be unpacked to disk.
+    """
+    codec = detect_compression(path)
+    if codec is None:
+        return open(path, encoding="utf-8", buffering=buffering)
+    raw = ThreadedDecompressor(path, codec)
+    return io.TextIOWrapper(io.BufferedReader(raw, buffering), encoding="utf-8")
+
+
+def _read_ahead(path: str | os.PathLike) -> str | None:
+    """Whole text of a small file; None for one that should be streamed."""
+    if detect_compression(path) is not None:
+        return None
+    with open(path, encoding="utf-8") as fp:
+        if os.fstat(fp.fileno()).st_size > PGN_READ_AHEAD_MAX_BYTES:
+            return None
+        return fp.read()
+
+
+def _iter_file_games(path: str | os.PathLike, text: str | None) -> Iterator[str]:
+    if text is not None:
+        yield from iter_pgn_games(io.StringIO(text))
+        return
+    with open_pgn_text(path) as fp:
+        yield from iter_pgn_games(fp)
+
+
+def iter_pgn_files(
+    paths: List[str | os.PathLike],
+    threads: int = PGN_READ_THREADS,
+    read_ahead: int = PGN_READ_AHEAD_FILES,
+) -> Iterator[Tuple[str | os.PathLike, Iterator[str]]]:
+    """Yield ``(path, games)`` for each file, in the order of ``paths``.
+
+    Description
+    -----------
+    ``games`` yields the file's games as ``iter_pgn_games`` does and must
+    be consumed before the next file is requested. Small files are read
+    whole by a thread pool that keeps up to ``read_ahead`` files ahead of
+    the consumer; files over ``PGN_READ_AHEAD_MAX_BYTES`` and compressed
+    files are streamed with ``open_pgn_text`` when their turn comes.
+    Reading the next files thus overlaps with parsing the current one,
+    while memory stays bounded by the read-ahead window.
+    """
+    if threads <= 1 or len(paths) <= 1:
+        for path in paths:
+            yield path, _iter_file_games(path, None)
+        return
+    pool = futures.ThreadPoolExecutor(threads, thread_name_prefix="pgn-read")
+    try:
+        pending = deque()
+        remaining = iter(paths)
+        for path in islice(remaining, read_ahead):
+            pending.append((path, pool.submit(_read_ahead, path)))
+        while pending:
+            path, future = pending.popleft()
+            text = future.result()
+            for path_ahead in islice(remaining, 1):
+                pending.append((path_ahead, pool.submit(_read_ahead, path_ahead)))
+            yield path, _iter_file_games(path, text)
+    finally:
+        pool.shutdown(cancel_futures=True)
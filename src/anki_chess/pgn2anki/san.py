@@ -0,0 +1,10 @@
+from __future__ import annotations
+
+# Move-quality suffixes ("!", "?", "!?", ...) that PGN allows after a move
+# but python-chess does not accept as part of SAN.
+SAN_ANNOTATION_CHARS = "!?"
+
+
+def strip_san_annotations(san: str) -> str:
+    """Drop trailing ``!``/``?`` annotations so the move can be parsed."""
+    return san.rstrip(SAN_ANNOTATION_CHARS)
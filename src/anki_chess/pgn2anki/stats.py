@@ -0,0 +1,154 @@
+from __future__ import annotations
+from collections import Counter
+from contextlib import contextmanager
+from dataclasses import dataclass, field
+from typing import Dict, Generator, Iterable, Iterator, List, Tuple, TypeVar
+import json
+import sys
+import time
+
+T = TypeVar("T")
+
+
+@dataclass
+class StageStats:
+    """Exclusive cost of one pipeline stage.
+
+    Description
+    -----------
+    ``wall`` and ``cpu`` are seconds, ``blocks`` is the net change in
+    allocated memory blocks (``sys.getallocatedblocks``) and ``counts``
+    holds the stage's item counts, e.g. games, tokens or bytes.
+    """
+
+    name: str
+    wall: float = 0.0
+    cpu: float = 0.0
+    blocks: int = 0
+    calls: int = 0
+    counts: Counter = field(default_factory=Counter)
+
+
+def _clock() -> Tuple[float, float, int]:
+    return time.perf_counter(), time.process_time(), sys.getallocatedblocks()
+
+
+class PipelineStats:
+    """Per-stage timers for a lazily evaluated pipeline.
+
+    Description
+    -----------
+    Stages nest: pulling a line makes the line stage pull a game from the
+    parse stage, which pulls text from the read stage. Time, CPU and
+    allocations are charged to the innermost active stage only, so each
+    stage reports its own cost and the stages add up to the total. With
+    ``trace=True`` every stage activation is also kept as a Chrome
+    trace-event span (see ``write_trace``).
+
+    Code paths only use this object when it is passed in; without it the
+    pipeline runs with no timing calls at all.
+    """
+
+    def __init__(self, trace: bool = False):
+        self.stages: Dict[str, StageStats] = {}
+        self.events: List[dict] | None = [] if trace else None
+        self._stack: List[Tuple[StageStats, float]] = []
+        self._mark = _clock()
+        self._origin = self._mark[0]
+
+    def _stage(self, name: str) -> StageStats:
+        stage = self.stages.get(name)
+        if stage is None:
+            stage = self.stages[name] = StageStats(name)
+        return stage
+
+    def _charge(self) -> float:
+        now = _clock()
+        if self._stack:
+            stage = self._stack[-1][0]
+            stage.wall += now[0] - self._mark[0]
+            stage.cpu += now[1] - self._mark[1]
+            stage.blocks += now[2] - self._mark[2]
+        self._mark = now
+        return now[0]
+
+    def enter(self, name: str) -> None:
+        start = self._charge()
+        stage = self._stage(name)
+        stage.calls += 1
+        self._stack.append((stage, start))
+
+    def exit(self) -> None:
+        end = self._charge()
+        stage, start = self._stack.pop()
+        if self.events is not None:
+            self.events.append(
+                {
+                    "name": stage.name,
+                    "ph": "X",
+                    "ts": (start - self._origin) * 1e6,
+                    "dur": (end - start) * 1e6,
+                    "pid": 0,
+                    "tid": 0,
+                }
+            )
+
+    @contextmanager
+    def stage(self, name: str) -> Generator[StageStats]:
+        """Charge the enclosed block to stage ``name``."""
+        self.enter(name)
+        try:
+            yield self.stages[name]
+        finally:
+            self.exit()
+
+    def count(self, name: str, key: str, n: int = 1) -> None:
+        self._stage(name).counts[key] += n
+
+    def wrap(self, name: str, items: Iterable[T], key: str = "items") -> Iterator[T]:
+        """Yield from ``items``, charging each ``next()`` to stage ``name``."""
+        stage = self._stage(name)
+        it = iter(items)
+        while True:
+            self.enter(name)
+            try:
+                item = next(it)
+            except StopIteration:
+                return
+            finally:
+                self.exit()
+            stage.counts[key] += 1
+            yield item
+
+    def report(self) -> str:
+        """Format the stages as a table, most expensive first."""
+        stages = sorted(self.stages.values(), key=lambda s: s.wall, reverse=True)
+        rows = [f"{'stage':10s} {'wall s':>8s} {'cpu s':>8s} {'blocks':>10s}  counts"]
+        for s in stages:
+            counts = " ".join(f"{k}={v}" for k, v in s.counts.items())
+            rows.append(
+                f"{s.name:10s} {s.wall:8.3f} {s.cpu:8.3f} {s.blocks:10d}  {counts}"
+            )
+        total_wall = sum(s.wall for s in stages)
+        total_cpu = sum(s.cpu for s in stages)
+        rows.append(f"{'total':10s} {total_wall:8.3f} {total_cpu:8.3f}")
+        return "\n".join(rows)
+
+    def to_json(self) -> str:
+        return json.dumps(
+            {
+                s.name: {
+                    "wall": s.wall,
+                    "cpu": s.cpu,
+                    "blocks": s.blocks,
+                    "calls": s.calls,
+                    "counts": dict(s.counts),
+                }
+                for s in self.stages.values()
+            },
+            indent=2,
+        )
+
+    def write_trace(self, fp) -> None:
+        """Write the recorded spans as Chrome trace-event JSON."""
+        json.dump({"traceEvents": self.events or [], "displayTimeUnit": "ms"}, fp)
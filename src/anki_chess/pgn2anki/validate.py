@@ -0,0 +1,107 @@
+from __future__ import annotations
+from dataclasses import asdict, dataclass, field
+from typing import Iterable, Iterator, List
+import json
+
+from .positions import PathBoard
+
+
+@dataclass
+class MoveError:
+    game: int
+    line: int
+    ply: int
+    token: str
+    message: str
+    source: str | None = None
+
+    def __str__(self) -> str:
+        where = f"game {self.game}, line {self.line}, ply {self.ply}"
+        if self.source is not None:
+            where = f"{self.source}: {where}"
+        return f"{where}: {self.token!r} ({self.message})"
+
+
+@dataclass
+class ValidationReport:
+    """Illegal or malformed moves found while validating games.
+
+    Description
+    -----------
+    ``game`` and ``line`` are 1-based indices of the game in the input and
+    of the line within that game; ``ply`` is the 1-based ply of the bad
+    token. A bad move shared by several lines of a game is reported once.
+
+    ``sources``, if given, yields the name of each checked game's input
+    file, in step with the games; errors then carry it as ``source`` and
+    ``game`` counts from 1 within that file.
+    """
+
+    errors: List[MoveError] = field(default_factory=list)
+    games: int = 0
+    lines: int = 0
+    sources: Iterator[str] | None = field(default=None, repr=False, compare=False)
+    _source: str | None = field(default=None, repr=False, compare=False)
+    _source_games: int = field(default=0, repr=False, compare=False)
+    # Every game starts from the initial position, so one board is kept
+    # across games and consecutive games share their common opening moves.
+    _board: PathBoard = field(default_factory=PathBoard, repr=False, compare=False)
+
+    def check_game(self, seqs: List[List[str]]) -> List[List[str]]:
+        """Validate one game's lines and return only the legal ones.
+
+        Description
+        -----------
+        The lines are replayed in order on one ``PathBoard``, so a prefix
+        shared by several lines is validated once. Lines below a bad move
+        are skipped without replaying them again.
+        """
+        self.games += 1
+        if self.sources is not None:
+            source = next(self.sources)
+            if source != self._source:
+                self._source, self._source_games = source, 0
+        self._source_games += 1
+        board = self._board
+        valid: List[List[str]] = []
+        bad_prefix: List[str] | None = None
+        for line_idx, seq in enumerate(seqs, start=1):
+            self.lines += 1
+            if bad_prefix is not None and seq[: len(bad_prefix)] == bad_prefix:
+                continue
+            try:
+                board.goto(seq)
+            except ValueError as exc:
+                ply = len(board.path)
+                bad_prefix = seq[: ply + 1]
+                self.errors.append(
+                    MoveError(
+                        self._source_games,
+                        line_idx,
+                        ply + 1,
+                        seq[ply],
+                        str(exc),
+                        self._source,
+                    )
+                )
+                continue
+            valid.append(seq)
+        return valid
+
+    def iter_checked(
+        self, game_seqs: Iterable[List[List[str]]]
+    ) -> Iterator[List[List[str]]]:
+        """Pass games through, validating each and dropping illegal lines."""
+        for seqs in game_seqs:
+            yield self.check_game(seqs)
+
+    def to_json(self) -> str:
+        return json.dumps(
+            {
+                "games": self.games,
+                "lines": self.lines,
+                "errors": [asdict(e) for e in self.errors],
+            },
+            indent=2,
+            ensure_ascii=False,
+        )
@@ -0,0 +1,208 @@
+from __future__ import annotations
+from dataclasses import dataclass, field
+from typing import Callable, Dict, Generator, List, Tuple
+import contextlib
+import glob
+import hashlib
+import os
+import pathlib
+import stat
+import sys
+import time
+
+from .cache import GameCache
+
+# Seconds between two scans of the watched directory.
+DEFAULT_WATCH_INTERVAL = 0.25
+
+DEFAULT_WATCH_PATTERN = "*.pgn"
+
+
+class MemoryGameCache:
+    """In-memory stand-in for ``GameCache`` holding one file's parsed games.
+
+    Description
+    -----------
+    Same ``get``/``put`` interface and keys as ``GameCache``, so
+    ``iter_game_lines`` uses it the same way: after an edit only the games
+    whose movetext changed are parsed again. ``commit`` keeps just the
+    entries used since the previous ``commit``, so games deleted from the
+    file do not linger.
+    """
+
+    def __init__(self):
+        self.hits = 0
+        self.misses = 0
+        self._entries: Dict[str, List[List[str]]] = {}
+        self._used: Dict[str, List[List[str]]] = {}
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def get(self, game: str, salt: str = "") -> List[List[str]] | None:
+        key = GameCache.key_for(game, salt)
+        seqs = self._used.get(key)
+        if seqs is None:
+            seqs = self._entries.get(key)
+        if seqs is None:
+            self.misses += 1
+            return None
+        self.hits += 1
+        self._used[key] = seqs
+        return seqs
+
+    def put(self, game: str, seqs: List[List[str]], salt: str = "") -> None:
+        self._used[GameCache.key_for(game, salt)] = seqs
+
+    def commit(self) -> None:
+        self._entries, self._used = self._used, {}
+
+    def rollback(self) -> None:
+        self._used = {}
+
+
+@dataclass
+class WatchedFile:
+    """What a ``Watcher`` remembers about one input file."""
+
+    # (st_mtime_ns, st_size) at the last scan.
+    signature: Tuple[int, int]
+    # Digest of the content the output was last built from.
+    digest: str = ""
+    cache: MemoryGameCache = field(default_factory=MemoryGameCache)
+
+
+@contextlib.contextmanager
+def atomic_output(path: str | pathlib.Path) -> Generator[pathlib.Path]:
+    """Yield a temporary path that replaces ``path`` once the block succeeds.
+
+    Description
+    -----------
+    The temporary file sits next to ``path`` so ``os.replace`` is atomic:
+    readers such as Anki's importer see the old or the new output, never a
+    half-written one. On error the temporary file is removed and ``path``
+    is left alone.
+    """
+    path = pathlib.Path(path)
+    tmp = path.with_name(path.name + ".tmp")
+    try:
+        yield tmp
+        os.replace(tmp, path)
+    finally:
+        with contextlib.suppress(FileNotFoundError):
+            tmp.unlink()
+
+
+def _file_signature(st: os.stat_result) -> Tuple[int, int]:
+    return st.st_mtime_ns, st.st_size
+
+
+class Watcher:
+    """Rebuild per-file outputs when files in a directory change.
+
+    Description
+    -----------
+    ``poll`` stats every file matching ``pattern`` under ``directory``. A
+    file whose modification time or size changed is read, and if its
+    content really differs from the last build, ``rebuild(path, text,
+    cache)`` is called with the file's ``MemoryGameCache``; unchanged files
+    are not read at all. ``remove(path)`` is called for files that
+    disappeared. The caches live as long as the watcher, so a save that
+    edits one game of one chapter costs one file read and one game parse.
+
+    An ``OSError`` or ``ValueError`` from ``rebuild`` is reported on stderr
+    and the file is retried after its next change; the other files are
+    unaffected.
+    """
+
+    def __init__(
+        self,
+        directory: str | pathlib.Path,
+        rebuild: Callable[[pathlib.Path, str, MemoryGameCache], None],
+        remove: Callable[[pathlib.Path], None] | None = None,
+        pattern: str = DEFAULT_WATCH_PATTERN,
+        interval: float = DEFAULT_WATCH_INTERVAL,
+    ):
+        self.directory = pathlib.Path(directory)
+        self.rebuild = rebuild
+        self.remove = remove
+        self.pattern = pattern
+        self.interval = interval
+        # Keyed by path string, as returned by ``_scan``.
+        self.files: Dict[str, WatchedFile] = {}
+
+    def _scan(self) -> Dict[str, Tuple[int, int]]:
+        # Plain strings and one ``os.stat`` per file: with hundreds of files
+        # building ``Path`` objects would cost more than the stat calls.
+        directory = str(self.directory)
+        signatures = {}
+        for name in sorted(glob.glob(self.pattern, root_dir=directory, recursive=True)):
+            path = os.path.join(directory, name)
+            try:
+                st = os.stat(path)
+            except FileNotFoundError:
+                continue
+            if stat.S_ISREG(st.st_mode):
+                signatures[path] = _file_signature(st)
+        return signatures
+
+    def _rebuild(self, path: pathlib.Path, state: WatchedFile) -> bool:
+        data = path.read_bytes()
+        digest = hashlib.blake2b(data, digest_size=16).hexdigest()
+        if digest == state.digest:
+            return False
+        try:
+            self.rebuild(path, data.decode("utf-8"), state.cache)
+        except (OSError, ValueError) as exc:
+            # Unreadable or unwritable files, undecodable text and illegal
+            # moves; anything else is a bug and stops the watcher.
+            state.cache.rollback()
+            state.digest = ""
+            print(f"{path}: {exc}", file=sys.stderr)
+            return False
+        state.cache.commit()
+        state.digest = digest
+        return True
+
+    def poll(self) -> Tuple[List[pathlib.Path], List[pathlib.Path]]:
+        """Scan once; return the files rebuilt and the files removed."""
+        signatures = self._scan()
+        removed = [pathlib.Path(name) for name in self.files if name not in signatures]
+        for path in removed:
+            del self.files[str(path)]
+            if self.remove is not None:
+                self.remove(path)
+        rebuilt = []
+        for name, signature in signatures.items():
+            state = self.files.get(name)
+            if state is not None and state.signature == signature:
+                continue
+            if state is None:
+                state = self.files[name] = WatchedFile(signature)
+            state.signature = signature
+            path = pathlib.Path(name)
+            try:
+                changed = self._rebuild(path, state)
+            except OSError as exc:
+                # Vanished or unreadable mid-save; the next poll sees it again.
+                print(f"{path}: {exc}", file=sys.stderr)
+                del self.files[name]
+                continue
+            if changed:
+                rebuilt.append(path)
+        return rebuilt, removed
+
+    def run(
+        self,
+        on_poll: Callable[[List[pathlib.Path], List[pathlib.Path]], None] | None = None,
+        max_polls: int | None = None,
+    ) -> None:
+        """Poll every ``interval`` seconds until interrupted or ``max_polls``."""
+        n_polls = 0
+        while max_polls is None or n_polls < max_polls:
+            if n_polls:
+                time.sleep(self.interval)
+            rebuilt, removed = self.poll()
+            if on_poll is not None and (rebuilt or removed):
+                on_poll(rebuilt, removed)
+            n_polls += 1
@@ -0,0 +1,96 @@
+import threading
+
+import pytest
+
+from anki_chess.addon.bridge import BridgeMessage, parse_bridge_message
+from anki_chess.addon.controller import MockReviewer, ReviewerController
+from anki_chess.addon.worker import BackgroundWorker
+
+
+@pytest.mark.parametrize(
+    "raw, expected",
+    [
+        ("fail_line", BridgeMessage("fail_line")),
+        (" pass_line\n", BridgeMessage("pass_line")),
+        (
+            '{"cmd":"fail_line","ply":7,"move":"Nf3","expected":"Nc3"}',
+            BridgeMessage("fail_line", ply=7, move="Nf3", expected="Nc3"),
+        ),
+        ('{"cmd":"pass_line","ply":"7","move":5}', BridgeMessage("pass_line")),
+        ("noop", None),
+        ('{"cmd":"noop"}', None),
+        ('{"cmd":', None),
+        ('["fail_line"]', None),
+    ],
+)
+def test_parse_bridge_message(raw, expected):
+    got = parse_bridge_message(raw)
+    assert got == expected, f"Parsing {raw!r}: expected {expected}, got {got}"
+
+
+def test_json_fail_line_answers_card_and_queues_event():
+    reviewer = MockReviewer()
+    events = []
+    threads = []
+
+    def listener(event):
+        threads.append(threading.current_thread())
+        events.append(event)
+
+    worker = BackgroundWorker()
+    controller = ReviewerController(reviewer, worker, [listener])
+    status = controller.handle_command('{"cmd":"fail_line","ply":7,"move":"Nf3"}')
+    assert status == "failed", f"Expected 'failed', got {status}"
+    assert reviewer.actions == [("answer", 1)], f"Unexpected {reviewer.actions}"
+    worker.join()
+    worker.stop()
+    assert len(events) == 1, f"Expected one event, got {events}"
+    event = events[0]
+    assert (event.card_id, event.message.ply, event.message.move) == (42, 7, "Nf3")
+    assert threads[0] is not threading.current_thread(), "Listener ran inline"
+
+
+def test_slow_listener_does_not_delay_answer():
+    reviewer = MockReviewer()
+    release = threading.Event()
+    worker = BackgroundWorker()
+    controller = ReviewerController(reviewer, worker, [lambda event: release.wait()])
+    assert controller.handle_command("pass_line") == "passed"
+    assert reviewer.actions == [("answer", 3)], "Card not answered before listener ran"
+    release.set()
+    worker.stop()
+
+
+def test_ignored_command_dispatches_nothing():
+    events = []
+    controller = ReviewerController(MockReviewer(), listeners=[events.append])
+    assert controller.handle_command('{"cmd":"noop"}') == "ignored"
+    assert events == [], f"Unexpected events {events}"
+
+
+def _fail_to_write():
+    raise OSError("disk full")
+
+
+def test_worker_survives_failing_jobs():
+    worker = BackgroundWorker()
+    done = []
+    worker.submit(_fail_to_write)
+    worker.submit(done.append, "ok")
+    worker.stop()
+    assert done == ["ok"], "Job after a failing one did not run"
+    assert len(worker.errors) == 1, f"Expected one error, got {worker.errors}"
+
+
+def test_worker_runs_remaining_jobs_after_unexpected_error(monkeypatch):
+    crashed = threading.Event()
+    monkeypatch.setattr(threading, "excepthook", lambda args: crashed.set())
+    worker = BackgroundWorker()
+    done = []
+    worker.submit(lambda: 1 / 0)
+    worker.submit(done.append, "ok")
+    worker.join()
+    worker.stop()
+    assert done == ["ok"], "Job after a crashing one did not run"
+    assert crashed.wait(5), "the crash was not reported"
+    assert worker.errors == [], f"Unexpected errors {worker.errors}"
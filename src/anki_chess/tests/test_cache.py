@@ -0,0 +1,79 @@
+import io
+import pytest
+from anki_chess import cli
+from anki_chess.pgn2anki import parser
+from anki_chess.pgn2anki.cache import GameCache
+
+GAME = '[Event "A"]\n[Date "2024.01.01"]\n\n1. e4 e5 (1... c5) 2. Nf3 *'
+PGN = GAME + '\n\n[Event "B"]\n\n1. d4 d5 *\n'
+
+
+@pytest.fixture
+def cache(tmp_path):
+    with GameCache(tmp_path / "cache") as c:
+        yield c
+
+
+def test_get_misses_until_put(cache):
+    assert cache.get(GAME) is None
+    cache.put(GAME, [["e4", "e5"]])
+    assert cache.get(GAME) == [["e4", "e5"]]
+    assert (cache.hits, cache.misses) == (1, 1)
+
+
+def test_key_ignores_headers_but_not_movetext():
+    edited_header = GAME.replace("2024.01.01", "2025.02.02")
+    edited_moves = GAME.replace("Nf3", "Nc3")
+    assert GameCache.key_for(edited_header) == GameCache.key_for(GAME)
+    assert GameCache.key_for(edited_moves) != GameCache.key_for(GAME)
+
+
+def test_salt_separates_entries(cache):
+    cache.put(GAME, [["e4"]], salt="max_plies=1")
+    assert cache.get(GAME, salt="max_plies=None") is None
+
+
+def test_entries_persist_across_instances(tmp_path):
+    with GameCache(tmp_path) as first:
+        first.put(GAME, [["e4"]])
+    with GameCache(tmp_path) as second:
+        assert second.get(GAME) == [["e4"]]
+
+
+def test_evict_by_size_keeps_most_recent(tmp_path):
+    with GameCache(tmp_path) as c:
+        c.put("1. a3 *", [["a3"]])
+    with GameCache(tmp_path, max_bytes=12) as c:
+        c.put("1. h3 *", [["h3"]])
+    with GameCache(tmp_path) as c:
+        assert c.get("1. h3 *") == [["h3"]]
+        assert c.get("1. a3 *") is None, "Oldest entry should have been evicted."
+
+
+def test_evict_by_age(tmp_path):
+    with GameCache(tmp_path) as c:
+        c.put("1. a3 *", [["a3"]])
+    with GameCache(tmp_path, max_age=-1) as c:
+        assert c.evict() == 1
+
+
+@pytest.mark.parametrize("jobs", [1, 2])
+def test_iter_lines_with_cache_matches_uncached(cache, jobs):
+    expected = list(parser.iter_lines(io.StringIO(PGN), title="T"))
+    first = list(parser.iter_lines(io.StringIO(PGN), title="T", jobs=jobs, cache=cache))
+    second = list(
+        parser.iter_lines(io.StringIO(PGN), title="T", jobs=jobs, cache=cache)
+    )
+    assert first == expected and second == expected
+    assert cache.hits == 2, f"Second run should hit both games, got {cache.hits}"
+
+
+def test_main_with_cache_dir_reuses_games(tmp_path, capsys):
+    pgn_file = tmp_path / "in.pgn"
+    pgn_file.write_text(PGN, encoding="utf-8")
+    out = tmp_path / "out.csv"
+    argv = [str(pgn_file), "--output_csv", str(out), "--cache-dir", str(tmp_path / "c")]
+    cli.main(argv)
+    first = out.read_bytes()
+    cli.main(argv)
+    assert out.read_bytes() == first, "Cached rerun should write identical output."
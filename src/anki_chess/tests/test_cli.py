@@ -48,24 +48,12 @@ def test_initialize_argument_parser_includes_all_expected_arguments():
     )
 
 
-def test_load_pgn_content_reads_file_content(tmp_path):
-    pgn_file = tmp_path / "test.pgn"
-    expected_content = "1. e4 e5 *"
-    pgn_file.write_text(expected_content, encoding="utf-8")
-    args = MagicMock()
-    args.input_pgn = pgn_file
-    content = cli._load_pgn_content(args)
-    assert content == expected_content, (
-        f"PGN content mismatch: expected '{expected_content}', got '{content}'"
-    )
-
-
 def test_main_writes_csv_file_with_explicit_output(monkeypatch, tmp_path):
     pgn_file = tmp_path / "input.pgn"
     pgn_file.write_text("1. e4 e5 *", encoding="utf-8")
     output_file = tmp_path / "output.csv"
     fake_lines = [MagicMock(title="Test", san_seq=["e4", "e5"])]
-    monkeypatch.setattr(cli, "parse_pgn_to_lines", lambda *a, **kw: fake_lines)
+    monkeypatch.setattr(cli, "iter_game_lines", lambda *a, **kw: iter(fake_lines))
     monkeypatch.setattr(
         cli,
         "emit_csv",
@@ -85,7 +73,7 @@ def test_main_writes_csv_file_with_default_output(monkeypatch, tmp_path):
     pgn_file.write_text("1. e4 e5 *", encoding="utf-8")
     default_output = tmp_path / "output.csv"
     fake_lines = [MagicMock(title="Test", san_seq=["e4", "e5"])]
-    monkeypatch.setattr(cli, "parse_pgn_to_lines", lambda *a, **kw: fake_lines)
+    monkeypatch.setattr(cli, "iter_game_lines", lambda *a, **kw: iter(fake_lines))
     monkeypatch.setattr(
         cli,
         "emit_csv",
@@ -113,7 +101,7 @@ def test_main_prints_summary_with_explicit_output(monkeypatch, tmp_path):
     pgn_file.write_text("1. e4 e5 *", encoding="utf-8")
     output_file = tmp_path / "output.csv"
     fake_lines = [MagicMock(title="Test", san_seq=["e4", "e5"])]
-    monkeypatch.setattr(cli, "parse_pgn_to_lines", lambda *a, **kw: fake_lines)
+    monkeypatch.setattr(cli, "iter_game_lines", lambda *a, **kw: iter(fake_lines))
     monkeypatch.setattr(
         cli,
         "emit_csv",
@@ -131,7 +119,7 @@ def test_main_prints_summary_with_default_output(monkeypatch, tmp_path):
     pgn_file = tmp_path / "input.pgn"
     pgn_file.write_text("1. e4 e5 *", encoding="utf-8")
     fake_lines = [MagicMock(title="Test", san_seq=["e4", "e5"])]
-    monkeypatch.setattr(cli, "parse_pgn_to_lines", lambda *a, **kw: fake_lines)
+    monkeypatch.setattr(cli, "iter_game_lines", lambda *a, **kw: iter(fake_lines))
     monkeypatch.setattr(
         cli,
         "emit_csv",
@@ -150,3 +138,87 @@ def test_main_prints_summary_with_default_output(monkeypatch, tmp_path):
             )
     finally:
         os.chdir(old_cwd)
+
+
+def test_main_streams_real_pgn_and_reports_line_count(tmp_path):
+    pgn_file = tmp_path / "input.pgn"
+    pgn_file.write_text("1. e4 e5 (1... c5) 2. Nf3 *", encoding="utf-8")
+    output_file = tmp_path / "out.csv"
+    with patch("builtins.print") as mock_print:
+        cli.main([str(pgn_file), "--output_csv", str(output_file)])
+    mock_print.assert_called_once_with(f"Wrote 2 lines to {output_file}")
+    rows = output_file.read_text(encoding="utf-8").splitlines()
+    assert len(rows) == 3, f"Expected header plus 2 rows, got {rows}"
+
+
+def test_main_transpositions_skips_illegal_moves(tmp_path):
+    pgn_file = tmp_path / "input.pgn"
+    pgn_file.write_text("1. e4 e5 2. Nf3 Nf9 (2... Nc6) *", encoding="utf-8")
+    output_file = tmp_path / "out.csv"
+    with patch("builtins.print") as mock_print:
+        cli.main([str(pgn_file), "--output_csv", str(output_file), "--transpositions"])
+    mock_print.assert_called_once_with(f"Wrote 1 lines to {output_file}")
+
+
+def test_add_jobs_argument_defaults_to_serial(parser):
+    args = cli._add_jobs_argument(parser).parse_args([])
+    assert args.jobs == 1, f"Expected --jobs to default to 1, got {args.jobs}"
+
+
+def test_add_compact_tree_argument_is_a_flag(parser):
+    ap = cli._add_compact_tree_argument(parser)
+    assert ap.parse_args([]).compact_tree is False
+    assert ap.parse_args(["--compact-tree"]).compact_tree is True
+
+
+def test_main_mmap_input_writes_same_csv_as_text_input(tmp_path):
+    pgn_file = tmp_path / "input.pgn"
+    pgn_file.write_text(
+        '[Event "A"]\n\n1. e4 e5 (1... c5) *\n\n[Event "B"]\n\n1. d4 *\n',
+        encoding="utf-8",
+    )
+    text_csv, mmap_csv = tmp_path / "text.csv", tmp_path / "mmap.csv"
+    with patch("builtins.print"):
+        cli.main([str(pgn_file), "--output_csv", str(text_csv)])
+        cli.main([str(pgn_file), "--output_csv", str(mmap_csv), "--mmap"])
+    assert mmap_csv.read_text() == text_csv.read_text(), (
+        f"--mmap output differs:\n{mmap_csv.read_text()}\n{text_csv.read_text()}"
+    )
+
+
+def _write_chapters(directory):
+    (directory / "b").mkdir(parents=True)
+    (directory / "a.pgn").write_text("1. e4 e5 (1... c5) *", encoding="utf-8")
+    (directory / "b" / "c.pgn").write_text("1. d4 *", encoding="utf-8")
+    (directory / "notes.txt").write_text("not a PGN", encoding="utf-8")
+
+
+@pytest.mark.parametrize("spec", ["dir", "glob", "files"])
+def test_expand_input_pgn_finds_pgn_files_in_order(tmp_path, spec):
+    _write_chapters(tmp_path)
+    expected = [tmp_path / "a.pgn", tmp_path / "b" / "c.pgn"]
+    specs = {
+        "dir": [tmp_path],
+        "glob": [tmp_path / "**" / "*.pgn"],
+        "files": [*expected, tmp_path / "a.pgn"],
+    }
+    paths = cli._expand_input_pgn(specs[spec])
+    assert paths == expected, f"{spec}: expected {expected}, got {paths}"
+
+
+def test_expand_input_pgn_rejects_unmatched_glob(tmp_path):
+    with pytest.raises(ValueError, match="no PGN files"):
+        cli._expand_input_pgn([tmp_path / "*.pgn"])
+
+
+@pytest.mark.parametrize("extra", [[], ["--mmap"], ["--jobs", "2"]])
+def test_main_merges_several_inputs_with_per_file_titles(tmp_path, extra):
+    _write_chapters(tmp_path / "rep")
+    output_file = tmp_path / "out.csv"
+    argv = [str(tmp_path / "rep"), "--output_csv", str(output_file), *extra]
+    with patch("builtins.print") as mock_print:
+        cli.main([*argv, "--title", "Rep"])
+    mock_print.assert_called_once_with(f"Wrote 3 lines to {output_file}")
+    rows = output_file.read_text(encoding="utf-8").splitlines()[1:]
+    titles = [row.split(",")[0] for row in rows]
+    assert titles == ["Rep a #1", "Rep a #2", "Rep c #1"], f"got {titles}"
@@ -0,0 +1,77 @@
+import random
+import pytest
+from anki_chess.pgn2anki import parser
+from anki_chess.pgn2anki.compact import CompactMoveTree, NO_NODE, SanTable
+
+
+def _node_lines(pgn):
+    root, _ = parser._parse_moves(parser._tokenize(pgn), 0)
+    return list(parser._iter_lines_dfs(root))
+
+
+def _compact_lines(pgn):
+    return list(parser._parse_moves_compact(parser._tokenize(pgn)).iter_lines())
+
+
+def test_san_table_interns_equal_strings_once():
+    table = SanTable()
+    a, b, c = table.intern("e4"), table.intern("e5"), table.intern("e4")
+    assert a == c and a != b, f"Expected e4 to be interned once, got ids {a, b, c}"
+    assert len(table) == 2 and table[b] == "e5"
+
+
+def test_add_child_links_siblings_in_order():
+    tree = CompactMoveTree()
+    e4 = tree.add_child(CompactMoveTree.ROOT, "e4")
+    d4 = tree.add_child(CompactMoveTree.ROOT, "d4")
+    e5 = tree.add_child(e4, "e5")
+    assert list(tree.children(CompactMoveTree.ROOT)) == [e4, d4]
+    assert tree.parent[e5] == e4 and tree.next_sibling[d4] == NO_NODE
+    assert tree.san(CompactMoveTree.ROOT) is None and tree.san(e5) == "e5"
+
+
+def test_empty_tree_has_no_lines():
+    assert list(CompactMoveTree().iter_lines()) == []
+
+
+@pytest.mark.parametrize(
+    "pgn",
+    [
+        "1. e4 e5 2. Nf3 Nc6 (2... d6 3. d4 exd4) 3. Bb5 a6 *",
+        "1. d4 Nf6 (1... d5 2. c4) 2. c4 e6 (2... g6) 1/2-1/2",
+        "1. e4 (1... e5 (1... c5 (1... d6))) 2. Nf3",
+        "1. e4 ((1. d4) 1. c4) e5 *",
+        "1. e4 e5 ) 2. Nf3",
+        "1. e4 (1. d4 d5",
+        "( e4 ) d4",
+    ],
+)
+def test_compact_tree_lines_match_node_tree(pgn):
+    assert _compact_lines(pgn) == _node_lines(pgn), (
+        f"Compact and Node trees disagree for {pgn!r}"
+    )
+
+
+def test_compact_tree_matches_node_tree_on_random_token_streams():
+    rng = random.Random(1234)
+    alphabet = ["a", "b", "c", "d", "(", "(", ")", ")", "1.", "*"]
+    for _ in range(500):
+        pgn = " ".join(rng.choice(alphabet) for _ in range(rng.randint(0, 30)))
+        assert _compact_lines(pgn) == _node_lines(pgn), (
+            f"Compact and Node trees disagree for {pgn!r}"
+        )
+
+
+def test_parse_pgn_to_lines_compact_option_matches_default():
+    import io
+
+    pgn = '[Event "A"]\n1. e4 e5 (1... c5 2. Nf3) 2. Nf3 *\n[Event "B"]\n1. d4 *\n'
+    default = list(parser.iter_lines(io.StringIO(pgn), title="T"))
+    compact = list(parser.iter_lines(io.StringIO(pgn), title="T", compact=True))
+    assert compact == default, f"Compact lines {compact} differ from {default}"
+
+
+def test_node_uses_slots():
+    from anki_chess.pgn2anki.node import Node
+
+    assert not hasattr(Node("e4"), "__dict__"), "Node should not carry a __dict__."
@@ -0,0 +1,112 @@
+import bz2
+import gzip
+import lzma
+import threading
+
+import pytest
+
+from anki_chess import cli
+from anki_chess.pgn2anki.compression import (
+    ThreadedDecompressor,
+    decompression_errors,
+    detect_compression,
+    strip_compression_suffix,
+)
+from anki_chess.pgn2anki.reader import iter_pgn_games, open_pgn_text
+
+PGN = "".join(
+    f'[Event "{i}"]\r\n\r\n1. e4 e5 (1... c5 2. Nf3) 2. Nf3 {{café}} *\r\n\r\n'
+    for i in range(200)
+)
+
+CODECS = {".gz": gzip, ".bz2": bz2, ".xz": lzma}
+
+
+@pytest.fixture(params=sorted(CODECS))
+def compressed_pgn(request, tmp_path):
+    path = tmp_path / f"games.pgn{request.param}"
+    path.write_bytes(CODECS[request.param].compress(PGN.encode("utf-8")))
+    return path
+
+
+def test_open_pgn_text_matches_plain_file(tmp_path, compressed_pgn):
+    plain = tmp_path / "games.pgn"
+    plain.write_text(PGN, encoding="utf-8", newline="")
+    with open_pgn_text(plain) as fp:
+        expected = list(iter_pgn_games(fp))
+    with open_pgn_text(compressed_pgn, buffering=64) as fp:
+        games = list(iter_pgn_games(fp))
+    assert len(games) == 200
+    assert games == expected, f"{compressed_pgn.name}: games differ from plain text"
+
+
+def test_detect_compression_prefers_magic_bytes(tmp_path, compressed_pgn):
+    disguised = tmp_path / "games.pgn"
+    disguised.write_bytes(compressed_pgn.read_bytes())
+    assert detect_compression(disguised) == detect_compression(compressed_pgn)
+    assert detect_compression(compressed_pgn) is not None
+    plain = tmp_path / "plain.pgn"
+    plain.write_text(PGN, encoding="utf-8")
+    assert detect_compression(plain) is None
+
+
+def test_decompressor_queue_is_bounded(compressed_pgn):
+    codec = detect_compression(compressed_pgn)
+    assert codec is not None
+    reader = ThreadedDecompressor(compressed_pgn, codec, 16, 2)
+    try:
+        assert reader.read(16)
+        # The thread blocks on the full queue instead of inflating the rest.
+        reader._thread.join(0.2)
+        assert reader._thread.is_alive(), "decompressed the whole file ahead"
+        assert reader._queue.qsize() == 2
+    finally:
+        reader.close()
+    assert not reader._thread.is_alive(), "close() must stop the thread early"
+
+
+def test_truncated_stream_raises_on_read(tmp_path):
+    path = tmp_path / "games.pgn.gz"
+    path.write_bytes(gzip.compress(PGN.encode("utf-8"))[:-20])
+    with pytest.raises(EOFError), open_pgn_text(path) as fp:
+        fp.read()
+    running = [t.name for t in threading.enumerate() if t.name.startswith("decompress")]
+    assert not running, f"decompression thread left running: {running}"
+
+
+def test_corrupt_stream_raises_on_read(compressed_pgn):
+    data = bytearray(compressed_pgn.read_bytes())
+    data[len(data) // 2 : len(data) // 2 + 16] = bytes(16)
+    compressed_pgn.write_bytes(data)
+    codec = detect_compression(compressed_pgn)
+    assert codec is not None
+    with (
+        pytest.raises(decompression_errors(codec)),
+        open_pgn_text(compressed_pgn) as fp,
+    ):
+        fp.read()
+
+
+def test_strip_compression_suffix():
+    assert strip_compression_suffix("games.pgn.xz") == "games.pgn"
+    assert strip_compression_suffix("games.pgn") == "games.pgn"
+
+
+def test_main_reads_compressed_inputs(tmp_path, compressed_pgn, capsys):
+    plain = tmp_path / "games.pgn"
+    plain.write_text(PGN, encoding="utf-8", newline="")
+    expected, got = tmp_path / "plain.csv", tmp_path / "compressed.csv"
+    cli.main([str(plain), "--output", str(expected)])
+    for extra in ([], ["--mmap"], ["--jobs", "2"]):
+        cli.main([str(compressed_pgn), "--output", str(got), *extra])
+        assert got.read_text() == expected.read_text(), f"{extra}: output differs"
+
+
+def test_main_titles_compressed_inputs_by_file_name(tmp_path, compressed_pgn, capsys):
+    other = tmp_path / "other.pgn"
+    other.write_text("1. d4 *", encoding="utf-8")
+    out = tmp_path / "out.csv"
+    cli.main([str(tmp_path), "--output", str(out), "--max-plies", "1"])
+    titles = [row.split(",")[0] for row in out.read_text().splitlines()[1:]]
+    assert titles[::200] == ["games #1", "other #1"], f"got {titles[::200]}"
+    assert len(titles) == 201
@@ -0,0 +1,82 @@
+import io
+from anki_chess.pgn2anki import parser
+from anki_chess.pgn2anki.dag import PositionDag
+
+
+def _dag(*pgns, max_plies=None):
+    dag = PositionDag()
+    for pgn in pgns:
+        root, _ = parser._parse_moves(parser._tokenize(pgn), 0)
+        dag.add_tree(root, max_plies)
+    return dag
+
+
+def test_empty_dag_has_no_lines():
+    assert list(PositionDag().iter_lines()) == []
+
+
+def test_repeated_games_are_stored_once():
+    lines = list(_dag("1. e4 e5 2. Nf3 *", "1. e4 e5 2. Nf3 *").iter_lines())
+    assert lines == [["e4", "e5", "Nf3"]], f"Expected a single line, got {lines}"
+
+
+def test_transposed_move_order_is_merged():
+    dag = _dag("1. d4 Nf6 2. c4 e6 3. Nc3 *", "1. c4 e6 2. d4 Nf6 *")
+    lines = list(dag.iter_lines())
+    assert lines == [["d4", "Nf6", "c4", "e6", "Nc3"]], (
+        f"Transposition should not add a second line, got {lines}"
+    )
+
+
+def test_include_transpositions_emits_alternate_move_order():
+    dag = _dag("1. d4 Nf6 2. c4 e6 3. Nc3 *", "1. c4 e6 2. d4 Nf6 *")
+    lines = list(dag.iter_lines(include_transpositions=True))
+    assert ["c4", "e6", "d4", "Nf6"] in lines, f"Missing transposition line: {lines}"
+
+
+def test_annotations_are_normalised_to_canonical_san():
+    lines = list(_dag("1. e4! e5?! 2. Nf3 *", "1. e4 e5 2. Nf3 *").iter_lines())
+    assert lines == [["e4", "e5", "Nf3"]], f"Expected merged canonical SAN, got {lines}"
+
+
+def test_max_plies_limits_dag_depth():
+    lines = list(_dag("1. e4 e5 2. Nf3 Nc6 (2... d6) *", max_plies=3).iter_lines())
+    assert lines == [["e4", "e5", "Nf3"]], (
+        f"Expected truncated single line, got {lines}"
+    )
+
+
+def test_repetition_cycle_terminates():
+    lines = list(_dag("1. Nf3 Nf6 2. Ng1 Ng8 3. Nf3 Nf6 4. e4 *").iter_lines())
+    # Ng1 Ng8 returns to the initial position, so it is a transposition.
+    assert lines == [["Nf3", "Nf6", "e4"]], f"Unexpected lines: {lines}"
+
+
+def test_illegal_move_skips_its_subtree():
+    lines = list(_dag("1. e4 e5 (1... e4 2. d4) 2. Nf3 Nf9 (2... Nc6) *").iter_lines())
+    assert lines == [["e4", "e5", "Nf3", "Nc6"]], f"Unexpected lines: {lines}"
+
+
+def test_drop_prefix_seqs_removes_prefixes_and_duplicates():
+    seqs = [["e4"], ["e4", "e5"], ["d4"], ["e4", "e5"], ["e4", "c5"], ["d4", "d5"]]
+    kept = parser._drop_prefix_seqs(seqs)
+    expected = [["e4", "e5"], ["e4", "c5"], ["d4", "d5"]]
+    assert kept == expected, f"Expected {expected}, got {kept}"
+
+
+def test_iter_lines_with_transpositions_titles_lines_consecutively():
+    pgn = (
+        '[Event "A"]\n1. d4 Nf6 2. c4 e6 *\n'
+        '[Event "B"]\n1. c4 e6 2. d4 Nf6 *\n'
+        '[Event "C"]\n1. e4 *\n'
+    )
+    lines = list(parser.iter_lines(io.StringIO(pgn), title="T", transpositions=True))
+    titles = [line.title for line in lines]
+    assert titles == ["T #1", "T #2"], f"Unexpected titles: {titles}"
+
+
+def test_iter_lines_drop_prefixes_across_games():
+    pgn = '[Event "A"]\n1. e4 e5 *\n[Event "B"]\n1. e4 e5 2. Nf3 *\n'
+    lines = list(parser.iter_lines(io.StringIO(pgn), drop_prefixes=True))
+    seqs = [line.san_seq for line in lines]
+    assert seqs == [["e4", "e5", "Nf3"]], f"Expected only the longer line, got {seqs}"
@@ -97,18 +97,6 @@ def test_emit_csv_writes_correct_san_sequence_json(csv_rows):
     )
 
 
-def test_emit_csv_returns_start_when_chess_none(monkeypatch, lines):
-    import anki_chess.pgn2anki.emitter as emitter_mod
-
-    monkeypatch.setattr(emitter_mod, "chess", None)
-    buf = io.StringIO()
-    emit_csv(lines, buf)
-    buf.seek(0)
-    rows = list(csv.reader(buf))
-    fen = rows[1][1]
-    assert fen == "start", f"Expected FEN to be 'start' when chess is None, got '{fen}'"
-
-
 def test_emit_csv_writes_each_variation_as_separate_row():
     # PGN with a main line and a variation
     pgn = "1. e4 e5 2. Nf3 Nc6 (2... d6 3. d4 exd4) 3. Bb5 a6 *"
@@ -122,3 +110,8 @@ def test_emit_csv_writes_each_variation_as_separate_row():
     assert len(data_rows) >= 2, (
         f"Expected at least 2 data rows for variations, got {len(data_rows)}"
     )
+
+
+def test_emit_csv_returns_number_of_rows_written(lines):
+    n = emit_csv(iter(lines), io.StringIO())
+    assert n == len(lines), f"Expected {len(lines)} rows written, got {n}"
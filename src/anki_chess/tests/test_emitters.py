@@ -0,0 +1,132 @@
+import csv
+import io
+import json
+import sqlite3
+import zipfile
+
+import pytest
+
+from anki_chess import cli
+from anki_chess.pgn2anki.apkg import ApkgEmitter, APKG_MODEL_ID, deck_id_for
+from anki_chess.pgn2anki.emitter import CsvEmitter, JsonlEmitter, emit_jsonl
+from anki_chess.pgn2anki.parser import parse_pgn_to_lines
+
+
+@pytest.fixture
+def lines():
+    pgn = "1. e4 e5 2. Nf3 Nc6 (2... d6 3. d4) 3. Bb5 a6 *"
+    return parse_pgn_to_lines(pgn, title="Ruy")
+
+
+def _read_apkg(path):
+    with zipfile.ZipFile(path) as zf:
+        names = set(zf.namelist())
+        db_bytes = zf.read("collection.anki2")
+        media = zf.read("media")
+    db_path = path.with_suffix(".anki2")
+    db_path.write_bytes(db_bytes)
+    return names, media, sqlite3.connect(db_path)
+
+
+def test_csv_emitter_batches_give_same_rows_as_one_batch(lines):
+    small, large = io.StringIO(), io.StringIO()
+    CsvEmitter(small, batch_size=1).emit(lines)
+    CsvEmitter(large).emit(lines)
+    assert small.getvalue() == large.getvalue(), (
+        f"Batch size changed the output:\n{small.getvalue()}\n{large.getvalue()}"
+    )
+
+
+def test_jsonl_emitter_writes_one_object_per_line(lines):
+    buf = io.StringIO()
+    n = emit_jsonl(lines, buf)
+    records = [json.loads(row) for row in buf.getvalue().splitlines()]
+    assert n == len(records) == len(lines), (
+        f"Expected {len(lines)} records, wrote {n}, read {len(records)}"
+    )
+    expected = {
+        "title": lines[0].title,
+        "fen": records[0]["fen"],
+        "san_seq": lines[0].san_seq,
+    }
+    assert records[0] == expected, f"Expected {expected}, got {records[0]}"
+
+
+def test_jsonl_and_csv_emitters_agree(lines):
+    csv_buf, jsonl_buf = io.StringIO(), io.StringIO()
+    CsvEmitter(csv_buf).emit(lines)
+    JsonlEmitter(jsonl_buf).emit(lines)
+    csv_buf.seek(0)
+    from_csv = [
+        (row[0], row[1], json.loads(row[2])) for row in list(csv.reader(csv_buf))[1:]
+    ]
+    from_jsonl = [
+        (r["title"], r["fen"], r["san_seq"])
+        for r in map(json.loads, jsonl_buf.getvalue().splitlines())
+    ]
+    assert from_csv == from_jsonl, f"CSV {from_csv} != JSONL {from_jsonl}"
+
+
+def test_apkg_emitter_writes_one_note_and_card_per_line(tmp_path, lines):
+    path = tmp_path / "deck.apkg"
+    with ApkgEmitter(path, deck_name="Ruy Lopez", batch_size=1) as emitter:
+        n = emitter.emit(lines)
+    names, media, conn = _read_apkg(path)
+    assert names == {"collection.anki2", "media"}, f"Unexpected members {names}"
+    assert media == b"{}", f"Expected empty media map, got {media!r}"
+    flds = [r[0].split("\x1f") for r in conn.execute("SELECT flds FROM notes")]
+    assert len(flds) == n == len(lines), (
+        f"Expected {len(lines)} notes, emitted {n}, stored {len(flds)}"
+    )
+    assert [json.loads(f[2]) for f in flds] == [line.san_seq for line in lines], (
+        f"Stored move sequences differ: {flds}"
+    )
+    dids = {r[0] for r in conn.execute("SELECT did FROM cards")}
+    assert dids == {deck_id_for("Ruy Lopez")}, f"Cards in unexpected decks {dids}"
+
+
+def test_apkg_emitter_registers_note_type_and_deck(tmp_path, lines):
+    path = tmp_path / "deck.apkg"
+    with ApkgEmitter(path, deck_name="Ruy Lopez") as emitter:
+        emitter.emit(lines)
+    _, _, conn = _read_apkg(path)
+    models, decks = conn.execute("SELECT models, decks FROM col").fetchone()
+    model = json.loads(models)[str(APKG_MODEL_ID)]
+    fields = [f["name"] for f in model["flds"]]
+    assert fields == ["Title", "FEN", "SAN_SEQ_JSON"], f"Unexpected fields {fields}"
+    assert "pycmd" in model["tmpls"][0]["qfmt"], "Front template not embedded"
+    names = {d["name"] for d in json.loads(decks).values()}
+    assert "Ruy Lopez" in names, f"Deck missing from {names}"
+
+
+def test_apkg_emitter_writes_nothing_when_interrupted(tmp_path, lines):
+    path = tmp_path / "deck.apkg"
+
+    def failing():
+        yield from lines
+        raise RuntimeError("boom")
+
+    with pytest.raises(RuntimeError), ApkgEmitter(path) as emitter:
+        emitter.emit(failing())
+    assert not path.exists(), "A partial package was written"
+
+
+def test_apkg_emitter_rejects_writes_after_close(tmp_path, lines):
+    emitter = ApkgEmitter(tmp_path / "deck.apkg")
+    emitter.close()
+    with pytest.raises(ValueError, match="closed"):
+        emitter.emit(lines)
+
+
+@pytest.mark.parametrize("fmt", ["csv", "jsonl", "apkg"])
+def test_main_writes_requested_format_to_default_path(
+    monkeypatch, tmp_path, capsys, fmt
+):
+    pgn_file = tmp_path / "input.pgn"
+    pgn_file.write_text("1. e4 e5 (1... c5) *", encoding="utf-8")
+    monkeypatch.chdir(tmp_path)
+    cli.main([str(pgn_file), "--format", fmt])
+    outfile = tmp_path / f"output.{fmt}"
+    assert outfile.exists(), f"Expected {outfile} to be written"
+    out = capsys.readouterr().out
+    assert "Wrote 2 lines" in out, f"Unexpected summary: {out!r}"
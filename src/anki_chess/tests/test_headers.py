@@ -0,0 +1,137 @@
+import io
+import os
+
+import pytest
+
+from anki_chess import cli
+from anki_chess.pgn2anki.header_index import HeaderIndex
+from anki_chess.pgn2anki.headers import (
+    HeaderFilter,
+    filter_games,
+    normalize_date,
+    parse_eco_ranges,
+    parse_headers,
+)
+from anki_chess.pgn2anki.reader import iter_pgn_games, iter_pgn_games_mmap
+
+
+def _game(event, eco, white, black, date, result, white_elo="", black_elo=""):
+    return (
+        f'[Event "{event}"]\n[Date "{date}"]\n[White "{white}"]\n'
+        f'[Black "{black}"]\n[Result "{result}"]\n[WhiteElo "{white_elo}"]\n'
+        f'[BlackElo "{black_elo}"]\n[ECO "{eco}"]\n\n1. e4 e5 {result}\n\n'
+    )
+
+
+PGN = (
+    _game("A", "C21", "Blackburne, J", "Cuthbertson", "1868.??.??", "1-0")
+    + _game("B", "C25", "Carlsen, M", "Caruana, F", "2019.05.02", "1/2-1/2")
+    + _game("C", "B20", "Carlsen, M", "Nepo, I", "2021.12.03", "1-0", "2855", "2782")
+    + _game("D", "C29", "Kasparov, G", "Karpov, A", "1990.10.08", "0-1", "2800", "2730")
+)
+
+
+def _events(games):
+    return [parse_headers(g)["Event"] for g in games]
+
+
+def test_parse_headers_reads_tags_and_unescapes_values():
+    headers = parse_headers('[Event "A \\"B\\""]\n[Site "?"]')
+    assert headers == {"Event": 'A "B"', "Site": "?"}, f"Unexpected {headers}"
+
+
+def test_parse_eco_ranges_accepts_ranges_and_single_codes():
+    ranges = parse_eco_ranges("c21-C29, B20")
+    assert ranges == [("C21", "C29"), ("B20", "B20")], f"Unexpected {ranges}"
+
+
+@pytest.mark.parametrize("spec", ["C2", "C29-C21", "F00", ""])
+def test_parse_eco_ranges_rejects_bad_specs(spec):
+    with pytest.raises(ValueError):
+        parse_eco_ranges(spec)
+
+
+@pytest.mark.parametrize(
+    "date, fill, expected",
+    [
+        ("2001.05.31", "00", "2001.05.31"),
+        ("2001", "99", "2001.99.99"),
+        ("1868.??.??", "00", "1868.00.00"),
+        ("????.??.??", "00", ""),
+    ],
+)
+def test_normalize_date(date, fill, expected):
+    assert normalize_date(date, fill) == expected, f"{date!r} with fill {fill!r}"
+
+
+@pytest.mark.parametrize(
+    "header_filter, expected",
+    [
+        (HeaderFilter(), ["A", "B", "C", "D"]),
+        (HeaderFilter(eco=[("C21", "C29")]), ["A", "B", "D"]),
+        (HeaderFilter(players=["carlsen"]), ["B", "C"]),
+        (HeaderFilter(players=["karpov", "cuthbertson"]), ["A", "D"]),
+        (HeaderFilter(min_elo=2750), ["C"]),
+        (HeaderFilter(date_from="2000.00.00"), ["B", "C"]),
+        (HeaderFilter(date_to="1990.99.99"), ["A", "D"]),
+        (HeaderFilter(results=["1-0"]), ["A", "C"]),
+        (HeaderFilter(eco=[("C21", "C29")], results=["1-0", "0-1"]), ["A", "D"]),
+    ],
+)
+def test_filter_games_selects_matching_headers(header_filter, expected):
+    games = filter_games(iter_pgn_games(io.StringIO(PGN)), header_filter)
+    assert _events(games) == expected, f"Filter {header_filter} gave wrong games"
+
+
+def test_filter_games_never_tokenizes_rejected_movetext():
+    bad = '[Event "X"]\n[ECO "A00"]\n\n1. e4 ((((( {unclosed\n'
+    games = list(filter_games([bad], HeaderFilter(eco=[("C00", "C99")])))
+    assert games == [], f"Expected the A00 game to be dropped, got {games}"
+
+
+def test_mmap_select_skips_rejected_games(tmp_path):
+    path = tmp_path / "db.pgn"
+    path.write_text(PGN, encoding="utf-8")
+    header_filter = HeaderFilter(players=["carlsen"])
+    games = list(
+        iter_pgn_games_mmap(
+            path, headers=True, select=header_filter.matches_header_text
+        )
+    )
+    assert _events(games) == ["B", "C"], f"Unexpected games {games}"
+
+
+def test_header_index_serves_matching_movetext(tmp_path):
+    path = tmp_path / "db.pgn"
+    path.write_text(PGN, encoding="utf-8")
+    with HeaderIndex(tmp_path / "db.idx", path) as index:
+        assert not index.is_current(), "A new index should need building"
+        games = list(index.iter_games(HeaderFilter(eco=[("C21", "C29")]), True))
+        assert index.is_current(), "Index was not recorded as built"
+    assert _events(games) == ["A", "B", "D"], f"Unexpected games {games}"
+    with HeaderIndex(tmp_path / "db.idx", path) as index:
+        movetext = list(index.iter_games(HeaderFilter(min_elo=2750)))
+    assert movetext == ["1. e4 e5 1-0"], f"Unexpected movetext {movetext}"
+
+
+def test_header_index_rebuilds_when_pgn_changes(tmp_path):
+    path = tmp_path / "db.pgn"
+    path.write_text(PGN, encoding="utf-8")
+    with HeaderIndex(tmp_path / "db.idx", path) as index:
+        index.build()
+    path.write_text(PGN + _game("E", "C22", "X", "Y", "2024.01.01", "*"))
+    os.utime(path, ns=(0, 10**18))
+    with HeaderIndex(tmp_path / "db.idx", path) as index:
+        assert not index.is_current(), "Changed PGN should invalidate the index"
+        games = list(index.iter_games(HeaderFilter(results=["*"]), headers=True))
+    assert _events(games) == ["E"], f"Unexpected games {games}"
+
+
+@pytest.mark.parametrize("mode", [[], ["--mmap"], ["--header-index", "db.idx"]])
+def test_main_header_filters_agree_across_readers(tmp_path, monkeypatch, mode):
+    monkeypatch.chdir(tmp_path)
+    (tmp_path / "db.pgn").write_text(PGN, encoding="utf-8")
+    argv = ["db.pgn", "--eco", "C21-C29", "--player", "carlsen", "--format", "jsonl"]
+    cli.main(argv + mode)
+    rows = (tmp_path / "output.jsonl").read_text().splitlines()
+    assert len(rows) == 1, f"Expected only game B, got {rows}"
@@ -0,0 +1,81 @@
+import pytest
+from anki_chess.pgn2anki import parser
+from anki_chess.pgn2anki.lexer import (
+    MOVETEXT_TOKEN_KINDS,
+    Token,
+    TokenKind,
+    iter_tokens,
+    tokenize_movetext,
+)
+
+
+def test_iter_tokens_empty_string_yields_nothing():
+    assert list(iter_tokens("")) == [], "Lexing empty string should yield no tokens."
+
+
+def test_iter_tokens_types_every_token_kind():
+    pgn = '[Event "x"]\n1. e4 $1 {good} (1. d4) ;rest\n1-0'
+    kinds = [tok.kind for tok in iter_tokens(pgn)]
+    expected = [
+        TokenKind.HEADER,
+        TokenKind.MOVE_NUMBER,
+        TokenKind.SAN,
+        TokenKind.NAG,
+        TokenKind.COMMENT,
+        TokenKind.PAREN_OPEN,
+        TokenKind.MOVE_NUMBER,
+        TokenKind.SAN,
+        TokenKind.PAREN_CLOSE,
+        TokenKind.COMMENT,
+        TokenKind.RESULT,
+    ]
+    assert kinds == expected, f"Token kinds mismatch: expected {expected}, got {kinds}"
+
+
+def test_iter_tokens_splits_move_number_glued_to_move():
+    tokens = list(iter_tokens("1.e4 e5 2...Nf6"))
+    expected = [
+        Token(TokenKind.MOVE_NUMBER, "1."),
+        Token(TokenKind.SAN, "e4"),
+        Token(TokenKind.SAN, "e5"),
+        Token(TokenKind.MOVE_NUMBER, "2..."),
+        Token(TokenKind.SAN, "Nf6"),
+    ]
+    assert tokens == expected, f"Expected {expected}, got {tokens}"
+
+
+@pytest.mark.parametrize("result", ["1-0", "0-1", "1/2-1/2", "*"])
+def test_iter_tokens_recognises_results(result):
+    tokens = list(iter_tokens(f"e4 {result}"))
+    assert tokens[-1] == Token(TokenKind.RESULT, result), (
+        f"Expected result token for {result!r}, got {tokens[-1]}"
+    )
+
+
+def test_iter_tokens_keeps_castling_with_zeros_as_san():
+    tokens = list(iter_tokens("0-0 0-0-0"))
+    assert [t.kind for t in tokens] == [TokenKind.SAN, TokenKind.SAN], (
+        f"Castling written with zeros should lex as SAN, got {tokens}"
+    )
+
+
+def test_iter_tokens_multiline_comment_is_one_token():
+    tokens = list(iter_tokens("e4 {a\nlong\ncomment} e5"))
+    assert tokens[1] == Token(TokenKind.COMMENT, "{a\nlong\ncomment}"), (
+        f"Expected one comment token, got {tokens}"
+    )
+
+
+def test_tokenize_movetext_matches_typed_lexer():
+    pgn = '[Event "x"]\n1. e4 $1 {good} (1. d4 d5) e5 ;rest\n2.Nf3 *'
+    typed = [t.text for t in iter_tokens(pgn) if t.kind in MOVETEXT_TOKEN_KINDS]
+    assert tokenize_movetext(pgn) == typed, (
+        f"String and typed lexers disagree: {tokenize_movetext(pgn)} vs {typed}"
+    )
+
+
+def test_tokenize_wrapper_drops_headers_comments_and_nags():
+    pgn = '[Event "Test"]\n1. e4 $1 {comment} ;semi\n1-0'
+    assert parser._tokenize(pgn) == ["1.", "e4", "1-0"], (
+        f"Unexpected tokens: {parser._tokenize(pgn)}"
+    )
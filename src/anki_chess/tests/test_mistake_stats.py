@@ -0,0 +1,87 @@
+import sqlite3
+import time
+
+import pytest
+
+from anki_chess.addon.bridge import BridgeMessage, ReviewEvent
+from anki_chess.addon.controller import MockReviewer, ReviewerController
+from anki_chess.addon.mistake_stats import MistakeStats
+from anki_chess.addon.worker import BackgroundWorker
+
+
+def _fail(card_id, ply, fen, expected="Nf3"):
+    message = BridgeMessage(
+        "fail_line", ply=ply, move="Nc3", expected=expected, fen=fen
+    )
+    return ReviewEvent(card_id, message)
+
+
+def _stored_events(path):
+    with sqlite3.connect(path) as conn:
+        return conn.execute("SELECT count(*) FROM events").fetchone()[0]
+
+
+def test_events_are_buffered_until_batch_is_full(tmp_path):
+    path = tmp_path / "stats.sqlite"
+    with MistakeStats(path, batch_size=3, flush_interval=None) as stats:
+        stats.record(_fail(1, 3, "fen-a"))
+        stats.record(_fail(1, 3, "fen-a"))
+        assert _stored_events(path) == 0, "Events written before the batch filled"
+        stats.record(_fail(2, 5, "fen-b"))
+        assert _stored_events(path) == 3, "Full batch was not flushed"
+        stats.record(_fail(2, 5, "fen-b"))
+    assert _stored_events(path) == 4, "Pending events were not flushed on close"
+
+
+def test_timer_flushes_pending_events(tmp_path):
+    path = tmp_path / "stats.sqlite"
+    with MistakeStats(path, flush_interval=0.05) as stats:
+        stats.record(_fail(1, 3, "fen-a"))
+        deadline = time.monotonic() + 5
+        while _stored_events(path) == 0 and time.monotonic() < deadline:
+            time.sleep(0.01)
+        assert _stored_events(path) == 1, "Timer did not flush the pending event"
+
+
+def test_hardest_positions_and_plies_rank_by_failures(tmp_path):
+    with MistakeStats(tmp_path / "stats.sqlite", flush_interval=None) as stats:
+        for card_id, ply, fen in [(1, 3, "a"), (2, 5, "b"), (1, 3, "a"), (3, 3, "a")]:
+            stats.record(_fail(card_id, ply, fen))
+        stats.record(ReviewEvent(4, BridgeMessage("pass_line", ply=8)))
+        stats.flush()
+        positions = [(p.fen, p.fails) for p in stats.hardest_positions(2)]
+        plies = [(p.card_id, p.ply, p.fails) for p in stats.hardest_plies(1)]
+        assert positions == [("a", 3), ("b", 1)], f"Unexpected {positions}"
+        assert plies == [(1, 3, 2)], f"Unexpected {plies}"
+        assert stats.event_count() == 5, "Pass events should be logged too"
+
+
+def test_queries_after_close_raise(tmp_path):
+    stats = MistakeStats(tmp_path / "stats.sqlite")
+    assert stats.event_count() == 0
+    stats.close()
+    with pytest.raises(sqlite3.ProgrammingError, match="closed"):
+        stats.event_count()
+
+
+def test_hardest_positions_query_uses_index(tmp_path):
+    path = tmp_path / "stats.sqlite"
+    MistakeStats(path).close()
+    conn = sqlite3.connect(path)
+    plan = conn.execute(
+        "EXPLAIN QUERY PLAN SELECT fen FROM positions ORDER BY fails DESC LIMIT 5"
+    ).fetchall()
+    conn.close()
+    assert any("ix_positions_fails" in row[-1] for row in plan), f"Plan: {plan}"
+
+
+def test_controller_feeds_store_through_worker(tmp_path):
+    worker = BackgroundWorker()
+    with MistakeStats(tmp_path / "stats.sqlite", flush_interval=None) as stats:
+        controller = ReviewerController(MockReviewer(), worker, [stats.record])
+        msg = '{"cmd":"fail_line","ply":7,"move":"Nc3","expected":"Nf3","fen":"x"}'
+        controller.handle_command(msg)
+        worker.stop()
+        stats.flush()
+        plies = [(p.card_id, p.ply, p.fails) for p in stats.hardest_plies()]
+    assert plies == [(42, 7, 1)], f"Unexpected {plies}"
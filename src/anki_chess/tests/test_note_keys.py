@@ -0,0 +1,114 @@
+import io
+import json
+import sqlite3
+import zipfile
+
+import pytest
+
+from anki_chess import cli
+from anki_chess.pgn2anki.apkg import ApkgEmitter
+from anki_chess.pgn2anki.line import Line
+from anki_chess.pgn2anki.note_keys import (
+    NoteManifest,
+    iter_keyed_lines,
+    line_key,
+)
+from anki_chess.pgn2anki.parser import iter_lines
+
+PGN = '[Event "Ruy"]\n\n1. e4 e5 2. Nf3 Nc6 (2... d6 3. d4) 3. Bb5 a6 *\n'
+# Same repertoire with a line inserted before the others.
+PGN_INSERTED = '[Event "English"]\n\n1. c4 e5 *\n\n' + PGN
+
+
+def _keyed(pgn):
+    return list(iter_keyed_lines(iter_lines(io.StringIO(pgn), title="Ruy")))
+
+
+def test_keys_survive_inserted_variation():
+    before = {line.key: line.title for line in _keyed(PGN)}
+    after = {line.key: line.title for line in _keyed(PGN_INSERTED)}
+    assert set(before) <= set(after), "Existing lines changed keys"
+    assert len(after) == len(before) + 1, f"Expected one new key, got {after}"
+    shifted = [key for key in before if before[key] != after[key]]
+    assert shifted, "Titles were expected to shift with the inserted line"
+
+
+def test_key_ignores_title_and_annotations_but_not_start():
+    key = line_key(Line("A #1", ["e4", "e5"]))
+    assert key == line_key(Line("B #7", ["e4!", "e5?!"])), "Title or '!' changed key"
+    assert key != line_key(Line("A #1", ["e4", "e5"], fen="8/8/8/8/8/8/8/K1k5 w")), (
+        "Start position should change the key"
+    )
+
+
+def test_repeated_lines_get_distinct_stable_keys():
+    lines = [Line("a", ["e4"]), Line("b", ["d4"]), Line("c", ["e4"])]
+    keys = [line.key for line in iter_keyed_lines(lines)]
+    again = [
+        line.key for line in iter_keyed_lines([Line(l.title, l.san_seq) for l in lines])
+    ]
+    assert len(set(keys)) == 3, f"Repeated line shares a key: {keys}"
+    assert keys == again, "Keys are not deterministic"
+
+
+def test_manifest_diff_yields_only_added_and_changed_lines(tmp_path):
+    path = tmp_path / "manifest.jsonl"
+    first = NoteManifest(path)
+    assert len(list(first.diff(_keyed(PGN)))) == first.added == 2
+    first.save()
+
+    second = NoteManifest(path)
+    pgn = PGN_INSERTED.replace("Bb5", "Bb5!").replace(" (2... d6 3. d4)", "")
+    written = [line.san_seq for line in second.diff(_keyed(pgn))]
+    expected = [["c4", "e5"], ["e4", "e5", "Nf3", "Nc6", "Bb5!", "a6"]]
+    assert written == expected, f"Expected only new and changed lines, got {written}"
+    assert (second.added, second.changed, second.unchanged) == (1, 1, 0)
+    removed = [title for _, title in second.removed]
+    assert removed == ["Ruy #2"], f"Expected the dropped d6 line, got {removed}"
+
+
+@pytest.mark.parametrize("content", ["", "not json\n", "[1]\n"])
+def test_unreadable_manifest_counts_as_no_previous_export(tmp_path, content):
+    path = tmp_path / "manifest.jsonl"
+    path.write_text(content, encoding="utf-8")
+    manifest = NoteManifest(path)
+    assert len(list(manifest.diff(_keyed(PGN)))) == manifest.added == 2
+
+
+def test_manifest_diff_rejects_lines_without_keys(tmp_path):
+    manifest = NoteManifest(tmp_path / "manifest.jsonl")
+    with pytest.raises(ValueError, match="no note key"):
+        list(manifest.diff(iter_lines(io.StringIO(PGN))))
+
+
+def _guids(path):
+    db_path = path.with_suffix(".anki2")
+    with zipfile.ZipFile(path) as zf:
+        db_path.write_bytes(zf.read("collection.anki2"))
+    rows = sqlite3.connect(db_path).execute("SELECT guid, flds FROM notes")
+    return {flds.split("\x1f")[2]: guid for guid, flds in rows}
+
+
+def test_apkg_guids_follow_line_content(tmp_path):
+    for name, pgn in [("a.apkg", PGN), ("b.apkg", PGN_INSERTED)]:
+        with ApkgEmitter(tmp_path / name) as emitter:
+            emitter.emit(iter_lines(io.StringIO(pgn), title="Ruy"))
+    before, after = _guids(tmp_path / "a.apkg"), _guids(tmp_path / "b.apkg")
+    for seq, guid in before.items():
+        assert after[seq] == guid, f"Guid of {seq} changed across exports"
+
+
+def test_main_diff_manifest_writes_only_changes(tmp_path, monkeypatch, capsys):
+    monkeypatch.chdir(tmp_path)
+    argv = ["in.pgn", "--format", "jsonl", "--diff-manifest", "deck.manifest"]
+    (tmp_path / "in.pgn").write_text(PGN, encoding="utf-8")
+    cli.main(argv)
+    (tmp_path / "in.pgn").write_text(PGN_INSERTED, encoding="utf-8")
+    cli.main(argv)
+    records = [
+        json.loads(r) for r in (tmp_path / "output.jsonl").read_text().splitlines()
+    ]
+    assert [r["san_seq"] for r in records] == [["c4", "e5"]], records
+    assert records[0]["guid"], "Diff output lacks note keys"
+    assert "1 added, 0 changed, 0 removed, 2 unchanged" in capsys.readouterr().out
+    assert not (tmp_path / "output.jsonl.removed.tsv").exists()
@@ -47,3 +47,10 @@ def test_on_js_bridge_message_handles_unknown_message(mock_mw):
     assert result == (False, None), (
         f"Unexpected return value for unknown message: got {result}, expected {(False, None)}"
     )
+
+
+def test_on_js_bridge_message_handles_json_payloads(mock_mw):
+    msg = '{"cmd":"fail_line","ply":7,"move":"Nf3"}'
+    result = on_js_bridge_message((False, {}), msg, {})
+    mock_mw.reviewer._answerCard.assert_called_once_with(1)
+    assert result == (True, None), f"Unexpected return value {result}"
@@ -0,0 +1,101 @@
+import io
+import random
+
+import pytest
+
+from anki_chess import cli
+from anki_chess.pgn2anki.opening_tree import OpeningTree
+from anki_chess.pgn2anki.parser import iter_lines
+
+
+GAMES = [
+    [["e4", "e5", "Nf3"]],
+    [["e4", "e5", "Nf3"]],
+    [["e4", "c5", "Nf3"]],
+    [["d4", "d5", "c4"]],
+    [["e4", "e5", "Bc4"]],
+]
+
+
+def _tree(**kwargs):
+    tree = OpeningTree(**kwargs)
+    for seqs in GAMES:
+        tree.add_game(seqs)
+    return tree
+
+
+def test_opening_tree_counts_games_per_node():
+    tree = _tree()
+    e4 = tree.root.children["e4"]
+    assert tree.root.count == 5, f"Expected 5 games at the root, got {tree.root.count}"
+    assert e4.count == 4, f"Expected 4 games through e4, got {e4.count}"
+    assert e4.children["e5"].count == 3, "Expected 3 games through e4 e5"
+
+
+def test_opening_tree_counts_a_game_once_per_node():
+    tree = OpeningTree()
+    tree.add_game([["e4", "e5", "Nf3"], ["e4", "e5", "Bc4"], ["e4", "c5"]])
+    e4 = tree.root.children["e4"]
+    assert e4.count == 1, f"Variations counted the game {e4.count} times at e4"
+
+
+def test_opening_tree_emits_lines_most_played_first():
+    lines = list(_tree().iter_lines())
+    expected = [
+        (["e4", "e5", "Nf3"], 2),
+        (["e4", "e5", "Bc4"], 1),
+        (["e4", "c5", "Nf3"], 1),
+        (["d4", "d5", "c4"], 1),
+    ]
+    assert lines == expected, f"Expected {expected}, got {lines}"
+
+
+def test_opening_tree_min_count_cuts_rare_moves():
+    lines = list(_tree(min_count=2).iter_lines())
+    expected = [(["e4", "e5", "Nf3"], 2)]
+    assert lines == expected, f"Expected {expected}, got {lines}"
+
+
+def test_opening_tree_top_k_keeps_most_played_replies():
+    lines = [seq for seq, _ in _tree(top_k=1).iter_lines()]
+    assert lines == [["e4", "e5", "Nf3"]], f"Expected only the main line, got {lines}"
+
+
+def test_opening_tree_depth_truncates_lines():
+    lines = [seq for seq, _ in _tree(depth=1).iter_lines()]
+    assert lines == [["e4"], ["d4"]], f"Expected first moves only, got {lines}"
+
+
+def test_opening_tree_pruning_bounds_nodes_and_keeps_popular_lines():
+    rng = random.Random(0)
+    tree = OpeningTree(max_nodes=200)
+    popular = ["e4", "e5", "Nf3", "Nc6", "Bb5"]
+    for i in range(2000):
+        if i % 4 == 0:
+            tree.add_game([popular])
+        else:
+            tree.add_game([[f"x{rng.randrange(10**6)}" for _ in range(5)]])
+        assert tree.size <= 200, f"Tree grew to {tree.size} nodes"
+    top_line, top_count = next(tree.iter_lines())
+    assert top_line == popular, f"Popular line lost, top is {top_line}"
+    assert top_count >= 500 - tree.floor, (
+        f"Popular count {top_count} off by more than the floor {tree.floor}"
+    )
+
+
+def test_iter_lines_with_opening_tree_titles_lines_in_popularity_order():
+    pgn = "".join(
+        f'[Event "{i}"]\n\n{moves} *\n\n'
+        for i, moves in enumerate(["1. d4 d5", "1. e4 e5", "1. e4 e5", "1. e4 c5"])
+    )
+    lines = list(iter_lines(io.StringIO(pgn), title="T", opening_tree=OpeningTree()))
+    got = [(line.title, line.san_seq) for line in lines]
+    expected = [("T #1", ["e4", "e5"]), ("T #2", ["e4", "c5"]), ("T #3", ["d4", "d5"])]
+    assert got == expected, f"Expected {expected}, got {got}"
+
+
+def test_main_rejects_opening_tree_with_transpositions(tmp_path):
+    pgn_file = tmp_path / "db.pgn"
+    pgn_file.write_text("1. e4 *", encoding="utf-8")
+    with pytest.raises(SystemExit):
+        cli.main([str(pgn_file), "--opening-tree", "--transpositions"])
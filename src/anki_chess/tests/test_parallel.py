@@ -0,0 +1,51 @@
+import io
+import pathlib
+import pytest
+from anki_chess import cli
+from anki_chess.pgn2anki.parallel import imap_ordered, resolve_jobs
+from anki_chess.pgn2anki.parser import iter_lines
+
+DANISH_PGN = pathlib.Path(__file__).resolve().parents[3] / "danish.pgn"
+
+
+def _square(x):
+    return x * x
+
+
+def test_imap_ordered_preserves_input_order():
+    result = list(imap_ordered(_square, range(50), jobs=2, batch_size=3))
+    expected = [x * x for x in range(50)]
+    assert result == expected, f"Expected ordered squares, got {result}"
+
+
+def test_imap_ordered_empty_input_yields_nothing():
+    assert list(imap_ordered(_square, [], jobs=2)) == []
+
+
+@pytest.mark.parametrize("jobs,expected", [(1, 1), (3, 3), (-2, 1)])
+def test_resolve_jobs_positive_values(jobs, expected):
+    assert resolve_jobs(jobs) == expected
+
+
+def test_resolve_jobs_zero_means_all_cores():
+    assert resolve_jobs(0) >= 1
+
+
+def test_iter_lines_parallel_matches_serial():
+    pgn = (
+        '[Event "A"]\n1. e4 e5 (1... c5 2. Nf3) 2. Nf3 *\n'
+        '[Event "B"]\n1. d4 (1. c4 e5) d5 *\n'
+    ) * 20
+    serial = list(iter_lines(io.StringIO(pgn), title="T"))
+    parallel = list(iter_lines(io.StringIO(pgn), title="T", jobs=3))
+    assert parallel == serial, "Parallel lines differ from the serial run."
+
+
+def test_main_with_jobs_writes_same_csv_as_serial(tmp_path, capsys):
+    serial_out = tmp_path / "serial.csv"
+    parallel_out = tmp_path / "parallel.csv"
+    cli.main([str(DANISH_PGN), "--output_csv", str(serial_out)])
+    cli.main([str(DANISH_PGN), "--output_csv", str(parallel_out), "--jobs", "2"])
+    assert parallel_out.read_bytes() == serial_out.read_bytes(), (
+        "CSV written with --jobs 2 differs from the serial run."
+    )
@@ -103,3 +103,166 @@ def test_parse_variation_has_line_starting_with_d4(indian_defenses_lines):
     assert has_d4, (
         f"No line starts with 'd4': {[x.san_seq for x in indian_defenses_lines]}"
     )
+
+
+def test_iter_lines_matches_parse_pgn_to_lines(indian_defenses_pgn):
+    import io
+    from anki_chess.pgn2anki.parser import iter_lines
+
+    streamed = list(iter_lines(io.StringIO(indian_defenses_pgn), title="X"))
+    eager = parse_pgn_to_lines(indian_defenses_pgn, title="X")
+    assert streamed == eager, f"Streamed lines {streamed} differ from {eager}"
+
+
+def test_iter_lines_numbers_lines_across_games():
+    import io
+    from anki_chess.pgn2anki.parser import iter_lines
+
+    pgn = '[Event "A"]\n1. e4 (1. d4) *\n[Event "B"]\n1. c4 *\n'
+    titles = [line.title for line in iter_lines(io.StringIO(pgn), title="T")]
+    assert titles == ["T #1", "T #2", "T #3"], f"Unexpected titles: {titles}"
+
+
+def _chain(sans):
+    from anki_chess.pgn2anki.node import Node
+
+    root = Node(None)
+    cur = root
+    for san in sans:
+        nxt = Node(san)
+        cur.children.append(nxt)
+        cur = nxt
+    return root, cur
+
+
+def test_iter_lines_dfs_handles_mainline_deeper_than_recursion_limit():
+    import sys
+    from anki_chess.pgn2anki.parser import _iter_lines_dfs
+
+    depth = sys.getrecursionlimit() * 3
+    root, _ = _chain([f"m{i}" for i in range(depth)])
+    lines = list(_iter_lines_dfs(root))
+    assert len(lines) == 1 and len(lines[0]) == depth, (
+        f"Expected one line of {depth} plies, got {[len(x) for x in lines]}"
+    )
+
+
+def test_iter_lines_dfs_yields_independent_lines_in_dfs_order():
+    from anki_chess.pgn2anki.node import Node
+    from anki_chess.pgn2anki.parser import _iter_lines_dfs
+
+    root, e5 = _chain(["e4", "e5"])
+    e5.children.extend([Node("Nf3"), Node("Nc3")])
+    root.children.append(Node("d4"))
+    lines = list(_iter_lines_dfs(root))
+    expected = [["e4", "e5", "Nf3"], ["e4", "e5", "Nc3"], ["d4"]]
+    assert lines == expected, f"Expected {expected}, got {lines}"
+
+
+def test_parse_moves_handles_nesting_deeper_than_recursion_limit():
+    import sys
+    from anki_chess.pgn2anki.parser import _iter_lines_dfs, _parse_moves
+
+    levels = sys.getrecursionlimit() * 3
+    tokens = []
+    for level in range(levels):
+        tokens += [f"m{level}", f"r{level}", "("]
+    tokens.append("end")
+    tokens += [")"] * levels
+    root, i = _parse_moves(tokens)
+    lines = list(_iter_lines_dfs(root))
+    assert i == len(tokens), f"Expected to consume {len(tokens)} tokens, got {i}"
+    assert len(lines) == levels + 1, f"Expected {levels + 1} lines, got {len(lines)}"
+    assert lines[-1][-1] == "end", f"Innermost variation lost: {lines[-1][-3:]}"
+
+
+@pytest.mark.parametrize(
+    "pgn",
+    [
+        "1. e4 e5 (1... c5 2. Nf3 (2. Nc3) d6) 2. Nf3 *",
+        "1. e4 ((1. d4) 1. c4) e5 *",
+        "1. e4 (1... e5 (1... c5 (1... d6))) 2. Nf3",
+        "1. e4 e5 ) 2. Nf3",
+        "1. e4 (1. d4 d5",
+    ],
+)
+def test_parse_moves_matches_compact_builder(pgn):
+    from anki_chess.pgn2anki.parser import (
+        _iter_lines_dfs,
+        _parse_moves,
+        _parse_moves_compact,
+        _tokenize,
+    )
+
+    tokens = _tokenize(pgn)
+    root, _ = _parse_moves(tokens)
+    expected = list(_parse_moves_compact(tokens).iter_lines())
+    lines = list(_iter_lines_dfs(root))
+    assert lines == expected, f"Expected {expected}, got {lines}"
+
+
+def test_parse_moves_stops_after_unmatched_close_paren():
+    from anki_chess.pgn2anki.parser import _parse_moves
+
+    tokens = ["e4", "e5", ")", "Nf3"]
+    root, i = _parse_moves(tokens)
+    assert i == 3, f"Expected to stop after ')' at index 3, got {i}"
+    assert len(root.children[0].children) == 1, "Expected only e4 e5 parsed"
+
+
+def _unique_truncated(lines, max_plies):
+    seen, out = set(), []
+    for line in lines:
+        key = tuple(line[:max_plies])
+        if key not in seen:
+            seen.add(key)
+            out.append(list(key))
+    return out
+
+
+DEEP_PGN = (
+    "1. e4 e5 (1... c5 2. Nf3 (2. Nc3 Nc6 (2... e6 3. g3)) d6) 2. Nf3 Nc6 "
+    "(2... d6 3. d4 (3. Bc4 Be7) exd4) (2... Nf6 3. Nxe5) 3. Bb5 (3. Bc4 Bc5) a6 *"
+)
+
+
+@pytest.mark.parametrize("max_plies", [1, 2, 3, 4, 5, 6])
+def test_parse_moves_max_plies_matches_truncating_full_lines(max_plies):
+    from anki_chess.pgn2anki.parser import (
+        _iter_lines_dfs,
+        _parse_moves,
+        _parse_moves_compact,
+        _tokenize,
+    )
+
+    tokens = _tokenize(DEEP_PGN)
+    full = list(_iter_lines_dfs(_parse_moves(tokens)[0]))
+    expected = _unique_truncated(full, max_plies)
+    root, i = _parse_moves(tokens, 0, max_plies)
+    lines = list(_iter_lines_dfs(root))
+    compact = list(_parse_moves_compact(tokens, max_plies=max_plies).iter_lines())
+    assert i == len(tokens), f"Stopped early at token {i}"
+    assert lines == expected, f"max_plies={max_plies}: {lines} != {expected}"
+    assert compact == expected, f"Compact max_plies={max_plies}: {compact}"
+
+
+def test_parse_moves_max_plies_allocates_no_deeper_nodes():
+    from anki_chess.pgn2anki.parser import _count_tree_nodes, _parse_moves, _tokenize
+
+    root, _ = _parse_moves(_tokenize(DEEP_PGN), 0, 2)
+    n_nodes = _count_tree_nodes(root)
+    assert n_nodes == 3, f"Expected e4, e5, c5 and nothing deeper, got {n_nodes}"
+
+
+def test_max_plies_emits_each_truncated_line_once():
+    pgn = "1. e4 e5 2. Nf3 Nc6 (2... d6) (2... Nf6) 3. Bb5 *"
+    lines = [line.san_seq for line in parse_pgn_to_lines(pgn, max_plies=3)]
+    assert lines == [["e4", "e5", "Nf3"]], f"Expected one truncated line, got {lines}"
+
+
+def test_non_binding_max_plies_matches_no_limit():
+    pgn = "1. e4 (1. e4 c5) e5 2. Nf3 (2. Nf3 Nc6) *"
+    full = [line.san_seq for line in parse_pgn_to_lines(pgn)]
+    limited = [line.san_seq for line in parse_pgn_to_lines(pgn, max_plies=100)]
+    assert limited == full, f"max_plies=100 changed the lines: {limited} != {full}"
+    assert len(full) == 3, f"Expected 3 lines, got {full}"
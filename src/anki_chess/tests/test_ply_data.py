@@ -0,0 +1,94 @@
+import csv
+import io
+import json
+import sqlite3
+import zipfile
+
+import chess
+import pytest
+
+from anki_chess import cli
+from anki_chess.pgn2anki.apkg import APKG_PLY_DATA_MODEL_ID, ApkgEmitter
+from anki_chess.pgn2anki.emitter import CsvEmitter
+from anki_chess.pgn2anki.line import Line
+from anki_chess.pgn2anki.parser import iter_lines, parse_pgn_to_lines
+from anki_chess.pgn2anki.ply_data import PlyDataBuilder, decode_ply_data
+
+PGN = "1. e4 e5 2. Nf3 Nc6 (2... d6 3. d4 exd4) 3. Bb5 a6 (3... Nf6 4. O-O) *"
+
+
+def _replay(line):
+    board = chess.Board(line.fen or chess.STARTING_FEN)
+    moves, fens, legal = [], [board.fen()], []
+    for san in line.san_seq:
+        legal.append(sorted(m.uci() for m in board.legal_moves))
+        moves.append(board.push_san(san).uci())
+        fens.append(board.fen())
+    return moves, fens, legal
+
+
+@pytest.mark.parametrize("start", [None, 2, "branch"])
+def test_ply_data_matches_replaying_each_line(start):
+    lines = list(iter_lines(io.StringIO(PGN), start=start))
+    builder = PlyDataBuilder(legal_moves=True)
+    for line in lines:
+        moves, fens, legal = decode_ply_data(builder.encode(line))
+        exp_moves, exp_fens, exp_legal = _replay(line)
+        assert moves == exp_moves, f"{line.title}: moves {moves} != {exp_moves}"
+        assert fens == exp_fens, f"{line.title}: FENs differ"
+        assert legal is not None, f"{line.title}: legal moves missing"
+        assert [sorted(m) for m in legal] == exp_legal, f"{line.title}: legal differs"
+
+
+def test_ply_data_without_legal_moves_and_with_promotion():
+    line = Line("t", ["a8=N"], fen="8/P7/8/8/8/8/8/k1K5 w - - 0 1")
+    moves, fens, legal = decode_ply_data(PlyDataBuilder().encode(line))
+    assert moves == ["a7a8n"], f"Unexpected moves {moves}"
+    assert legal is None, "Legal moves stored without being asked for"
+    assert len(fens) == 2, f"Expected start and final FEN, got {fens}"
+
+
+def test_illegal_line_gets_empty_field_and_builder_recovers():
+    builder = PlyDataBuilder()
+    assert builder.encode(Line("bad", ["e4", "Ke3"])) == "", "Illegal line encoded"
+    moves, _, _ = decode_ply_data(builder.encode(Line("ok", ["e4", "e5"])))
+    assert moves == ["e2e4", "e7e5"], f"Unexpected moves {moves}"
+
+
+def test_csv_emitter_adds_ply_data_column():
+    buf = io.StringIO()
+    lines = parse_pgn_to_lines(PGN, title="Ruy")
+    CsvEmitter(buf, ply_data=PlyDataBuilder()).emit(lines)
+    rows = list(csv.reader(io.StringIO(buf.getvalue())))
+    assert rows[0] == ["Title", "FEN", "SAN_SEQ_JSON", "PLY_DATA"], rows[0]
+    moves, _, _ = decode_ply_data(rows[1][3])
+    assert len(moves) == len(json.loads(rows[1][2])), "Move counts differ"
+
+
+def test_apkg_with_ply_data_uses_its_own_note_type(tmp_path):
+    path = tmp_path / "deck.apkg"
+    with ApkgEmitter(path, ply_data=PlyDataBuilder()) as emitter:
+        emitter.emit(parse_pgn_to_lines(PGN, title="Ruy"))
+    db_path = tmp_path / "collection.anki2"
+    with zipfile.ZipFile(path) as zf:
+        db_path.write_bytes(zf.read("collection.anki2"))
+    conn = sqlite3.connect(db_path)
+    model = json.loads(conn.execute("SELECT models FROM col").fetchone()[0])
+    model = model[str(APKG_PLY_DATA_MODEL_ID)]
+    fields = [f["name"] for f in model["flds"]]
+    assert fields[-1] == "PLY_DATA", f"Unexpected fields {fields}"
+    assert "{{PLY_DATA}}" in model["tmpls"][0]["qfmt"], "Template does not read it"
+    flds = conn.execute("SELECT mid, flds FROM notes").fetchone()
+    assert flds[0] == APKG_PLY_DATA_MODEL_ID, f"Note uses model {flds[0]}"
+    assert flds[1].split("\x1f")[3], "PLY_DATA field is empty"
+
+
+def test_main_legal_moves_writes_ply_data(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    (tmp_path / "in.pgn").write_text(PGN, encoding="utf-8")
+    cli.main(["in.pgn", "--format", "jsonl", "--legal-moves"])
+    records = [
+        json.loads(r) for r in (tmp_path / "output.jsonl").read_text().splitlines()
+    ]
+    _, _, legal = decode_ply_data(records[0]["ply_data"])
+    assert legal and len(legal) == len(records[0]["san_seq"]), "Missing legal moves"
@@ -0,0 +1,108 @@
+import argparse
+import io
+import pathlib
+import chess
+import pytest
+from anki_chess import cli
+from anki_chess.pgn2anki import parser
+from anki_chess.pgn2anki.positions import (
+    START_AT_BRANCH,
+    iter_start_fens,
+    position_lines,
+    start_plies_for_lines,
+)
+
+DANISH_PGN = pathlib.Path(__file__).resolve().parents[3] / "danish.pgn"
+
+SEQS = [
+    ["e4", "e5", "Nf3", "Nc6"],
+    ["e4", "e5", "Nf3", "d6"],
+    ["e4", "c5"],
+    ["d4"],
+]
+
+
+def _naive_fen(seq, ply):
+    board = chess.Board()
+    for san in seq[:ply]:
+        board.push_san(san)
+    return board.fen()
+
+
+def test_start_plies_at_branch_use_neighbouring_lines():
+    plies = start_plies_for_lines(SEQS, START_AT_BRANCH)
+    assert plies == [3, 3, 1, 0], f"Unexpected branch start plies: {plies}"
+
+
+def test_start_plies_fixed_ply_keeps_at_least_one_move():
+    plies = start_plies_for_lines(SEQS, 3)
+    assert plies == [3, 3, 1, 0], f"Unexpected clamped start plies: {plies}"
+
+
+def test_iter_start_fens_matches_naive_replay():
+    plies = [2, 3, 1, 0]
+    fens = list(iter_start_fens(SEQS, plies))
+    expected = [_naive_fen(seq, ply) for seq, ply in zip(SEQS, plies)]
+    assert fens == expected, f"Shared replay FENs differ: {fens} vs {expected}"
+
+
+def test_iter_start_fens_replays_each_shared_move_once(monkeypatch):
+    pushed = []
+    original = chess.Board.push_san
+
+    def counting_push_san(self, san):
+        pushed.append(san)
+        return original(self, san)
+
+    monkeypatch.setattr(chess.Board, "push_san", counting_push_san)
+    list(iter_start_fens(SEQS, [3, 3, 1, 0]))
+    assert pushed == ["e4", "e5", "Nf3"], f"Unexpected replay: {pushed}"
+
+
+def test_iter_start_fens_accepts_annotated_moves():
+    fens = list(iter_start_fens([["e4!", "e5?!", "Nf3"]], [2]))
+    assert fens == [_naive_fen(["e4", "e5"], 2)]
+
+
+def test_position_lines_trims_moves_before_start():
+    lines = list(position_lines(SEQS[:2], START_AT_BRANCH))
+    assert [seq for _, seq in lines] == [["Nc6"], ["d6"]]
+
+
+def test_position_lines_keeps_illegal_line_from_initial_position():
+    seqs = [["e4", "e5", "Nf3", "Nf9", "Bc4"], ["e4", "e5", "Nf3", "Nc6", "Bc4"]]
+    lines = list(position_lines(seqs, 4))
+    assert lines == [(None, seqs[0]), (_naive_fen(seqs[1], 4), ["Bc4"])], (
+        f"Unexpected lines: {lines}"
+    )
+
+
+def test_main_start_from_survives_illegal_move(tmp_path):
+    pgn_file = tmp_path / "input.pgn"
+    pgn_file.write_text("1. e4 e5 2. Nf3 Nf9 (2... Nc6) 3. Bc4 *", encoding="utf-8")
+    output_file = tmp_path / "out.csv"
+    cli.main([str(pgn_file), "--output_csv", str(output_file), "--start-from", "4"])
+    rows = output_file.read_text(encoding="utf-8").splitlines()
+    assert len(rows) == 3, f"Expected header plus 2 rows, got {rows}"
+
+
+def test_iter_lines_start_from_branch_matches_naive_on_danish():
+    text = DANISH_PGN.read_text(encoding="utf-8")
+    full = [line.san_seq for line in parser.iter_lines(io.StringIO(text))]
+    lines = list(parser.iter_lines(io.StringIO(text), start=10))
+    for seq, line in zip(full, lines):
+        assert line.fen == _naive_fen(seq, 10)
+        assert line.san_seq == seq[10:]
+
+
+@pytest.mark.parametrize(
+    "value,expected", [("initial", None), ("0", None), ("branch", "branch"), ("8", 8)]
+)
+def test_parse_start_from_values(value, expected):
+    assert cli._parse_start_from(value) == expected
+
+
+@pytest.mark.parametrize("value", ["-1", "middle"])
+def test_parse_start_from_rejects_bad_values(value):
+    with pytest.raises(argparse.ArgumentTypeError):
+        cli._parse_start_from(value)
@@ -0,0 +1,132 @@
+import io
+import pathlib
+import pytest
+from anki_chess.pgn2anki import reader
+from anki_chess.pgn2anki.reader import (
+    iter_pgn_games,
+    iter_pgn_game_spans,
+    iter_pgn_games_mmap,
+    split_headers,
+)
+
+
+TWO_GAMES = """[Event "A"]
+[Site "?"]
+
+1. e4 e5 *
+
+[Event "B"]
+[Site "?"]
+
+1. d4 d5 *
+"""
+
+
+def test_iter_pgn_games_empty_stream_yields_nothing():
+    games = list(iter_pgn_games(io.StringIO("")))
+    assert games == [], f"Expected no games for empty input, got {games}"
+
+
+def test_iter_pgn_games_splits_at_event_headers():
+    games = list(iter_pgn_games(io.StringIO(TWO_GAMES)))
+    assert len(games) == 2, f"Expected 2 games, got {len(games)}: {games}"
+    assert games[0].startswith('[Event "A"]'), f"Unexpected first game: {games[0]!r}"
+    assert games[1].endswith("1. d4 d5 *"), f"Unexpected second game: {games[1]!r}"
+
+
+def test_iter_pgn_games_headerless_text_is_one_game():
+    games = list(iter_pgn_games(io.StringIO("1. e4 e5\n2. Nf3 *\n")))
+    assert games == ["1. e4 e5\n2. Nf3 *"], f"Unexpected games: {games}"
+
+
+def test_iter_pgn_games_skips_blank_games():
+    games = list(iter_pgn_games(io.StringIO("\n\n  \n")))
+    assert games == [], f"Expected blank input to yield no games, got {games}"
+
+
+def test_iter_pgn_games_is_lazy():
+    def lines():
+        yield '[Event "A"]\n'
+        yield "1. e4 *\n"
+        yield '[Event "B"]\n'
+        raise AssertionError("reader consumed past the second game start")
+
+    first = next(iter_pgn_games(lines()))
+    assert first == '[Event "A"]\n1. e4 *', f"Unexpected first game: {first!r}"
+
+
+MMAP_CASES = [
+    TWO_GAMES,
+    "1. e4 e5\n2. Nf3 *\n",
+    '  [Event "A"]\n1. e4 *\n  [Event "B"]\n\n1. d4 *\n',
+    '[Event "A"]\n1. e4 {see [Event "X"] later} *\n[Event "B"]\n1. c4 *\n',
+    '[Event "A"]\n[Site "?"]\n\n[Event "B"]\n1. c4 *\n',
+    "\n\n  \n",
+]
+
+
+@pytest.mark.parametrize("text", MMAP_CASES)
+def test_iter_pgn_games_mmap_with_headers_matches_text_reader(tmp_path, text):
+    path = tmp_path / "games.pgn"
+    path.write_bytes(text.encode("utf-8"))
+    expected = list(iter_pgn_games(io.StringIO(text)))
+    games = list(iter_pgn_games_mmap(path, headers=True))
+    assert games == expected, f"Expected {expected}, got {games}"
+
+
+@pytest.mark.parametrize("text", MMAP_CASES)
+def test_iter_pgn_games_mmap_yields_movetext_of_each_game(tmp_path, text):
+    path = tmp_path / "games.pgn"
+    path.write_bytes(text.encode("utf-8"))
+    expected = [
+        split_headers(game)[1].strip() for game in iter_pgn_games(io.StringIO(text))
+    ]
+    games = list(iter_pgn_games_mmap(path))
+    assert games == expected, f"Expected {expected}, got {games}"
+
+
+def test_iter_pgn_games_mmap_empty_file_yields_nothing(tmp_path):
+    path = tmp_path / "empty.pgn"
+    path.write_bytes(b"")
+    games = list(iter_pgn_games_mmap(path))
+    assert games == [], f"Expected no games, got {games}"
+
+
+def test_iter_pgn_games_mmap_normalizes_crlf(tmp_path):
+    path = tmp_path / "crlf.pgn"
+    path.write_bytes(TWO_GAMES.replace("\n", "\r\n").encode("utf-8"))
+    expected = list(iter_pgn_games(io.StringIO(TWO_GAMES)))
+    games = list(iter_pgn_games_mmap(path, headers=True))
+    assert games == expected, f"Expected {expected}, got {games}"
+
+
+def test_iter_pgn_game_spans_point_at_movetext():
+    buf = TWO_GAMES.encode("utf-8")
+    spans = list(iter_pgn_game_spans(buf))
+    movetexts = [buf[mid:end].strip() for _, mid, end in spans]
+    assert movetexts == [b"1. e4 e5 *", b"1. d4 d5 *"], f"Unexpected {movetexts}"
+
+
+@pytest.mark.parametrize("threads", [1, 3])
+def test_iter_pgn_files_yields_each_files_games_in_order(
+    tmp_path, monkeypatch, threads
+):
+    paths = []
+    for index in range(7):
+        path = tmp_path / f"{index}.pgn"
+        path.write_text(TWO_GAMES.replace('"A"', f'"{index}"'), encoding="utf-8")
+        paths.append(path)
+    # The last file is over the read-ahead limit and gets streamed.
+    monkeypatch.setattr(
+        reader, "PGN_READ_AHEAD_MAX_BYTES", paths[-1].stat().st_size - 1
+    )
+    paths[-1].write_text(TWO_GAMES * 2, encoding="utf-8")
+    got = [
+        (path, list(games))
+        for path, games in reader.iter_pgn_files(paths, threads=threads, read_ahead=2)
+    ]
+    assert [path for path, _ in got] == paths
+    for path, games in got:
+        with open(path, encoding="utf-8") as fp:
+            expected = list(iter_pgn_games(fp))
+        assert games == expected, f"{pathlib.Path(path).name}: {games} != {expected}"
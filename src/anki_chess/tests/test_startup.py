@@ -0,0 +1,80 @@
+import os
+import subprocess
+import sys
+from pathlib import Path
+
+import anki_chess
+
+# Generous ceiling for the cumulative import time of an entry point; the CLI
+# takes well under 100 ms when nothing heavy is imported eagerly.
+STARTUP_BUDGET_US = 500_000
+
+# Modules only specific features need; importing an entry point must not load them.
+HEAVY_MODULES = ["chess", "chess.polyglot", "sqlite3", "cProfile", "concurrent.futures"]
+
+FAKE_AQT = {
+    "__init__.py": "mw = None\n",
+    "gui_hooks.py": ("webview_did_receive_js_message = []\nprofile_will_close = []\n"),
+}
+
+
+def _run(code, pythonpath=()):
+    src = str(Path(anki_chess.__file__).parent.parent)
+    env = dict(os.environ)
+    env["PYTHONPATH"] = os.pathsep.join([*pythonpath, src])
+    return subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", code],
+        capture_output=True,
+        text=True,
+        env=env,
+        check=True,
+    )
+
+
+def _import_times(stderr):
+    """``{module: (self_us, cumulative_us)}`` from ``-X importtime`` output."""
+    times = {}
+    for row in stderr.splitlines():
+        if not row.startswith("import time:") or "[us]" in row:
+            continue
+        self_us, cumulative_us, name = row[len("import time:") :].split("|")
+        times[name.strip()] = (int(self_us), int(cumulative_us))
+    return times
+
+
+def _check_startup(module, code, pythonpath=()):
+    check = (
+        f"{code}\nimport sys\nprint([m for m in {HEAVY_MODULES!r} if m in sys.modules])"
+    )
+    proc = _run(check, pythonpath)
+    loaded = proc.stdout.strip().splitlines()[-1]
+    assert loaded == "[]", f"importing {module} loaded {loaded}"
+    times = _import_times(proc.stderr)
+    cumulative = times[module][1]
+    slowest = sorted(times.items(), key=lambda item: -item[1][0])[:10]
+    assert cumulative < STARTUP_BUDGET_US, (
+        f"importing {module} took {cumulative} us; slowest: {slowest}"
+    )
+
+
+def test_cli_startup_within_budget():
+    _check_startup("anki_chess.cli", "import anki_chess.cli")
+
+
+def test_addon_startup_within_budget(tmp_path):
+    aqt = tmp_path / "aqt"
+    aqt.mkdir()
+    for name, text in FAKE_AQT.items():
+        (aqt / name).write_text(text)
+    code = (
+        "import anki_chess.addon\n"
+        "import sys\n"
+        "from aqt import gui_hooks\n"
+        "assert 'anki_chess.addon.on_js_bridge_message' not in sys.modules\n"
+        "assert gui_hooks.webview_did_receive_js_message\n"
+        "assert gui_hooks.profile_will_close\n"
+        "assert gui_hooks.webview_did_receive_js_message[0]((False, None), 'x', None)"
+        " == (False, None)\n"
+        "assert 'anki_chess.addon.on_js_bridge_message' not in sys.modules"
+    )
+    _check_startup("anki_chess.addon", code, [str(tmp_path)])
@@ -0,0 +1,122 @@
+import io
+import json
+import pstats
+import time
+
+import pytest
+
+from anki_chess import cli
+from anki_chess.pgn2anki.parser import iter_lines
+from anki_chess.pgn2anki.stats import PipelineStats
+
+
+PGN = """[Event "A"]
+
+1. e4 e5 (1... c5 2. Nf3) 2. Nf3 Nc6 *
+
+[Event "B"]
+
+1. d4 d5 2. c4 (2. Nf3 Nf6) 2... e6 *
+"""
+
+
+def _slow_items(n, delay):
+    for i in range(n):
+        time.sleep(delay)
+        yield i
+
+
+def test_wrap_counts_items_and_calls():
+    stats = PipelineStats()
+    items = list(stats.wrap("read", range(3), "games"))
+    stage = stats.stages["read"]
+    assert items == [0, 1, 2], f"Items changed by wrap: {items}"
+    assert stage.counts["games"] == 3, f"Expected 3 games, got {stage.counts}"
+    # One call per item plus the call that hits StopIteration.
+    assert stage.calls == 4, f"Expected 4 calls, got {stage.calls}"
+
+
+def test_nested_stages_charge_time_to_innermost_stage():
+    stats = PipelineStats()
+    inner = stats.wrap("inner", _slow_items(3, 0.01))
+    outer = stats.wrap("outer", (i for i in inner))
+    list(outer)
+    inner_wall = stats.stages["inner"].wall
+    outer_wall = stats.stages["outer"].wall
+    assert inner_wall >= 0.03, f"Inner stage under-charged: {inner_wall:.4f}s"
+    assert outer_wall < inner_wall / 2, (
+        f"Outer stage charged for inner work: outer {outer_wall:.4f}s, "
+        f"inner {inner_wall:.4f}s"
+    )
+
+
+def test_trace_records_one_span_per_activation():
+    stats = PipelineStats(trace=True)
+    with stats.stage("write"):
+        list(stats.wrap("read", range(2)))
+    assert stats.events is not None
+    names = [e["name"] for e in stats.events]
+    assert names == ["read", "read", "read", "write"], f"Unexpected spans {names}"
+    buf = io.StringIO()
+    stats.write_trace(buf)
+    events = json.loads(buf.getvalue())["traceEvents"]
+    assert all(e["ph"] == "X" and e["dur"] >= 0 for e in events), (
+        f"Malformed trace events: {events}"
+    )
+
+
+def test_stats_without_trace_keeps_no_events():
+    stats = PipelineStats()
+    with stats.stage("write"):
+        pass
+    assert stats.events is None, f"Expected no events, got {stats.events}"
+
+
+@pytest.mark.parametrize("compact", [False, True])
+def test_iter_lines_with_stats_yields_same_lines(compact):
+    stats = PipelineStats()
+    plain = list(iter_lines(io.StringIO(PGN), compact=compact))
+    timed = list(iter_lines(io.StringIO(PGN), compact=compact, stats=stats))
+    assert timed == plain, f"Stats changed the output: {timed} != {plain}"
+    counts = {name: dict(s.counts) for name, s in stats.stages.items()}
+    assert counts["read"] == {"games": 2}, f"Unexpected read counts {counts}"
+    assert counts["dfs"] == {"lines": 4}, f"Unexpected dfs counts {counts}"
+    assert counts["tree"] == {"nodes": 12}, f"Unexpected tree counts {counts}"
+    assert counts["lines"] == {"lines": 4}, f"Unexpected line counts {counts}"
+
+
+def test_main_prints_stats_and_writes_trace_and_profile(tmp_path, capsys):
+    pgn_file = tmp_path / "input.pgn"
+    pgn_file.write_text(PGN, encoding="utf-8")
+    out_csv = tmp_path / "out.csv"
+    trace = tmp_path / "trace.json"
+    profile = tmp_path / "run.prof"
+    cli.main(
+        [
+            str(pgn_file),
+            "--output_csv",
+            str(out_csv),
+            "--stats",
+            "--trace",
+            str(trace),
+            "--profile",
+            str(profile),
+        ]
+    )
+    err = capsys.readouterr().err
+    assert f"bytes={out_csv.stat().st_size}" in err, f"Missing write bytes: {err}"
+    assert "tokens=" in err, f"Missing token count: {err}"
+    events = json.loads(trace.read_text())["traceEvents"]
+    assert {e["name"] for e in events} >= {"read", "tokenize", "write"}, (
+        f"Trace is missing stages: {events[:5]}"
+    )
+    profiled = pstats.Stats(str(profile)).get_stats_profile().func_profiles
+    assert profiled, "Empty cProfile dump"
+
+
+def test_main_without_stats_prints_nothing_to_stderr(tmp_path, capsys):
+    pgn_file = tmp_path / "input.pgn"
+    pgn_file.write_text(PGN, encoding="utf-8")
+    cli.main([str(pgn_file), "--output_csv", str(tmp_path / "out.csv")])
+    err = capsys.readouterr().err
+    assert err == "", f"Unexpected stderr output: {err!r}"
@@ -0,0 +1,105 @@
+import io
+import json
+import chess
+import pytest
+from anki_chess import cli
+from anki_chess.pgn2anki import parser
+from anki_chess.pgn2anki.validate import MoveError, ValidationReport
+
+
+@pytest.fixture
+def report():
+    return ValidationReport()
+
+
+def test_check_game_keeps_legal_lines(report):
+    seqs = [["e4", "e5", "Nf3"], ["e4", "c5"], ["d4!", "d5"]]
+    assert report.check_game(seqs) == seqs
+    assert report.errors == [] and (report.games, report.lines) == (1, 3)
+
+
+def test_check_game_reports_game_line_ply_and_token(report):
+    report.check_game([["e4"]])
+    valid = report.check_game([["e4", "e5"], ["e4", "e5", "Nf4", "Nc6"], ["d4"]])
+    assert valid == [["e4", "e5"], ["d4"]], f"Unexpected valid lines: {valid}"
+    assert len(report.errors) == 1, f"Expected one error, got {report.errors}"
+    error = report.errors[0]
+    assert (error.game, error.line, error.ply, error.token) == (2, 2, 3, "Nf4")
+
+
+def test_shared_bad_prefix_is_reported_once(report):
+    seqs = [["e4", "Ke3", "Nf3"], ["e4", "Ke3", "d4"], ["e4", "e5"]]
+    assert report.check_game(seqs) == [["e4", "e5"]]
+    assert len(report.errors) == 1, f"Expected one error, got {report.errors}"
+
+
+def test_check_game_replays_shared_prefix_once(report, monkeypatch):
+    pushed = []
+    original = chess.Board.push_san
+
+    def counting_push_san(self, san):
+        pushed.append(san)
+        return original(self, san)
+
+    monkeypatch.setattr(chess.Board, "push_san", counting_push_san)
+    report.check_game([["e4", "e5", "Nf3"], ["e4", "e5", "Nc3"], ["e4", "c5"]])
+    assert pushed == ["e4", "e5", "Nf3", "Nc3", "c5"], f"Unexpected replay: {pushed}"
+
+
+def test_move_error_str_names_location():
+    text = str(MoveError(game=3, line=2, ply=7, token="Nf9", message="invalid san"))
+    assert text == "game 3, line 2, ply 7: 'Nf9' (invalid san)"
+
+
+def test_to_json_lists_errors(report):
+    report.check_game([["e4", "e4"]])
+    data = json.loads(report.to_json())
+    assert data["errors"][0]["token"] == "e4" and data["errors"][0]["ply"] == 2
+
+
+@pytest.mark.parametrize("transpositions", [False, True])
+def test_iter_lines_with_validation_skips_illegal_lines(report, transpositions):
+    pgn = "1. e4 e5 (1... Nf6 2. Qh9) 2. Nf3 *"
+    lines = list(
+        parser.iter_lines(
+            io.StringIO(pgn), validation=report, transpositions=transpositions
+        )
+    )
+    assert [line.san_seq for line in lines] == [["e4", "e5", "Nf3"]]
+    assert [e.token for e in report.errors] == ["Qh9"]
+
+
+def test_main_validate_writes_report_and_returns_error_status(tmp_path, capsys):
+    pgn_file = tmp_path / "in.pgn"
+    pgn_file.write_text("1. e4 e5 2. Nf9 *", encoding="utf-8")
+    report_file = tmp_path / "report.json"
+    argv = [str(pgn_file), "--output_csv", str(tmp_path / "out.csv")]
+    status = cli.main(argv + ["--validate-report", str(report_file)])
+    assert status == 1, f"Expected exit status 1, got {status}"
+    assert json.loads(report_file.read_text())["errors"][0]["token"] == "Nf9"
+    assert "Nf9" in capsys.readouterr().err
+
+
+def test_main_validate_clean_input_returns_zero(tmp_path, capsys):
+    pgn_file = tmp_path / "in.pgn"
+    pgn_file.write_text("1. e4 e5 *", encoding="utf-8")
+    argv = [str(pgn_file), "--output_csv", str(tmp_path / "out.csv"), "--validate"]
+    assert cli.main(argv) == 0
+
+
+def test_check_game_numbers_games_per_source():
+    report = ValidationReport(sources=iter(["a.pgn", "a.pgn", "b.pgn"]))
+    for _ in range(3):
+        report.check_game([["e4", "Nf9"]])
+    located = [(e.source, e.game) for e in report.errors]
+    assert located == [("a.pgn", 1), ("a.pgn", 2), ("b.pgn", 1)], f"got {located}"
+    assert str(report.errors[2]).startswith("b.pgn: game 1, line 1, ply 2")
+
+
+def test_main_validate_names_the_file_of_each_error(tmp_path, capsys):
+    (tmp_path / "a.pgn").write_text("1. e4 e5 *", encoding="utf-8")
+    (tmp_path / "b.pgn").write_text("1. d4 Nf9 *", encoding="utf-8")
+    argv = [str(tmp_path), "--output_csv", str(tmp_path / "out.csv"), "--validate"]
+    assert cli.main(argv) == 1
+    err = capsys.readouterr().err
+    assert f"{tmp_path / 'b.pgn'}: game 1, line 1, ply 2: 'Nf9'" in err, err
@@ -0,0 +1,115 @@
+import csv
+import os
+
+import pytest
+
+from anki_chess import cli
+from anki_chess.pgn2anki.watch import MemoryGameCache, Watcher, atomic_output
+
+GAME_A = '[Event "A"]\n\n1. e4 e5 (1... c5 2. Nf3) 2. Nf3 *\n'
+GAME_B = '[Event "B"]\n\n1. d4 d5 2. c4 *\n'
+
+
+def _touch(path, text):
+    """Write ``text`` and bump the mtime so the change is seen at any resolution."""
+    st = path.stat() if path.exists() else None
+    path.write_text(text, encoding="utf-8")
+    if st is not None:
+        os.utime(path, ns=(st.st_atime_ns, st.st_mtime_ns + 10**9))
+
+
+def _rows(path):
+    with open(path, encoding="utf-8", newline="") as fp:
+        return list(csv.DictReader(fp))
+
+
+def test_watcher_rebuilds_only_changed_files(tmp_path):
+    for name in ("a", "b"):
+        _touch(tmp_path / f"{name}.pgn", GAME_A)
+    calls = []
+    watcher = Watcher(tmp_path, lambda path, text, cache: calls.append(path.name))
+    assert watcher.poll() == ([tmp_path / "a.pgn", tmp_path / "b.pgn"], [])
+    assert watcher.poll() == ([], []), "unchanged files must not be rebuilt"
+
+    _touch(tmp_path / "b.pgn", GAME_B)
+    rebuilt, _ = watcher.poll()
+    assert rebuilt == [tmp_path / "b.pgn"], f"expected only b.pgn, got {rebuilt}"
+
+    # A new mtime with the same content does not rebuild.
+    _touch(tmp_path / "b.pgn", GAME_B)
+    assert watcher.poll() == ([], [])
+
+    (tmp_path / "a.pgn").unlink()
+    assert watcher.poll() == ([], [tmp_path / "a.pgn"])
+    assert calls == ["a.pgn", "b.pgn", "b.pgn"], f"unexpected rebuilds {calls}"
+
+
+def test_watcher_retries_a_file_after_a_failed_rebuild(tmp_path, capsys):
+    path = tmp_path / "a.pgn"
+    _touch(path, GAME_A)
+    fail = [True]
+
+    def rebuild(path, text, cache):
+        if fail[0]:
+            raise ValueError("broken")
+
+    watcher = Watcher(tmp_path, rebuild)
+    assert watcher.poll() == ([], [])
+    assert "broken" in capsys.readouterr().err
+    fail[0] = False
+    _touch(path, GAME_A)
+    assert watcher.poll() == ([path], [])
+
+
+def test_memory_game_cache_keeps_only_games_of_the_last_build():
+    cache = MemoryGameCache()
+    cache.put(GAME_A, [["e4"]])
+    cache.put(GAME_B, [["d4"]])
+    cache.commit()
+    assert cache.get(GAME_A) == [["e4"]]
+    cache.commit()
+    assert len(cache) == 1, "GAME_B was not used by the last build"
+    assert cache.get(GAME_B) is None
+
+
+def test_atomic_output_keeps_old_file_on_error(tmp_path):
+    path = tmp_path / "out.csv"
+    path.write_text("old")
+    with pytest.raises(RuntimeError), atomic_output(path) as tmp:
+        tmp.write_text("half")
+        raise RuntimeError
+    assert path.read_text() == "old"
+    assert list(tmp_path.iterdir()) == [path], "temporary file left behind"
+    with atomic_output(path) as tmp:
+        tmp.write_text("new")
+    assert path.read_text() == "new"
+
+
+def test_cli_watch_once_writes_one_output_per_file(tmp_path):
+    src = tmp_path / "pgn"
+    (src / "sub").mkdir(parents=True)
+    _touch(src / "open.pgn", GAME_A)
+    _touch(src / "sub" / "queen.pgn", GAME_B)
+    out = tmp_path / "out"
+    argv = ["watch", str(src), "--output-dir", str(out), "--pattern", "**/*.pgn"]
+    assert cli.main([*argv, "--once", "--title", "Rep"]) == 0
+
+    rows = _rows(out / "open.csv")
+    assert [r["Title"] for r in rows] == ["Rep open #1", "Rep open #2"]
+    rows = _rows(out / "sub" / "queen.csv")
+    assert [r["SAN_SEQ_JSON"] for r in rows] == ['["d4", "d5", "c4"]']
+
+
+def test_cli_watch_rebuild_reuses_unchanged_games(tmp_path):
+    path = tmp_path / "rep.pgn"
+    _touch(path, GAME_A + "\n" + GAME_B)
+    args = cli._initialize_watch_argument_parser().parse_args([str(tmp_path)])
+    cache = MemoryGameCache()
+    cli._watch_rebuild(args, path, path.read_text(), cache)
+    cache.commit()
+    cli._watch_rebuild(args, path, GAME_A + "\n" + GAME_B + "\n" + GAME_B, cache)
+    assert (cache.hits, cache.misses) == (3, 2), (
+        f"expected the edit to parse no game again, got {cache.hits} hits "
+        f"and {cache.misses} misses"
+    )
+    assert len(_rows(tmp_path / "rep.csv")) == 4